@@ -2,16 +2,38 @@
 Script to check the built static site for common issues and errors.
 """
 
+import abc
+import argparse
+import hashlib
+import importlib.metadata
+import json
 import os
+import platform
 import re
+import sqlite3
 import subprocess
 import sys
-from collections import Counter
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, List, Set
-
+from typing import (
+    Collection,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+import bs4
 import tqdm
-from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4 import BeautifulSoup, NavigableString, PageElement, Tag
 
 # Add the project root to sys.path
 # pylint: disable=C0413
@@ -25,20 +47,187 @@ RSS_XSD_PATH = git_root / "scripts" / ".rss-2.0.xsd"
 
 IssuesDict = Dict[str, List[str] | bool]
 
+ResultT = TypeVar("ResultT", List[str], bool)
 
-def check_localhost_links(soup: BeautifulSoup) -> List[str]:
+# Elements which formatting_improvement_html.ts does not format
+SKIP_TAGS = frozenset({"code", "pre", "script", "style"})
+SKIP_CLASSES = frozenset({"no-formatting", "elvish", "bad-handwriting"})
+
+
+class PageDependencies(NamedTuple):
+    """
+    Files other than the page itself which a page's check results depend on.
+    """
+
+    # The results depend on these files' contents (or their absence)
+    contents: Set[Path]
+    # The results only depend on whether these files exist
+    existence: Set[Path]
+
+
+class WalkContext(NamedTuple):
+    """
+    What `run_page_checks` knows about a node's ancestors when visiting it.
+    """
+
+    # Within an element which formatting_improvement_html.ts skips
+    skipped: bool = False
+    in_code: bool = False
+    in_flowchart: bool = False
+    # Within a <p> or <dt>
+    in_paragraph: bool = False
+
+    def enter(self, tag: Tag, classes: List[str]) -> "WalkContext":
+        """
+        Return the context of `tag`'s children.
+        """
+        return WalkContext(
+            skipped=self.skipped
+            or tag.name in SKIP_TAGS
+            or not SKIP_CLASSES.isdisjoint(classes),
+            in_code=self.in_code or tag.name == "code",
+            in_flowchart=self.in_flowchart or "flowchart" in classes,
+            in_paragraph=self.in_paragraph or tag.name in ("p", "dt"),
+        )
+
+
+class PageCheck(abc.ABC, Generic[ResultT]):
+    """
+    A check which is run during a single walk over a page by
+    `run_page_checks`.
+
+    Subclasses register interest in tags by name (`tags`, or None for every
+    tag), in tags with any of `classes`, and in text nodes (`visits_text`).
+    Text nodes are only visited if they are non-blank and, unless
+    `visits_skipped_text` is set, not within an element that
+    formatting_improvement_html.ts skips (see `should_skip`).
+    """
+
+    tags: Optional[frozenset[str]] = frozenset()
+    classes: frozenset[str] = frozenset()
+    visits_text: bool = False
+    visits_skipped_text: bool = False
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        """
+        Visit a tag which this check is interested in.
+        """
+
+    def visit_text(self, text: NavigableString, context: WalkContext) -> None:
+        """
+        Visit a non-blank text node.
+        """
+
+    @abc.abstractmethod
+    def result(self) -> ResultT:
+        """
+        Return the issues found once the walk is done.
+        """
+
+    def dependencies(self) -> PageDependencies:
+        """
+        Return the files which the result depends on, once the walk is done.
+        """
+        return PageDependencies(set(), set())
+
+
+def _tag_classes(tag: Tag) -> List[str]:
+    classes: str | List[str] = tag.get("class") or []
+    return classes.split() if isinstance(classes, str) else classes
+
+
+def run_page_checks(
+    soup: BeautifulSoup, checks: Dict[str, PageCheck]
+) -> Dict[str, List[str] | bool]:
+    """
+    Run all checks in one pre-order walk over the page. What checks need to
+    know about a node's ancestors (`WalkContext`) is inherited while
+    descending, instead of being recomputed by searching the tree.
+
+    Returns:
+        The result of each check, keyed like `checks`
+    """
+    every_tag_checks: List[PageCheck] = []
+    checks_by_tag: Dict[str, List[PageCheck]] = defaultdict(list)
+    checks_by_class: Dict[str, List[PageCheck]] = defaultdict(list)
+    text_checks: List[PageCheck] = []
+    skipped_text_checks: List[PageCheck] = []
+    for check in checks.values():
+        if check.tags is None:
+            every_tag_checks.append(check)
+        else:
+            for tag_name in check.tags:
+                checks_by_tag[tag_name].append(check)
+        for class_ in check.classes:
+            checks_by_class[class_].append(check)
+        if check.visits_text:
+            text_checks.append(check)
+            if check.visits_skipped_text:
+                skipped_text_checks.append(check)
+
+    root_context = WalkContext()
+    to_visit: List[Tuple[PageElement, WalkContext]] = [
+        (child, root_context) for child in reversed(soup.contents)
+    ]
+    while to_visit:
+        element, context = to_visit.pop()
+        if isinstance(element, Tag):
+            classes = _tag_classes(element)
+            interested = every_tag_checks + checks_by_tag.get(element.name, [])
+            for class_ in classes:
+                interested.extend(checks_by_class.get(class_, []))
+            # A check interested in several of a tag's classes sees it once
+            for check in dict.fromkeys(interested):
+                check.visit_tag(element, context)
+
+            child_context = context.enter(element, classes)
+            to_visit.extend(
+                (child, child_context) for child in reversed(element.contents)
+            )
+        elif isinstance(element, NavigableString) and element.strip():
+            for check in (
+                skipped_text_checks if context.skipped else text_checks
+            ):
+                check.visit_text(element, context)
+
+    return {name: check.result() for name, check in checks.items()}
+
+
+def run_page_check(soup: BeautifulSoup, check: PageCheck[ResultT]) -> ResultT:
+    """
+    Run a single check over the page.
+    """
+    result = run_page_checks(soup, {"check": check})["check"]
+    return result  # type: ignore[return-value]
+
+
+class LocalhostLinksCheck(PageCheck[List[str]]):
     """
     Check for localhost links in the HTML.
     """
-    localhost_links = []
-    links = soup.find_all("a", href=True)
-    for link in links:
-        href = link["href"]
-        if href.startswith("localhost:") or href.startswith(
-            ("http://localhost", "https://localhost")
+
+    tags = frozenset({"a"})
+
+    def __init__(self) -> None:
+        self.localhost_links: List[str] = []
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        href = tag.get("href")
+        if href is not None and (
+            href.startswith("localhost:")
+            or href.startswith(("http://localhost", "https://localhost"))
         ):
-            localhost_links.append(href)
-    return localhost_links
+            self.localhost_links.append(href)
+
+    def result(self) -> List[str]:
+        return self.localhost_links
+
+
+def check_localhost_links(soup: BeautifulSoup) -> List[str]:
+    """
+    Check for localhost links in the HTML.
+    """
+    return run_page_check(soup, LocalhostLinksCheck())
 
 
 def check_favicons_missing(soup: BeautifulSoup) -> bool:
@@ -48,103 +237,203 @@ def check_favicons_missing(soup: BeautifulSoup) -> bool:
     return not soup.select("article p img.favicon")
 
 
-def check_unrendered_footnotes(soup: BeautifulSoup) -> List[str]:
+class UnrenderedFootnotesCheck(PageCheck[List[str]]):
     """
     Check for unrendered footnotes in the format [^something].
 
     Returns a list of the footnote references themselves.
     """
+
     # Matches [^1], [^note], [^note-1], etc.
-    footnote_pattern = r"\[\^[a-zA-Z0-9-_]+\]"
-    unrendered_footnotes = []
+    footnote_pattern = re.compile(r"\[\^[a-zA-Z0-9-_]+\]")
+    tags = frozenset({"p"})
 
-    for p in soup.find_all("p"):
-        matches = re.findall(footnote_pattern, p.text)
-        if matches:
-            unrendered_footnotes.extend(matches)
+    def __init__(self) -> None:
+        self.unrendered_footnotes: List[str] = []
 
-    return unrendered_footnotes
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        self.unrendered_footnotes.extend(
+            self.footnote_pattern.findall(tag.text)
+        )
 
+    def result(self) -> List[str]:
+        return self.unrendered_footnotes
 
-def check_invalid_anchors(soup: BeautifulSoup, base_dir: Path) -> List[str]:
+
+def check_unrendered_footnotes(soup: BeautifulSoup) -> List[str]:
+    """
+    Check for unrendered footnotes in the format [^something].
+
+    Returns a list of the footnote references themselves.
+    """
+    return run_page_check(soup, UnrenderedFootnotesCheck())
+
+
+# Maps HTML pages to the ids of their elements. Filled as pages are parsed, so
+# that each page is parsed at most once per process for anchor checks.
+_page_ids_index: Dict[Path, Set[str]] = {}
+
+
+def _element_ids(soup: BeautifulSoup) -> Set[str]:
+    return {element["id"] for element in soup.find_all(id=True)}
+
+
+def get_page_ids(
+    page_path: Path, parser: Optional[script_utils.HtmlParser] = None
+) -> Set[str]:
+    """
+    Get the ids of all elements in an HTML page, parsing the page only if it
+    has not already been indexed.
+    """
+    if page_path not in _page_ids_index:
+        _page_ids_index[page_path] = _element_ids(
+            script_utils.parse_html_file(page_path, parser)
+        )
+    return _page_ids_index[page_path]
+
+
+class InvalidAnchorsCheck(PageCheck[List[str]]):
     """
     Check for invalid internal anchor links in the HTML.
+
+    An empty anchor (e.g. `#`) links to the top of the page, so it is valid.
     """
-    invalid_anchors = []
-    links = soup.find_all("a", href=True)
-    for link in links:
-        href = link["href"]
-        if href.startswith("#"):
-            # Check anchor in current page
-            anchor_id = href[1:]
-            if not soup.find(id=anchor_id):
-                invalid_anchors.append(href)
-        elif (href.startswith("/") or href.startswith(".")) and "#" in href:
-            # Check anchor in other internal page
-            page_path, anchor = href.split("#", 1)
-            # Remove leading ".." from page_path
-            page_path = page_path.lstrip("./")
-            full_path = base_dir / page_path
-            if not full_path.suffix == ".html":
-                full_path = full_path.with_suffix(".html")
-
-            if full_path.is_file():
-                with open(full_path, "r", encoding="utf-8") as f:
-                    page_soup = BeautifulSoup(f.read(), "html.parser")
-                if not page_soup.find(id=anchor):
+
+    tags = None  # Collects the ids of every tag
+
+    def __init__(
+        self,
+        base_dir: Path,
+        page_path: Path | None = None,
+        parser: Optional[script_utils.HtmlParser] = None,
+    ) -> None:
+        self.base_dir = base_dir
+        self.page_path = page_path
+        self.parser = parser
+        self.ids: Set[str] = set()
+        self.hrefs: List[str] = []
+        self.target_pages: Set[Path] = set()
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        if (id_ := tag.get("id")) is not None:
+            self.ids.add(id_)
+        if tag.name == "a" and (href := tag.get("href")) is not None:
+            self.hrefs.append(href)
+
+    def result(self) -> List[str]:
+        if self.page_path is not None:
+            # Other pages' anchor checks can reuse this page's ids
+            _page_ids_index.setdefault(self.page_path, self.ids)
+
+        invalid_anchors = []
+        for href in self.hrefs:
+            if href.startswith("#"):
+                # Check anchor in current page
+                anchor_id = href[1:]
+                if anchor_id and anchor_id not in self.ids:
                     invalid_anchors.append(href)
-            else:
-                invalid_anchors.append(href)  # Page doesn't exist
-    return invalid_anchors
+            elif (href.startswith("/") or href.startswith(".")) and "#" in href:
+                # Check anchor in other internal page
+                page_path, anchor = href.split("#", 1)
+                # Remove leading ".." from page_path
+                page_path = page_path.lstrip("./")
+                full_path = self.base_dir / page_path
+                if not full_path.suffix == ".html":
+                    full_path = full_path.with_suffix(".html")
+
+                self.target_pages.add(full_path)
+                if full_path.is_file():
+                    if anchor and anchor not in get_page_ids(
+                        full_path, self.parser
+                    ):
+                        invalid_anchors.append(href)
+                else:
+                    invalid_anchors.append(href)  # Page doesn't exist
+        return invalid_anchors
+
+    def dependencies(self) -> PageDependencies:
+        return PageDependencies(contents=self.target_pages, existence=set())
+
+
+def check_invalid_anchors(soup: BeautifulSoup, base_dir: Path) -> List[str]:
+    """
+    Check for invalid internal anchor links in the HTML.
+    """
+    return run_page_check(soup, InvalidAnchorsCheck(base_dir))
 
 
 # Check that no blockquote element ends with ">",
 # because it probably needed a newline before it
-def check_blockquote_elements(soup: BeautifulSoup) -> List[str]:
+class BlockquoteElementsCheck(PageCheck[List[str]]):
     """
     Check for blockquote elements ending with ">".
     """
-    problematic_blockquotes: List[str] = []
-    blockquotes = soup.find_all("blockquote")
-    for blockquote in blockquotes:
+
+    tags = frozenset({"blockquote"})
+
+    def __init__(self) -> None:
+        self.problematic_blockquotes: List[str] = []
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
         # Get the last non-empty string content of the blockquote
-        contents = list(blockquote.stripped_strings)
+        contents = list(tag.stripped_strings)
         if contents and contents[-1].strip().endswith(">"):
             # Get a truncated version of the blockquote content for reporting
             _add_to_list(
-                problematic_blockquotes,
+                self.problematic_blockquotes,
                 " ".join(contents),
                 prefix="Problematic blockquote: ",
             )
-    return problematic_blockquotes
 
+    def result(self) -> List[str]:
+        return self.problematic_blockquotes
 
-def check_unrendered_html(soup: BeautifulSoup) -> List[str]:
+
+def check_blockquote_elements(soup: BeautifulSoup) -> List[str]:
+    """
+    Check for blockquote elements ending with ">".
+    """
+    return run_page_check(soup, BlockquoteElementsCheck())
+
+
+class UnrenderedHtmlCheck(PageCheck[List[str]]):
     """
     Check for unrendered HTML in the page.
 
     Looks for text content containing HTML-like patterns (<tag>, </tag>, or
     <tag/>) that should have been rendered by the markdown processor.
     """
-    problematic_texts: List[str] = []
 
     # Basic HTML tag pattern
-    tag_pattern = r"(</?[a-zA-Z][a-zA-Z0-9]*(?: |/?>))"
-
-    for element in soup.find_all(string=True):
-        if not should_skip(element):  # Reuse existing skip logic
-            text = element.strip()
-            if text:
-                # Look for HTML-like patterns
-                matches = re.findall(tag_pattern, text)
-                if matches:
-                    _add_to_list(
-                        problematic_texts,
-                        text,
-                        prefix=f"Unrendered HTML {matches}: ",
-                    )
+    tag_pattern = re.compile(r"(</?[a-zA-Z][a-zA-Z0-9]*(?: |/?>))")
+    visits_text = True
+
+    def __init__(self) -> None:
+        self.problematic_texts: List[str] = []
+
+    def visit_text(self, text: NavigableString, context: WalkContext) -> None:
+        stripped_text = text.strip()
+        # Look for HTML-like patterns
+        matches = self.tag_pattern.findall(stripped_text)
+        if matches:
+            _add_to_list(
+                self.problematic_texts,
+                stripped_text,
+                prefix=f"Unrendered HTML {matches}: ",
+            )
+
+    def result(self) -> List[str]:
+        return self.problematic_texts
+
+
+def check_unrendered_html(soup: BeautifulSoup) -> List[str]:
+    """
+    Check for unrendered HTML in the page.
 
-    return problematic_texts
+    Looks for text content containing HTML-like patterns (<tag>, </tag>, or
+    <tag/>) that should have been rendered by the markdown processor.
+    """
+    return run_page_check(soup, UnrenderedHtmlCheck())
 
 
 def _add_to_list(
@@ -169,12 +458,13 @@ def _add_to_list(
             lst.append(prefix + to_append)
 
 
-def check_problematic_paragraphs(soup: BeautifulSoup) -> List[str]:
+class ProblematicParagraphsCheck(PageCheck[List[str]]):
     """
     Check for text nodes starting with specific phrases.
 
     Efficiently searches without duplicates, ignoring text within <code> tags.
     """
+
     bad_anywhere = (
         r"\*\*",  # Bold markdown
         r"\_",  # Underscore
@@ -182,75 +472,117 @@ def check_problematic_paragraphs(soup: BeautifulSoup) -> List[str]:
     )
     bad_prefixes = (r"Table: ", r"Figure: ", r"Code: ")
     bad_paragraph_starting_prefixes = (r"^: ", r"^#+ ")
+    tags = frozenset({"p", "dt", "article", "blockquote"})
+    visits_text = True
+    visits_skipped_text = True
 
-    problematic_paragraphs: List[str] = []
+    def __init__(self) -> None:
+        self.problematic_paragraphs: List[str] = []
+        # Direct text in <article> and <blockquote> is reported after all
+        # <p> and <dt> elements
+        self.problematic_direct_text: List[str] = []
 
-    def _maybe_add_text(text: str) -> None:
+    def _maybe_add_text(self, text: str, lst: List[str]) -> None:
         text = text.strip()
-        if any(re.search(pattern, text) for pattern in bad_anywhere) or any(
-            re.search(prefix, text) for prefix in bad_prefixes
-        ):
-            _add_to_list(
-                problematic_paragraphs, text, prefix="Problematic paragraph: "
-            )
-
-    # Check all <p> and <dt> elements
-    for element in soup.find_all(["p", "dt"]):
         if any(
-            re.search(prefix, element.text)
-            for prefix in bad_paragraph_starting_prefixes
-        ):
-            _add_to_list(
-                problematic_paragraphs,
-                element.text,
-                prefix="Problematic paragraph: ",
-            )
-        for text_node in element.find_all(string=True):
-            if not any(parent.name == "code" for parent in text_node.parents):
-                _maybe_add_text(text_node)
+            re.search(pattern, text) for pattern in self.bad_anywhere
+        ) or any(re.search(prefix, text) for prefix in self.bad_prefixes):
+            _add_to_list(lst, text, prefix="Problematic paragraph: ")
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        if tag.name in ("p", "dt"):
+            if any(
+                re.search(prefix, tag.text)
+                for prefix in self.bad_paragraph_starting_prefixes
+            ):
+                _add_to_list(
+                    self.problematic_paragraphs,
+                    tag.text,
+                    prefix="Problematic paragraph: ",
+                )
+        else:
+            for child in tag.children:
+                if isinstance(child, str):  # Check if it's a direct text node
+                    self._maybe_add_text(child, self.problematic_direct_text)
 
-    # Check direct text in <article> and <blockquote>
-    for parent in soup.find_all(["article", "blockquote"]):
-        for child in parent.children:
-            if isinstance(child, str):  # Check if it's a direct text node
-                _maybe_add_text(child)
+    def visit_text(self, text: NavigableString, context: WalkContext) -> None:
+        if context.in_paragraph and not context.in_code:
+            self._maybe_add_text(text, self.problematic_paragraphs)
 
-    return problematic_paragraphs
+    def result(self) -> List[str]:
+        return self.problematic_paragraphs + self.problematic_direct_text
 
 
-def check_unrendered_spoilers(soup: BeautifulSoup) -> List[str]:
+def check_problematic_paragraphs(soup: BeautifulSoup) -> List[str]:
+    """
+    Check for text nodes starting with specific phrases.
+
+    Efficiently searches without duplicates, ignoring text within <code> tags.
+    """
+    return run_page_check(soup, ProblematicParagraphsCheck())
+
+
+class UnrenderedSpoilersCheck(PageCheck[List[str]]):
     """
     Check for unrendered spoilers.
     """
-    unrendered_spoilers: List[str] = []
-    blockquotes = soup.find_all("blockquote")
-    for blockquote in blockquotes:
+
+    tags = frozenset({"blockquote"})
+
+    def __init__(self) -> None:
+        self.unrendered_spoilers: List[str] = []
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
         # Check each paragraph / text child in the blockquote
-        for child in blockquote.children:
+        for child in tag.children:
             if child.name == "p":
                 text = child.get_text().strip()
                 if text.startswith("! "):
                     _add_to_list(
-                        unrendered_spoilers, text, prefix="Unrendered spoiler: "
+                        self.unrendered_spoilers,
+                        text,
+                        prefix="Unrendered spoiler: ",
                     )
-    return unrendered_spoilers
 
+    def result(self) -> List[str]:
+        return self.unrendered_spoilers
 
-def check_unrendered_subtitles(soup: BeautifulSoup) -> List[str]:
+
+def check_unrendered_spoilers(soup: BeautifulSoup) -> List[str]:
+    """
+    Check for unrendered spoilers.
+    """
+    return run_page_check(soup, UnrenderedSpoilersCheck())
+
+
+class UnrenderedSubtitlesCheck(PageCheck[List[str]]):
     """
     Check for unrendered subtitle lines.
     """
-    unrendered_subtitles: List[str] = []
-    paragraphs = soup.find_all("p")
-    for p in paragraphs:
-        text = p.get_text().strip()
-        if text.startswith("Subtitle:") and "subtitle" not in p.get(
+
+    tags = frozenset({"p"})
+
+    def __init__(self) -> None:
+        self.unrendered_subtitles: List[str] = []
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        text = tag.get_text().strip()
+        if text.startswith("Subtitle:") and "subtitle" not in tag.get(
             "class", []
         ):
             _add_to_list(
-                unrendered_subtitles, text, prefix="Unrendered subtitle: "
+                self.unrendered_subtitles, text, prefix="Unrendered subtitle: "
             )
-    return unrendered_subtitles
+
+    def result(self) -> List[str]:
+        return self.unrendered_subtitles
+
+
+def check_unrendered_subtitles(soup: BeautifulSoup) -> List[str]:
+    """
+    Check for unrendered subtitle lines.
+    """
+    return run_page_check(soup, UnrenderedSubtitlesCheck())
 
 
 # Check the existence of local files with these extensions
@@ -284,110 +616,224 @@ def resolve_media_path(src: str, base_dir: Path) -> Path:
     return full_path
 
 
-def check_local_media_files(soup: BeautifulSoup, base_dir: Path) -> List[str]:
+class LocalMediaFilesCheck(PageCheck[List[str]]):
     """
     Verify the existence of local media files (images, videos, SVGs).
     """
-    missing_files = []
-    media_tags = soup.find_all(["img", "video", "source", "svg"])
 
-    for tag in media_tags:
+    tags = frozenset({"img", "video", "source", "svg"})
+
+    def __init__(self, base_dir: Path) -> None:
+        self.base_dir = base_dir
+        self.missing_files: List[str] = []
+        self.checked_files: Set[Path] = set()
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
         src = tag.get("src") or tag.get("href")
+        if not isinstance(src, str):
+            return
         if src and not src.startswith(("http://", "https://")):
             # It's a local file
             file_extension = Path(src).suffix.lower()
             if file_extension in _MEDIA_EXTENSIONS:
-                full_path = resolve_media_path(src, base_dir)
+                full_path = resolve_media_path(src, self.base_dir)
+                # resolve_media_path may have tried the direct path first
+                self.checked_files.update(
+                    {full_path, (self.base_dir / src).resolve()}
+                )
                 if not full_path.is_file():
-                    missing_files.append(f"{src} (resolved to {full_path})")
+                    self.missing_files.append(
+                        f"{src} (resolved to {full_path})"
+                    )
 
-    return missing_files
+    def result(self) -> List[str]:
+        return self.missing_files
 
+    def dependencies(self) -> PageDependencies:
+        return PageDependencies(contents=set(), existence=self.checked_files)
 
-def check_asset_references(
-    soup: BeautifulSoup, file_path: Path, base_dir: Path
-) -> List[str]:
+
+def check_local_media_files(soup: BeautifulSoup, base_dir: Path) -> List[str]:
+    """
+    Verify the existence of local media files (images, videos, SVGs).
+    """
+    return run_page_check(soup, LocalMediaFilesCheck(base_dir))
+
+
+class AssetReferencesCheck(PageCheck[List[str]]):
     """
     Check for asset references and verify their existence.
     """
-    missing_assets = []
 
-    def resolve_asset_path(href: str) -> Path:
+    tags = frozenset({"link", "script"})
+
+    def __init__(self, file_path: Path, base_dir: Path) -> None:
+        self.file_path = file_path
+        self.base_dir = base_dir
+        # Stylesheets are reported before scripts
+        self.missing_stylesheets: List[str] = []
+        self.missing_scripts: List[str] = []
+        self.checked_files: Set[Path] = set()
+
+    def _resolve_asset_path(self, href: str) -> Path:
         if href.startswith("/"):
             # Absolute path within the site
-            return (base_dir / href.lstrip("/")).resolve()
+            return (self.base_dir / href.lstrip("/")).resolve()
         # Relative path
-        return (file_path.parent / href).resolve()
+        return (self.file_path.parent / href).resolve()
 
-    def check_asset(href: str) -> None:
+    def _check_asset(self, href: str, missing_assets: List[str]) -> None:
         if href and not href.startswith(("http://", "https://")):
-            full_path = resolve_asset_path(href)
+            full_path = self._resolve_asset_path(href)
+            self.checked_files.add(full_path)
             if not full_path.is_file():
                 missing_assets.append(
-                    f"{href} (resolved to {full_path.relative_to(base_dir)})"
+                    f"{href} (resolved to "
+                    f"{full_path.relative_to(self.base_dir)})"
                 )
 
-    # Check link tags for CSS files (including preloaded stylesheets)
-    for link in soup.find_all("link"):
-        rel = link.get("rel", [])
-        if isinstance(rel, list):
-            rel = " ".join(rel)
-        if "stylesheet" in rel or (
-            "preload" in rel and link.get("as") == "style"
-        ):
-            check_asset(link.get("href"))
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        if tag.name == "link":
+            # Check link tags for CSS files (including preloaded stylesheets)
+            rel = tag.get("rel", [])
+            if isinstance(rel, list):
+                rel = " ".join(rel)
+            if "stylesheet" in rel or (
+                "preload" in rel and tag.get("as") == "style"
+            ):
+                self._check_asset(tag.get("href"), self.missing_stylesheets)
+        elif tag.get("src") is not None:
+            # Check script tags for JS files
+            self._check_asset(tag["src"], self.missing_scripts)
 
-    # Check script tags for JS files
-    for script in soup.find_all("script", src=True):
-        check_asset(script["src"])
+    def result(self) -> List[str]:
+        return self.missing_stylesheets + self.missing_scripts
 
-    return missing_assets
+    def dependencies(self) -> PageDependencies:
+        return PageDependencies(contents=set(), existence=self.checked_files)
+
+
+def check_asset_references(
+    soup: BeautifulSoup, file_path: Path, base_dir: Path
+) -> List[str]:
+    """
+    Check for asset references and verify their existence.
+    """
+    return run_page_check(soup, AssetReferencesCheck(file_path, base_dir))
+
+
+class KatexErrorsCheck(PageCheck[List[str]]):
+    """
+    Check for KaTeX elements with color #cc0000.
+    """
+
+    classes = frozenset({"katex-error"})
+
+    def __init__(self) -> None:
+        self.problematic_katex: List[str] = []
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        content = tag.get_text().strip()
+        _add_to_list(self.problematic_katex, content, prefix="KaTeX error: ")
+
+    def result(self) -> List[str]:
+        return self.problematic_katex
 
 
 def check_katex_elements_for_errors(soup: BeautifulSoup) -> List[str]:
     """
     Check for KaTeX elements with color #cc0000.
     """
-    problematic_katex: List[str] = []
-    katex_elements = soup.select(".katex-error")
-    for element in katex_elements:
-        content = element.get_text().strip()
-        _add_to_list(problematic_katex, content, prefix="KaTeX error: ")
-    return problematic_katex
+    return run_page_check(soup, KatexErrorsCheck())
 
 
-def katex_element_surrounded_by_blockquote(soup: BeautifulSoup) -> List[str]:
+class KatexOutsideBlockquoteCheck(PageCheck[List[str]]):
     """
     Check for KaTeX display elements that start with '>>' but aren't inside a
     blockquote.
 
     These mathematical statements should be inside a blockquote.
     """
-    problematic_katex: List[str] = []
 
-    # Find all KaTeX display elements
-    katex_displays = soup.find_all(class_="katex-display")
-    for katex in katex_displays:
-        content = katex.get_text().strip()
+    classes = frozenset({"katex-display"})
+
+    def __init__(self) -> None:
+        self.problematic_katex: List[str] = []
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        content = tag.get_text().strip()
         # Check if content starts with '>' and isn't inside a blockquote
         if content.startswith(">"):
-            _add_to_list(problematic_katex, content, prefix="KaTeX error: ")
+            _add_to_list(
+                self.problematic_katex, content, prefix="KaTeX error: "
+            )
+
+    def result(self) -> List[str]:
+        return self.problematic_katex
+
+
+def katex_element_surrounded_by_blockquote(soup: BeautifulSoup) -> List[str]:
+    """
+    Check for KaTeX display elements that start with '>>' but aren't inside a
+    blockquote.
+
+    These mathematical statements should be inside a blockquote.
+    """
+    return run_page_check(soup, KatexOutsideBlockquoteCheck())
 
-    return problematic_katex
+
+class MissingCriticalCssCheck(PageCheck[bool]):
+    """
+    Check if the page does not have exactly one critical CSS block in the
+    head.
+    """
+
+    tags = frozenset({"head"})
+
+    def __init__(self) -> None:
+        self.head: Tag | None = None
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        if self.head is None:
+            self.head = tag
+
+    def result(self) -> bool:
+        if self.head is None:
+            return True
+        critical_css_blocks = self.head.find_all(
+            "style", {"id": "critical-css"}
+        )
+        return len(critical_css_blocks) != 1
 
 
 def check_critical_css(soup: BeautifulSoup) -> bool:
     """
     Check if the page has exactly one critical CSS block in the head.
     """
-    head = soup.find("head")
-    if isinstance(head, Tag):
-        critical_css_blocks = head.find_all("style", {"id": "critical-css"})
-        return len(critical_css_blocks) == 1
-    return False
+    return not run_page_check(soup, MissingCriticalCssCheck())
 
 
-def check_duplicate_ids(soup: BeautifulSoup) -> List[str]:
+class EmptyBodyCheck(PageCheck[bool]):
+    """
+    Check if the body is empty, like `script_utils.body_is_empty`.
+    """
+
+    tags = frozenset({"body"})
+
+    def __init__(self) -> None:
+        self.body: Tag | None = None
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        if self.body is None:
+            self.body = tag
+
+    def result(self) -> bool:
+        return (
+            self.body is None or len(self.body.find_all(recursive=False)) == 0
+        )
+
+
+class DuplicateIdsCheck(PageCheck[List[str]]):
     """
     Check for duplicate anchor IDs in the HTML.
 
@@ -396,74 +842,107 @@ def check_duplicate_ids(soup: BeautifulSoup) -> List[str]:
     - IDs existing with and without -\\d suffix (e.g., 'intro' and 'intro-1')
     Excludes IDs within mermaid flowcharts.
     """
-    # Get all IDs except those in flowcharts
-    elements_with_ids = [
-        element["id"]
-        for element in soup.find_all(id=True)
-        if not element.find_parent(class_="flowchart")
-    ]
 
-    # Count occurrences of each ID
-    id_counts = Counter(elements_with_ids)
-    duplicates = []
+    tags = None
+
+    def __init__(self) -> None:
+        self.elements_with_ids: List[str] = []
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        # Get all IDs except those in flowcharts
+        id_ = tag.get("id")
+        if id_ is not None and not context.in_flowchart:
+            self.elements_with_ids.append(id_)
+
+    def result(self) -> List[str]:
+        # Count occurrences of each ID
+        id_counts = Counter(self.elements_with_ids)
+        duplicates = []
+
+        # Check for both duplicates and numbered variants
+        for id_, count in id_counts.items():
+            # It's ok for multiple fnrefs to reference the same note
+            if id_.startswith("user-content-fnref-"):
+                continue
+
+            if count > 1:
+                duplicates.append(f"{id_} (found {count} times)")
+
+            # Check if this is a base ID with numbered variants
+            if not re.search(r".*-\d+$", id_):  # If this is not a numbered ID
+                numbered_variants = [
+                    other_id
+                    for other_id in id_counts
+                    if other_id.startswith(id_ + "-")
+                    and re.search(r".*-\d+$", other_id)
+                ]
+                if numbered_variants:
+                    total = count + sum(
+                        id_counts[variant] for variant in numbered_variants
+                    )
+                    duplicates.append(
+                        f"{id_} (found {total} times, including numbered"
+                        " variants)"
+                    )
 
-    # Check for both duplicates and numbered variants
-    for id_, count in id_counts.items():
-        # It's ok for multiple fnrefs to reference the same note
-        if id_.startswith("user-content-fnref-"):
-            continue
+        return duplicates
 
-        if count > 1:
-            duplicates.append(f"{id_} (found {count} times)")
 
-        # Check if this is a base ID with numbered variants
-        if not re.search(r".*-\d+$", id_):  # If this is not a numbered ID
-            numbered_variants = [
-                other_id
-                for other_id in id_counts
-                if other_id.startswith(id_ + "-")
-                and re.search(r".*-\d+$", other_id)
-            ]
-            if numbered_variants:
-                total = count + sum(
-                    id_counts[variant] for variant in numbered_variants
-                )
-                duplicates.append(
-                    f"{id_} (found {total} times, including numbered variants)"
-                )
+def check_duplicate_ids(soup: BeautifulSoup) -> List[str]:
+    """
+    Check for duplicate anchor IDs in the HTML.
 
-    return duplicates
+    Returns a list of:
+    - IDs that appear multiple times
+    - IDs existing with and without -\\d suffix (e.g., 'intro' and 'intro-1')
+    Excludes IDs within mermaid flowcharts.
+    """
+    return run_page_check(soup, DuplicateIdsCheck())
 
 
 EMPHASIS_ELEMENTS_TO_SEARCH = ("p", "dt", "figcaption", "dd")
 
 
-def check_unrendered_emphasis(soup: BeautifulSoup) -> List[str]:
+class UnrenderedEmphasisCheck(PageCheck[List[str]]):
     """
     Check for text nodes starting/ending with markdown emphasis characters (* or
     _).
 
     These likely indicate unrendered markdown emphasis.
     """
-    problematic_texts: List[str] = []
 
-    # Find all text nodes
-    for p in soup.find_all(EMPHASIS_ELEMENTS_TO_SEARCH):
+    tags = frozenset(EMPHASIS_ELEMENTS_TO_SEARCH)
+
+    def __init__(self) -> None:
+        self.problematic_texts: List[str] = []
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
         # Skip script and style elements
-        if p.parent.name in ["script", "style", "code", "pre"]:
-            continue
+        if tag.parent.name in ["script", "style", "code", "pre"]:
+            return
 
         # Check if text ends with * or _ possibly followed by whitespace
-        stripped_text = p.text.strip()
+        stripped_text = tag.text.strip()
         if stripped_text and re.search(r"[*_]\s*$|^\s*[*_]", stripped_text):
             _add_to_list(
-                problematic_texts,
+                self.problematic_texts,
                 stripped_text,
                 show_end=True,
                 prefix="Unrendered emphasis: ",
             )
 
-    return problematic_texts
+    def result(self) -> List[str]:
+        return self.problematic_texts
+
+
+def check_unrendered_emphasis(soup: BeautifulSoup) -> List[str]:
+    """
+    Check for text nodes starting/ending with markdown emphasis characters (* or
+    _).
+
+    These likely indicate unrendered markdown emphasis.
+    """
+    return run_page_check(soup, UnrenderedEmphasisCheck())
 
 
 def should_skip(element: Tag | NavigableString) -> bool:
@@ -471,25 +950,22 @@ def should_skip(element: Tag | NavigableString) -> bool:
     Check if element should be skipped based on formatting_improvement_html.ts
     rules.
     """
-    skip_tags = {"code", "pre", "script", "style"}
-    skip_classes = {"no-formatting", "elvish", "bad-handwriting"}
-
     # Check current element and all parents
     current: Tag | NavigableString | None = element
     while current:
         if isinstance(
             current, Tag
         ):  # Only check Tag elements, not NavigableString
-            if current.name in skip_tags or any(
+            if current.name in SKIP_TAGS or any(
                 class_ in (current.get("class", []) or [])
-                for class_ in skip_classes
+                for class_ in SKIP_CLASSES
             ):
                 return True
         current = current.parent if isinstance(current.parent, Tag) else None
     return False
 
 
-def check_unprocessed_quotes(soup: BeautifulSoup) -> List[str]:
+class UnprocessedQuotesCheck(PageCheck[List[str]]):
     """
     Check for text nodes containing straight quotes (" or ') that should have
     been processed by formatting_improvement_html.ts.
@@ -498,45 +974,75 @@ def check_unprocessed_quotes(soup: BeautifulSoup) -> List[str]:
     - Inside code, pre, script, style tags
     - Elements with classes: no-formatting, elvish, bad-handwriting
     """
-    problematic_quotes: List[str] = []
 
-    # Check all text nodes
-    for element in soup.find_all(string=True):
-        if element.strip() and not should_skip(element):
-            # Look for straight quotes
-            straight_quotes = re.findall(r'["\']', element.string)
-            if straight_quotes:
-                _add_to_list(
-                    problematic_quotes,
-                    element.string,
-                    prefix=f"Unprocessed quotes {straight_quotes}: ",
-                )
+    visits_text = True
 
-    return problematic_quotes
+    def __init__(self) -> None:
+        self.problematic_quotes: List[str] = []
 
+    def visit_text(self, text: NavigableString, context: WalkContext) -> None:
+        # Look for straight quotes
+        straight_quotes = re.findall(r'["\']', text.string)
+        if straight_quotes:
+            _add_to_list(
+                self.problematic_quotes,
+                text.string,
+                prefix=f"Unprocessed quotes {straight_quotes}: ",
+            )
 
-def check_unprocessed_dashes(soup: BeautifulSoup) -> List[str]:
+    def result(self) -> List[str]:
+        return self.problematic_quotes
+
+
+def check_unprocessed_quotes(soup: BeautifulSoup) -> List[str]:
+    """
+    Check for text nodes containing straight quotes (" or ') that should have
+    been processed by formatting_improvement_html.ts.
+
+    Skips nodes that would be skipped by the formatter:
+    - Inside code, pre, script, style tags
+    - Elements with classes: no-formatting, elvish, bad-handwriting
+    """
+    return run_page_check(soup, UnprocessedQuotesCheck())
+
+
+class UnprocessedDashesCheck(PageCheck[List[str]]):
     """
     Check for text nodes containing multiple dashes (-- or ---) that should have
     been processed into em dashes by formatting_improvement_html.ts.
     """
-    problematic_dashes: List[str] = []
 
-    for element in soup.find_all(string=True):
-        if element.strip() and not should_skip(element):
-            # Look for two or more dashes in a row
-            if re.search(r"[~\–\—\-\–]{2,}", element.string):
-                _add_to_list(
-                    problematic_dashes,
-                    element.string,
-                    prefix="Unprocessed dashes: ",
-                )
+    visits_text = True
+
+    def __init__(self) -> None:
+        self.problematic_dashes: List[str] = []
 
-    return problematic_dashes
+    def visit_text(self, text: NavigableString, context: WalkContext) -> None:
+        # Look for two or more dashes in a row
+        if re.search(r"[~\–\—\-\–]{2,}", text.string):
+            _add_to_list(
+                self.problematic_dashes,
+                text.string,
+                prefix="Unprocessed dashes: ",
+            )
+
+    def result(self) -> List[str]:
+        return self.problematic_dashes
+
+
+def check_unprocessed_dashes(soup: BeautifulSoup) -> List[str]:
+    """
+    Check for text nodes containing multiple dashes (-- or ---) that should have
+    been processed into em dashes by formatting_improvement_html.ts.
+    """
+    return run_page_check(soup, UnprocessedDashesCheck())
 
 
 def check_file_for_issues(
-    file_path: Path, base_dir: Path, md_path: Path | None
+    file_path: Path,
+    base_dir: Path,
+    md_path: Path | None,
+    parser: Optional[script_utils.HtmlParser] = None,
 ) -> IssuesDict:
     """
     Check a single HTML file for various issues.
@@ -545,48 +1051,236 @@ def check_file_for_issues(
         file_path: Path to the HTML file to check
         base_dir: Path to the base directory of the site
         md_path: Path to the markdown file that generated the HTML file
+        parser: HTML parser backend to use
 
     Returns:
         Dictionary of issues found in the HTML file
     """
-    soup = script_utils.parse_html_file(file_path)
+    issues, _ = check_file_with_dependencies(
+        file_path, base_dir, md_path, parser
+    )
+    return issues
+
+
+def check_file_with_dependencies(
+    file_path: Path,
+    base_dir: Path,
+    md_path: Path | None,
+    parser: Optional[script_utils.HtmlParser] = None,
+    require_md: bool = False,
+) -> Tuple[IssuesDict, PageDependencies]:
+    """
+    Like `check_file_for_issues`, but also return the files other than
+    `file_path` which the issues depend on.
+
+    Raises:
+        ValueError: If `require_md` and the page has no markdown file, but
+            should have one.
+    """
+    dependencies = PageDependencies(
+        contents={md_path} if md_path else set(), existence=set()
+    )
+    soup = script_utils.parse_html_file(file_path, parser)
+    if (
+        require_md
+        and not md_path
+        and script_utils.should_have_md(file_path, soup=soup)
+    ):
+        raise ValueError(f"Markdown file for {file_path.stem} not found")
     if script_utils.is_redirect(soup):
-        return {}
-
-    issues: IssuesDict = {
-        "localhost_links": check_localhost_links(soup),
-        "invalid_anchors": check_invalid_anchors(soup, base_dir),
-        "problematic_paragraphs": check_problematic_paragraphs(soup),
-        "missing_media_files": check_local_media_files(soup, base_dir),
-        "trailing_blockquotes": check_blockquote_elements(soup),
-        "missing_assets": check_asset_references(soup, file_path, base_dir),
-        "problematic_katex": check_katex_elements_for_errors(soup),
-        "unrendered_subtitles": check_unrendered_subtitles(soup),
-        "unrendered_footnotes": check_unrendered_footnotes(soup),
-        "missing_critical_css": not check_critical_css(soup),
-        "empty_body": script_utils.body_is_empty(soup),
-        "duplicate_ids": check_duplicate_ids(soup),
-        "unrendered_spoilers": check_unrendered_spoilers(soup),
-        "unrendered_emphasis": check_unrendered_emphasis(soup),
-        "katex_outside_blockquote": katex_element_surrounded_by_blockquote(
-            soup
+        return {}, dependencies
+
+    checks: Dict[str, PageCheck] = {
+        "localhost_links": LocalhostLinksCheck(),
+        "invalid_anchors": InvalidAnchorsCheck(
+            base_dir, page_path=file_path, parser=parser
         ),
-        "unprocessed_quotes": check_unprocessed_quotes(soup),
-        "unprocessed_dashes": check_unprocessed_dashes(soup),
-        "unrendered_html": check_unrendered_html(soup),
-        "emphasis_spacing": check_emphasis_spacing(soup),
-        "long_description": check_description_length(soup),
+        "problematic_paragraphs": ProblematicParagraphsCheck(),
+        "missing_media_files": LocalMediaFilesCheck(base_dir),
+        "trailing_blockquotes": BlockquoteElementsCheck(),
+        "missing_assets": AssetReferencesCheck(file_path, base_dir),
+        "problematic_katex": KatexErrorsCheck(),
+        "unrendered_subtitles": UnrenderedSubtitlesCheck(),
+        "unrendered_footnotes": UnrenderedFootnotesCheck(),
+        "missing_critical_css": MissingCriticalCssCheck(),
+        "empty_body": EmptyBodyCheck(),
+        "duplicate_ids": DuplicateIdsCheck(),
+        "unrendered_spoilers": UnrenderedSpoilersCheck(),
+        "unrendered_emphasis": UnrenderedEmphasisCheck(),
+        "katex_outside_blockquote": KatexOutsideBlockquoteCheck(),
+        "unprocessed_quotes": UnprocessedQuotesCheck(),
+        "unprocessed_dashes": UnprocessedDashesCheck(),
+        "unrendered_html": UnrenderedHtmlCheck(),
+        "emphasis_spacing": EmphasisSpacingCheck(),
+        "long_description": DescriptionLengthCheck(),
     }
-
     # Only check markdown assets if md_path exists and is a file
     if md_path and md_path.is_file():
-        issues["missing_markdown_assets"] = check_markdown_assets_in_html(
-            soup, md_path
-        )
+        checks["missing_markdown_assets"] = MarkdownAssetsCheck(md_path)
+    issues: IssuesDict = run_page_checks(soup, checks)
+    for check in checks.values():
+        check_dependencies = check.dependencies()
+        dependencies.contents.update(check_dependencies.contents)
+        dependencies.existence.update(check_dependencies.existence)
 
     if file_path.name == "about.html":  # Not all pages need to be checked
         issues["missing_favicon"] = check_favicons_missing(soup)
-    return issues
+    return issues, dependencies
+
+
+CHECK_MANIFEST_PATH = Path(".cache") / "built_site_checks.sqlite"
+
+
+def _html_parser_version(parser: script_utils.HtmlParser) -> str:
+    if parser == "html.parser":  # Part of the standard library
+        return platform.python_version()
+    try:
+        return importlib.metadata.version(parser)
+    except importlib.metadata.PackageNotFoundError:
+        return "unavailable"
+
+
+def checker_version(parser: Optional[script_utils.HtmlParser] = None) -> str:
+    """
+    Fingerprint of the checking code, the parser and the versions of the
+    libraries the checks use, so that cached results are discarded whenever
+    any of them changes.
+    """
+    parser = parser or script_utils.DEFAULT_HTML_PARSER
+    digest = hashlib.sha256(
+        f"{parser} {_html_parser_version(parser)} {bs4.__version__}".encode()
+    )
+    for source in (
+        Path(__file__),
+        Path(script_utils.__file__),
+        Path(compress.__file__),
+    ):
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+class CheckManifest:
+    """
+    On-disk SQLite record of each page's content hash, the files its results
+    depend on, and its issues from the last run. Lets unchanged pages replay
+    their issues instead of being re-checked.
+
+    A page is fresh if its content, its markdown source and the pages its
+    anchors link to are unchanged (by sha256), and each local asset it
+    references still exists or is still missing. All entries are discarded
+    if `version` differs from the stored one.
+    """
+
+    def __init__(self, db_path: Path, version: str) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(db_path)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                path TEXT PRIMARY KEY,
+                md_path TEXT,
+                sha256 TEXT NOT NULL,
+                dependencies TEXT NOT NULL,
+                issues TEXT NOT NULL
+            );
+            """
+        )
+        row = self._connection.execute(
+            "SELECT value FROM meta WHERE key = 'version'"
+        ).fetchone()
+        if not row or row[0] != version:
+            self._connection.execute("DELETE FROM pages")
+            self._connection.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,)
+            )
+        # Each file is hashed at most once per run
+        self._digests: Dict[Path, str | None] = {}
+
+    def __enter__(self) -> "CheckManifest":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Save new entries to disk and close the database.
+        """
+        self._connection.commit()
+        self._connection.close()
+
+    def _digest(self, path: Path) -> str | None:
+        if path not in self._digests:
+            self._digests[path] = (
+                hashlib.sha256(path.read_bytes()).hexdigest()
+                if path.is_file()
+                else None
+            )
+        return self._digests[path]
+
+    def cached_issues(
+        self, file_path: Path, md_path: Path | None
+    ) -> IssuesDict | None:
+        """
+        Get the issues recorded for a page, if the page is fresh.
+        """
+        row = self._connection.execute(
+            "SELECT md_path, sha256, dependencies, issues FROM pages"
+            " WHERE path = ?",
+            (str(file_path),),
+        ).fetchone()
+        if (
+            not row
+            or row[0] != (str(md_path) if md_path else None)
+            or row[1] != self._digest(file_path)
+        ):
+            return None
+
+        dependencies = json.loads(row[2])
+        for path, digest in dependencies["contents"].items():
+            if self._digest(Path(path)) != digest:
+                return None
+        for path, exists in dependencies["existence"].items():
+            if Path(path).is_file() != exists:
+                return None
+        return json.loads(row[3])
+
+    def record(
+        self,
+        file_path: Path,
+        md_path: Path | None,
+        issues: IssuesDict,
+        dependencies: PageDependencies,
+    ) -> None:
+        """
+        Record the issues found on a page and the files they depend on.
+        """
+        dependencies_json = json.dumps(
+            {
+                "contents": {
+                    str(path): self._digest(path)
+                    for path in sorted(dependencies.contents)
+                },
+                "existence": {
+                    str(path): path.is_file()
+                    for path in sorted(dependencies.existence)
+                },
+            }
+        )
+        self._connection.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+            (
+                str(file_path),
+                str(md_path) if md_path else None,
+                self._digest(file_path),
+                dependencies_json,
+                json.dumps(issues),
+            ),
+        )
 
 
 def check_rss_file_for_issues(
@@ -657,6 +1351,45 @@ def get_md_asset_counts(md_path: Path) -> Counter[str]:
     )
 
 
+class MarkdownAssetsCheck(PageCheck[List[str]]):
+    """
+    Check that all assets referenced in the markdown source appear in the HTML
+    at least as many times as they appear in the markdown.
+    """
+
+    tags = frozenset(tags_to_check_for_missing_assets)
+
+    def __init__(self, md_path: Path) -> None:
+        if not md_path.exists():
+            raise ValueError(f"Markdown file {md_path} does not exist")
+        self.md_path = md_path
+        self.html_asset_counts: Counter[str] = Counter()
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        # Count asset sources in HTML
+        if src := tag.get("src"):
+            self.html_asset_counts[src.strip()] += 1
+
+    def result(self) -> List[str]:
+        md_asset_counts = get_md_asset_counts(self.md_path)
+
+        # Check each markdown asset exists in HTML with sufficient count
+        missing_assets = []
+        for asset, md_count in md_asset_counts.items():
+            html_count = self.html_asset_counts[asset]
+            if html_count < md_count:
+                missing_assets.append(
+                    f"Asset {asset} appears {md_count} times in markdown "
+                    f"but only {html_count} times in HTML"
+                )
+            elif html_count == 0:
+                missing_assets.append(
+                    f"Asset {asset} from markdown not found in HTML"
+                )
+
+        return missing_assets
+
+
 def check_markdown_assets_in_html(
     soup: BeautifulSoup, md_path: Path
 ) -> List[str]:
@@ -671,33 +1404,7 @@ def check_markdown_assets_in_html(
     Returns:
         List of asset references that have fewer instances in HTML
     """
-    if not md_path.exists():
-        raise ValueError(f"Markdown file {md_path} does not exist")
-
-    md_asset_counts = get_md_asset_counts(md_path)
-
-    # Count asset sources in HTML
-    html_asset_counts: Counter[str] = Counter()
-    for tag in tags_to_check_for_missing_assets:
-        for element in soup.find_all(tag):
-            if src := element.get("src"):
-                html_asset_counts[src.strip()] += 1
-
-    # Check each markdown asset exists in HTML with sufficient count
-    missing_assets = []
-    for asset, md_count in md_asset_counts.items():
-        html_count = html_asset_counts[asset]
-        if html_count < md_count:
-            missing_assets.append(
-                f"Asset {asset} appears {md_count} times in markdown "
-                f"but only {html_count} times in HTML"
-            )
-        elif html_count == 0:
-            missing_assets.append(
-                f"Asset {asset} from markdown not found in HTML"
-            )
-
-    return missing_assets
+    return run_page_check(soup, MarkdownAssetsCheck(md_path))
 
 
 # Characters that are acceptable before and after emphasis tags
@@ -705,55 +1412,66 @@ PREV_EMPHASIS_CHARS = "  [(-—~×“=+‘"
 NEXT_EMPHASIS_CHARS = "  ]).,;!?:-—~×”…=’"
 
 
-def check_emphasis_spacing(soup: BeautifulSoup) -> List[str]:
+# Properly escape characters for regex patterns
+_ok_prev_chars = "".join([re.escape(c) for c in PREV_EMPHASIS_CHARS])
+_OK_PREV_REGEX = re.compile(rf"^.*[{_ok_prev_chars}]$")
+
+_ok_next_chars = "".join([re.escape(c) for c in NEXT_EMPHASIS_CHARS])
+_OK_NEXT_REGEX = re.compile(rf"^[{_ok_next_chars}].*$")
+
+
+class EmphasisSpacingCheck(PageCheck[List[str]]):
     """
     Check for emphasis/strong elements that don't have proper spacing with
     surrounding text.
     """
-    problematic_emphasis: List[str] = []
 
-    # Properly escape characters for regex patterns
-    _ok_prev_chars = "".join([re.escape(c) for c in PREV_EMPHASIS_CHARS])
-    _ok_prev_regex = rf"^.*[{_ok_prev_chars}]$"
+    tags = frozenset({"em", "strong", "i", "b", "del"})
 
-    _ok_next_chars = "".join([re.escape(c) for c in NEXT_EMPHASIS_CHARS])
-    _ok_next_regex = rf"^[{_ok_next_chars}].*$"
+    def __init__(self) -> None:
+        self.problematic_emphasis: List[str] = []
 
-    # Find all emphasis elements
-    for element in soup.find_all(["em", "strong", "i", "b", "del"]):
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
         # Get the previous and next siblings that are text nodes
-        prev_sibling = element.previous_sibling
-        next_sibling = element.next_sibling
+        prev_sibling = tag.previous_sibling
+        next_sibling = tag.next_sibling
 
         # Check for missing space before the emphasis element
         if (
             isinstance(prev_sibling, NavigableString)
             and prev_sibling.strip()
-            and not re.search(_ok_prev_regex, prev_sibling)
+            and not _OK_PREV_REGEX.search(prev_sibling)
         ):
-            preview = (
-                f"{prev_sibling}<{element.name}>"
-                f"{element.get_text()}</{element.name}>"
-            )
+            preview = f"{prev_sibling}<{tag.name}>{tag.get_text()}</{tag.name}>"
             _add_to_list(
-                problematic_emphasis, preview, prefix="Missing space before: "
+                self.problematic_emphasis,
+                preview,
+                prefix="Missing space before: ",
             )
 
         # Check for missing space after the emphasis element
         if (
             isinstance(next_sibling, NavigableString)
             and next_sibling.strip()
-            and not re.search(_ok_next_regex, next_sibling)
+            and not _OK_NEXT_REGEX.search(next_sibling)
         ):
-            preview = (
-                f"<{element.name}>{element.get_text()}</{element.name}>"
-                f"{next_sibling}"
-            )
+            preview = f"<{tag.name}>{tag.get_text()}</{tag.name}>{next_sibling}"
             _add_to_list(
-                problematic_emphasis, preview, prefix="Missing space after: "
+                self.problematic_emphasis,
+                preview,
+                prefix="Missing space after: ",
             )
 
-    return problematic_emphasis
+    def result(self) -> List[str]:
+        return self.problematic_emphasis
+
+
+def check_emphasis_spacing(soup: BeautifulSoup) -> List[str]:
+    """
+    Check for emphasis/strong elements that don't have proper spacing with
+    surrounding text.
+    """
+    return run_page_check(soup, EmphasisSpacingCheck())
 
 
 # Facebook recommends descriptions under 155 characters
@@ -761,7 +1479,7 @@ MAX_DESCRIPTION_LENGTH = 155
 MIN_DESCRIPTION_LENGTH = 10
 
 
-def check_description_length(soup: BeautifulSoup) -> List[str]:
+class DescriptionLengthCheck(PageCheck[List[str]]):
     """
     Check if the page description is within the recommended length for social
     media previews.
@@ -769,26 +1487,49 @@ def check_description_length(soup: BeautifulSoup) -> List[str]:
     Returns a list with a single string if the description is too long, or an
     empty list otherwise.
     """
-    description_element = soup.find("meta", attrs={"name": "description"})
-    description = (
-        description_element.get("content")
-        if description_element and isinstance(description_element, Tag)
-        else None
-    )
 
-    if description:
-        if len(description) > MAX_DESCRIPTION_LENGTH:
-            return [
-                f"Description too long: {len(description)} characters "
-                f"(recommended <= {MAX_DESCRIPTION_LENGTH})"
-            ]
-        if len(description) < MIN_DESCRIPTION_LENGTH:
-            return [
-                f"Description too short: {len(description)} characters "
-                f"(recommended >= {MIN_DESCRIPTION_LENGTH})"
-            ]
-        return []
-    return ["Description not found"]
+    tags = frozenset({"meta"})
+
+    def __init__(self) -> None:
+        self.description_element: Tag | None = None
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        if self.description_element is None and (
+            tag.get("name") == "description"
+        ):
+            self.description_element = tag
+
+    def result(self) -> List[str]:
+        description = (
+            self.description_element.get("content")
+            if self.description_element
+            else None
+        )
+
+        if description:
+            if len(description) > MAX_DESCRIPTION_LENGTH:
+                return [
+                    f"Description too long: {len(description)} characters "
+                    f"(recommended <= {MAX_DESCRIPTION_LENGTH})"
+                ]
+            if len(description) < MIN_DESCRIPTION_LENGTH:
+                return [
+                    f"Description too short: {len(description)} characters "
+                    f"(recommended >= {MIN_DESCRIPTION_LENGTH})"
+                ]
+            return []
+        return ["Description not found"]
+
+
+def check_description_length(soup: BeautifulSoup) -> List[str]:
+    """
+    Check if the page description is within the recommended length for social
+    media previews.
+
+    Returns a list with a single string if the description is too long, or an
+    empty list otherwise.
+    """
+    return run_page_check(soup, DescriptionLengthCheck())
 
 
 def check_css_issues(file_path: Path) -> List[str]:
@@ -807,27 +1548,26 @@ def check_css_issues(file_path: Path) -> List[str]:
     return []
 
 
-def main() -> None:
+def pages_to_check(
+    public_dir: Path,
+    permalink_to_md_path_map: Dict[str, Path],
+    files_to_skip: Set[str],
+) -> Tuple[List[Tuple[Path, Path | None]], Set[Path]]:
     """
-    Check all HTML files in the public directory for issues.
-    """
-    public_dir: Path = git_root / "public"
-    issues_found: bool = False
-
-    check_rss_file_for_issues(git_root)
-    css_issues = check_css_issues(public_dir / "index.css")
-    if css_issues:
-        print_issues(public_dir / "index.css", {"CSS_issues": css_issues})
-        issues_found = True
-
-    md_dir: Path = git_root / "content"
-    permalink_to_md_path_map = script_utils.build_html_to_md_map(md_dir)
-    files_to_skip: Set[str] = script_utils.collect_aliases(md_dir)
+    List the HTML pages to check, along with the markdown files they were
+    generated from, in a deterministic order.
 
+    Returns:
+        The pages, and the pages in `public_dir` for which no markdown file
+        was found. Whether those pages should have one is decided when they
+        are checked, so that they are only parsed once.
+    """
+    pages: List[Tuple[Path, Path | None]] = []
+    pages_without_md: Set[Path] = set()
     for root, _, files in os.walk(public_dir):
         if "drafts" in root:
             continue
-        for file in tqdm.tqdm(files, desc="Webpages checked"):
+        for file in sorted(files):
             if file.endswith(".html") and Path(file).stem not in files_to_skip:
                 file_path = Path(root) / file
 
@@ -837,16 +1577,173 @@ def main() -> None:
                     md_path = permalink_to_md_path_map.get(
                         file_path.stem
                     ) or permalink_to_md_path_map.get(file_path.stem.lower())
-                    if not md_path and script_utils.should_have_md(file_path):
-                        raise ValueError(
-                            f"Markdown file for {file_path.stem} not found"
-                        )
+                    if not md_path:
+                        pages_without_md.add(file_path)
+
+                pages.append((file_path, md_path))
+    return pages, pages_without_md
+
+
+# Pages sent to each worker process at a time
+_PAGES_PER_CHUNK = 8
+
+
+def _check_pages_with_dependencies(
+    pages: Sequence[Tuple[Path, Path | None]],
+    base_dir: Path,
+    jobs: int,
+    parser: Optional[script_utils.HtmlParser],
+    pages_without_md: Collection[Path],
+) -> Iterator[Tuple[IssuesDict, PageDependencies]]:
+    file_paths = [file_path for file_path, _ in pages]
+    md_paths = [md_path for _, md_path in pages]
+    require_md = [file_path in pages_without_md for file_path in file_paths]
+    if jobs <= 1:
+        yield from map(
+            check_file_with_dependencies,
+            file_paths,
+            repeat(base_dir),
+            md_paths,
+            repeat(parser),
+            require_md,
+        )
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # executor.map returns results in submission order
+        yield from executor.map(
+            check_file_with_dependencies,
+            file_paths,
+            repeat(base_dir),
+            md_paths,
+            repeat(parser),
+            require_md,
+            chunksize=_PAGES_PER_CHUNK,
+        )
+
 
-                issues = check_file_for_issues(file_path, public_dir, md_path)
+def check_pages(
+    pages: Sequence[Tuple[Path, Path | None]],
+    base_dir: Path,
+    jobs: int = 1,
+    parser: Optional[script_utils.HtmlParser] = None,
+    manifest: Optional[CheckManifest] = None,
+    full: bool = False,
+    pages_without_md: Collection[Path] = (),
+) -> Iterator[Tuple[Path, IssuesDict]]:
+    """
+    Check each page for issues, using `jobs` worker processes.
+
+    Args:
+        pages: Pairs of (HTML file, markdown file it was generated from)
+        base_dir: Path to the base directory of the site
+        jobs: Number of processes to use. 1 checks pages in this process.
+        parser: HTML parser backend to use
+        manifest: If given, pages which are fresh in the manifest replay their
+            recorded issues, and the issues of checked pages are recorded
+        full: Whether to check every page, even if it is fresh
+        pages_without_md: Pages which have no markdown file. Raises
+            ValueError when checking one which should have one.
+
+    Yields:
+        (HTML file, issues) pairs, in the same order as `pages`
+    """
+    cached_issues: Dict[Path, IssuesDict] = {}
+    if manifest is not None and not full:
+        for file_path, md_path in pages:
+            issues = manifest.cached_issues(file_path, md_path)
+            if issues is not None:
+                cached_issues[file_path] = issues
+
+    checked = _check_pages_with_dependencies(
+        [page for page in pages if page[0] not in cached_issues],
+        base_dir,
+        jobs,
+        parser,
+        pages_without_md,
+    )
+    for file_path, md_path in pages:
+        if file_path in cached_issues:
+            yield file_path, cached_issues[file_path]
+            continue
 
-                if any(lst for lst in issues.values()):
-                    print_issues(file_path, issues)
-                    issues_found = True
+        issues, dependencies = next(checked)
+        if manifest is not None:
+            manifest.record(file_path, md_path, issues, dependencies)
+        yield file_path, issues
+
+
+def main() -> None:
+    """
+    Check all HTML files in the public directory for issues.
+    """
+    parser = argparse.ArgumentParser(
+        description="Check the built site for issues."
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes to check pages with (0 uses all CPUs)",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=script_utils.HTML_PARSERS,
+        default=script_utils.DEFAULT_HTML_PARSER,
+        help="HTML parser backend (falls back to html.parser if missing)",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Check every page, instead of only pages changed since last run",
+    )
+    args = parser.parse_args()
+    jobs: int = args.jobs or os.cpu_count() or 1
+    html_parser = script_utils.resolve_html_parser(args.parser)
+
+    public_dir: Path = git_root / "public"
+    issues_found: bool = False
+
+    check_rss_file_for_issues(git_root)
+    css_issues = check_css_issues(public_dir / "index.css")
+    if css_issues:
+        print_issues(public_dir / "index.css", {"CSS_issues": css_issues})
+        issues_found = True
+
+    md_dir: Path = git_root / "content"
+    with script_utils.FrontmatterIndex(
+        git_root / script_utils.FRONTMATTER_INDEX_PATH
+    ) as frontmatter_index:
+        permalink_to_md_path_map = script_utils.build_html_to_md_map(
+            md_dir, frontmatter_index
+        )
+        files_to_skip: Set[str] = script_utils.collect_aliases(
+            md_dir, frontmatter_index
+        )
+
+    pages, pages_without_md = pages_to_check(
+        public_dir, permalink_to_md_path_map, files_to_skip
+    )
+    with CheckManifest(
+        git_root / CHECK_MANIFEST_PATH, checker_version(html_parser)
+    ) as manifest:
+        for file_path, issues in tqdm.tqdm(
+            check_pages(
+                pages,
+                public_dir,
+                jobs=jobs,
+                parser=html_parser,
+                manifest=manifest,
+                full=args.full,
+                pages_without_md=pages_without_md,
+            ),
+            total=len(pages),
+            desc="Webpages checked",
+        ):
+            if any(lst for lst in issues.values()):
+                print_issues(file_path, issues)
+                issues_found = True
 
     if issues_found:
         sys.exit(1)
@@ -3,24 +3,95 @@ Script to compress images and videos.
 """
 
 import argparse
+import hashlib
 import json
+import os
+import shutil
 import subprocess
 import sys
 import tempfile
 from pathlib import Path
+from typing import Optional, Sequence
+
+# Finished conversions, keyed by the hash of their source and the settings
+# used. Shared between clones and branches, so identical sources are never
+# converted twice.
+TRANSCODE_CACHE_DIR: Path = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "turntrout"
+    / "transcodes"
+)
+# Bump to invalidate the cache, e.g. when upgrading encoders
+_TRANSCODE_CACHE_VERSION: int = 1
+
+
+def _transcode_cache_key(source_path: Path, settings: Sequence[str]) -> str:
+    """
+    Returns a key identifying a conversion of the source file's content with
+    the given settings.
+    """
+    digest = hashlib.sha256()
+    with open(source_path, "rb") as source:
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            digest.update(chunk)
+    for setting in (str(_TRANSCODE_CACHE_VERSION), *settings):
+        digest.update(b"\0" + setting.encode())
+    return digest.hexdigest()
+
+
+def _transcode_cache_path(key: str, suffix: str) -> Path:
+    return TRANSCODE_CACHE_DIR / key[:2] / f"{key}{suffix}"
+
+
+def _restore_from_cache(key: str, output_path: Path) -> bool:
+    """
+    Copies a cached conversion to `output_path`, if there is one.
+
+    Returns:
+        Whether the conversion was cached.
+    """
+    cached_path = _transcode_cache_path(key, output_path.suffix)
+    if not cached_path.is_file():
+        return False
+
+    # Copy then rename, so that an interrupted copy never leaves a partial
+    # output (which may replace the source)
+    temp_path = output_path.with_name(f".{output_path.name}.cached")
+    shutil.copyfile(cached_path, temp_path)
+    os.replace(temp_path, output_path)
+    print(f"Using cached conversion for {output_path}")
+    return True
+
+
+def _store_in_cache(key: str, output_path: Path) -> None:
+    cached_path = _transcode_cache_path(key, output_path.suffix)
+    cached_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=cached_path.parent, delete=False
+    ) as temp_file:
+        temp_path = Path(temp_file.name)
+    shutil.copyfile(output_path, temp_path)
+    os.replace(temp_path, cached_path)
+
 
 # Default quality (higher is larger file size but better quality)
 IMAGE_QUALITY: int = 56
 ALLOWED_IMAGE_EXTENSIONS: set[str] = {".jpg", ".jpeg", ".png"}
 
 
-def image(image_path: Path, quality: int = IMAGE_QUALITY) -> None:
+def image(
+    image_path: Path,
+    quality: int = IMAGE_QUALITY,
+    threads: Optional[int] = None,
+) -> None:
     """
     Converts an image to AVIF format using ImageMagick.
 
     Args:
         image_path: The path to the image file.
         quality: The AVIF quality (0-100). Lower is better but slower.
+        threads: The most threads ImageMagick may use. Defaults to its own
+            limit.
     """
     if not image_path.is_file():
         raise FileNotFoundError(f"Error: File '{image_path}' not found.")
@@ -35,15 +106,21 @@ def image(image_path: Path, quality: int = IMAGE_QUALITY) -> None:
         )
         return
 
+    settings = ["-quality", str(quality)]
+    cache_key = _transcode_cache_key(image_path, ["magick", *settings])
+    if _restore_from_cache(cache_key, avif_path):
+        return
+
     try:
         command: list[str | Path] = [
             "magick",
+            *(["-limit", "thread", str(threads)] if threads else []),
             image_path,
-            "-quality",
-            str(quality),
+            *settings,
             avif_path,
         ]
         subprocess.run(command, check=True)
+        _store_in_cache(cache_key, avif_path)
     except subprocess.CalledProcessError as e:
         raise RuntimeError(f"Error during conversion: {e}") from e
     finally:
@@ -69,10 +146,29 @@ ALLOWED_EXTENSIONS: set[str] = (
 VIDEO_QUALITY: int = 28  # Default quality (0-51). Lower is better but slower.
 
 
-def to_hevc_video(video_path: Path, quality: int = VIDEO_QUALITY) -> None:
+def _x265_thread_args(threads: Optional[int]) -> list[str]:
+    """
+    Returns ffmpeg arguments limiting libx265 (and ffmpeg's own filtering and
+    decoding) to `threads` threads, or none to use all cores.
+    """
+    if not threads:
+        return []
+    return ["-threads", str(threads), "-x265-params", f"pools={threads}"]
+
+
+def to_hevc_video(
+    video_path: Path,
+    quality: int = VIDEO_QUALITY,
+    threads: Optional[int] = None,
+) -> None:
     """
     Converts a video to mp4 format using ffmpeg with HEVC encoding, if not
     already HEVC.
+
+    Args:
+        video_path: The path to the video file.
+        quality: The CRF (0-51). Lower is better but slower.
+        threads: The most threads the encoder may use. Defaults to all cores.
     """
     if not video_path.is_file():
         raise FileNotFoundError(f"Error: Input file '{video_path}' not found.")
@@ -83,6 +179,16 @@ def to_hevc_video(video_path: Path, quality: int = VIDEO_QUALITY) -> None:
             f"Supported types are: {', '.join(ALLOWED_VIDEO_EXTENSIONS)}."
         )
 
+    output_path = video_path.with_suffix(".mp4")
+    encoder_args = (
+        ["-vf", _GIF_VIDEO_FILTER, *_gif_encoder_args(quality)]
+        if video_path.suffix == ".gif"
+        else _video_encoder_args(quality)
+    )
+    cache_key = _transcode_cache_key(video_path, ["ffmpeg", *encoder_args])
+    if _restore_from_cache(cache_key, output_path):
+        return
+
     # Check if the input is already HEVC encoded
     probe_cmd = [
         "ffprobe",
@@ -111,7 +217,6 @@ def to_hevc_video(video_path: Path, quality: int = VIDEO_QUALITY) -> None:
         return
 
     # Determine output path
-    output_path = video_path.with_suffix(".mp4")
     if video_path.suffix.lower() == ".mp4":
         temp_output_path = video_path.with_stem(video_path.stem + "_temp")
     else:
@@ -119,7 +224,7 @@ def to_hevc_video(video_path: Path, quality: int = VIDEO_QUALITY) -> None:
 
     try:
         if video_path.suffix == ".gif":
-            _compress_gif(video_path, quality)
+            _compress_gif(video_path, quality, threads)
         else:
             # Single pass encoding
             subprocess.run(
@@ -127,20 +232,8 @@ def to_hevc_video(video_path: Path, quality: int = VIDEO_QUALITY) -> None:
                     "ffmpeg",
                     "-i",
                     str(video_path),
-                    "-c:v",
-                    "libx265",
-                    "-preset",
-                    "slower",
-                    "-crf",
-                    str(quality),
-                    "-c:a",
-                    "copy",  # Copy audio without re-encoding
-                    "-tag:v",
-                    "hvc1",  # For better compatibility with Apple devices
-                    "-movflags",
-                    "+faststart",
-                    "-colorspace",
-                    "bt709",
+                    *encoder_args,
+                    *_x265_thread_args(threads),
                     "-v",
                     "error",
                     str(temp_output_path),
@@ -153,6 +246,8 @@ def to_hevc_video(video_path: Path, quality: int = VIDEO_QUALITY) -> None:
             video_path.unlink()
             temp_output_path.rename(output_path)
 
+        _store_in_cache(cache_key, output_path)
+
     except subprocess.CalledProcessError as e:
         raise RuntimeError(f"Error during conversion: {e}") from e
     finally:
@@ -166,80 +261,112 @@ def to_hevc_video(video_path: Path, quality: int = VIDEO_QUALITY) -> None:
     print(f"Successfully converted {video_path} to HEVC: {output_path}")
 
 
-def _compress_gif(gif_path: Path, quality: int = VIDEO_QUALITY) -> None:
+def _video_encoder_args(quality: int) -> list[str]:
+    """
+    Returns the ffmpeg output arguments for single pass HEVC encoding.
+    """
+    return [
+        "-c:v",
+        "libx265",
+        "-preset",
+        "slower",
+        "-crf",
+        str(quality),
+        "-c:a",
+        "copy",  # Copy audio without re-encoding
+        "-tag:v",
+        "hvc1",  # For better compatibility with Apple devices
+        "-movflags",
+        "+faststart",
+        "-colorspace",
+        "bt709",
+    ]
+
+
+# Gives every decoded frame the next timestamp at a constant frame rate, as
+# extracting each frame with `-vsync 0` and re-reading them at that rate
+# would. Then rounds the dimensions down to even numbers, which yuv420p needs.
+_GIF_VIDEO_FILTER = (
+    "setpts=N/({frame_rate}*TB),scale=trunc(iw/2)*2:trunc(ih/2)*2"
+)
+
+
+def _gif_encoder_args(quality: int) -> list[str]:
+    """
+    Returns the ffmpeg output arguments for encoding GIF frames as HEVC,
+    besides the `_GIF_VIDEO_FILTER` filter.
+    """
+    return [
+        "-c:v",
+        "libx265",
+        "-crf",
+        str(quality),
+        "-pix_fmt",
+        "yuv420p",
+        "-loop",
+        "0",  # Loop the video indefinitely
+    ]
+
+
+def _gif_frame_rate(gif_path: Path) -> int:
+    """
+    Returns the GIF's average frame rate, defaulting to 10 if not found.
+    """
+    probe_cmd = [
+        "ffprobe",
+        "-v",
+        "quiet",
+        "-print_format",
+        "json",
+        "-show_streams",
+        str(gif_path),
+    ]
+    probe_output = subprocess.check_output(probe_cmd, universal_newlines=True)
+    probe_data = json.loads(probe_output)
+
+    for stream in probe_data.get("streams", []):
+        if stream.get("codec_type") == "video":
+            avg_frame_rate = stream.get("avg_frame_rate", "10/1")
+            num, den = map(int, avg_frame_rate.split("/"))
+            return int(num / den) if den != 0 else 10
+    return 10
+
+
+def _compress_gif(
+    gif_path: Path,
+    quality: int = VIDEO_QUALITY,
+    threads: Optional[int] = None,
+) -> None:
     """
     Compress a GIF file to an MP4 video, preserving the original frame rate.
+
+    Frames are streamed from the GIF decoder to the encoder in a single
+    ffmpeg process, without being written to disk.
     """
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
-
-        # Get the frame rate of the original GIF
-        probe_cmd = [
-            "ffprobe",
-            "-v",
-            "quiet",
-            "-print_format",
-            "json",
-            "-show_streams",
-            str(gif_path),
-        ]
-        probe_output = subprocess.check_output(
-            probe_cmd, universal_newlines=True
-        )
-        probe_data = json.loads(probe_output)
-
-        # Extract the frame rate, defaulting to 10 if not found
-        frame_rate = 10
-        for stream in probe_data.get("streams", []):
-            if stream.get("codec_type") == "video":
-                avg_frame_rate = stream.get("avg_frame_rate", "10/1")
-                num, den = map(int, avg_frame_rate.split("/"))
-                frame_rate = int(num / den) if den != 0 else 10
-                break
-
-        # Extract frames from GIF
+    frame_rate = _gif_frame_rate(gif_path)
+    output_path = gif_path.with_suffix(".mp4")
+    try:
         subprocess.run(
             [
                 "ffmpeg",
                 "-i",
                 str(gif_path),
-                "-vsync",
-                "0",
-                f"{temp_path / 'frame_%04d.png'}",
+                "-vf",
+                _GIF_VIDEO_FILTER.format(frame_rate=frame_rate),
+                "-r",
+                str(frame_rate),
+                *_gif_encoder_args(quality),
+                *_x265_thread_args(threads),
+                "-v",
+                "error",
+                str(output_path),
             ],
             check=True,
         )
 
-        try:
-            # Convert frames to MP4
-            output_path = gif_path.with_suffix(".mp4")
-            subprocess.run(
-                [
-                    "ffmpeg",
-                    "-framerate",
-                    str(frame_rate),
-                    "-i",
-                    f"{temp_path / 'frame_%04d.png'}",
-                    "-c:v",
-                    "libx265",
-                    "-crf",
-                    str(quality),
-                    "-vf",
-                    "scale=trunc(iw/2)*2:trunc(ih/2)*2",
-                    "-pix_fmt",
-                    "yuv420p",
-                    "-loop",
-                    "0",  # Loop the video indefinitely
-                    "-v",
-                    "error",
-                    str(output_path),
-                ],
-                check=True,
-            )
-
-            print(f"Successfully converted {gif_path} to MP4: {output_path}")
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Error during conversion: {e}") from e
+        print(f"Successfully converted {gif_path} to MP4: {output_path}")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Error during conversion: {e}") from e
 
 
 if __name__ == "__main__":
@@ -3,10 +3,13 @@ Convert assets to optimized formats.
 """
 
 import argparse
+import os
 import re
 import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
 
 try:
     from . import compress
@@ -93,6 +96,154 @@ def _image_patterns(input_file: Path) -> tuple[str, str]:
     )
 
 
+class ReferenceReplacement(NamedTuple):
+    """
+    A rewrite of the references to a converted asset in markdown files.
+    """
+
+    pattern: str
+    replacement: str
+    # A substring of every match of `pattern`, for cheaply skipping files
+    literal: str
+
+
+def _reference_replacement(input_file: Path) -> ReferenceReplacement:
+    """
+    Returns the replacement for references to the given asset.
+
+    Raises:
+        ValueError: If the input file is not an image or video, or an image is
+            not within quartz/static.
+    """
+    if input_file.suffix in compress.ALLOWED_IMAGE_EXTENSIONS:
+        pattern, replacement = _image_patterns(input_file)
+        literal = str(
+            script_utils.path_relative_to_quartz_parent(input_file).relative_to(
+                "quartz"
+            )
+        )
+    elif input_file.suffix in compress.ALLOWED_VIDEO_EXTENSIONS:
+        pattern, replacement = _video_patterns(input_file)
+        literal = f"{input_file.stem}{input_file.suffix}"
+    else:
+        raise ValueError(f"Error: Unsupported file type '{input_file.suffix}'.")
+    return ReferenceReplacement(pattern, replacement, literal)
+
+
+def replace_references(
+    replacements: Sequence[ReferenceReplacement],
+    md_references_dir: Optional[Path] = Path("content/"),
+) -> List[Path]:
+    """
+    Rewrites references to converted assets, reading each markdown file once
+    and applying all the replacements whose literal appears in it, in order.
+    A reference created by one replacement is seen by the later ones, as if
+    they were applied to the file one after another.
+
+    Args:
+        replacements: The replacements for each converted asset.
+        md_references_dir: The directory to search for markdown files.
+
+    Returns:
+        The markdown files which were changed.
+    """
+    if not replacements:
+        return []
+
+    # Finds every position where some literal starts. At each position the
+    # longest literal matches, so also try the literals which prefix it.
+    literals = sorted(
+        {replacement.literal for replacement in replacements},
+        key=len,
+        reverse=True,
+    )
+    literal_regex = re.compile(
+        "(?=(" + "|".join(re.escape(literal) for literal in literals) + "))"
+    )
+    prefixes_of: Dict[str, Set[str]] = {
+        literal: {other for other in literals if literal.startswith(other)}
+        for literal in literals
+    }
+    compiled = [
+        (re.compile(replacement.pattern), replacement)
+        for replacement in replacements
+    ]
+
+    def present_literals(content: str) -> Set[str]:
+        present: Set[str] = set()
+        for literal in set(literal_regex.findall(content)):
+            present.update(prefixes_of[literal])
+        return present
+
+    changed_files: List[Path] = []
+    for md_file in script_utils.get_files(
+        dir_to_search=md_references_dir, filetypes_to_match=(".md",)
+    ):
+        with open(md_file, "r", encoding="utf-8") as file:
+            original_content = file.read()
+
+        content = original_content
+        present = present_literals(content)
+        for regex, replacement in compiled:
+            if replacement.literal in present:
+                content, count = regex.subn(replacement.replacement, content)
+                if count:
+                    # The replacement may have created other literals
+                    present = present_literals(content)
+
+        # Add a second pass to handle the </video><br/>Figure: pattern
+        content = re.sub(
+            r"</video>\s*(<br/?>)?\s*Figure:", "</video>\n\nFigure:", content
+        )
+
+        if content != original_content:
+            with open(md_file, "w", encoding="utf-8") as file:
+                file.write(content)
+            changed_files.append(md_file)
+    return changed_files
+
+
+def _convert_file(input_file: Path, threads: Optional[int] = None) -> Path:
+    """
+    Converts an image or video to a more efficient format, without touching
+    any references to it. Returns the converted file.
+    """
+    if input_file.suffix in compress.ALLOWED_IMAGE_EXTENSIONS:
+        compress.image(input_file, threads=threads)
+        return input_file.with_suffix(".avif")
+    compress.to_hevc_video(input_file, threads=threads)
+    return input_file.with_suffix(".mp4")
+
+
+def threads_per_job(jobs: int) -> Optional[int]:
+    """
+    Split the CPUs between `jobs` concurrent conversions, so that the
+    encoders' own thread pools don't oversubscribe them. A single job may use
+    every CPU.
+    """
+    if jobs <= 1:
+        return None
+    return max(1, (os.cpu_count() or 1) // jobs)
+
+
+def _finish_conversion(
+    input_file: Path,
+    output_file: Path,
+    remove_originals: bool,
+    strip_metadata: bool,
+) -> None:
+    if strip_metadata:
+        subprocess.run(
+            ["exiftool", "-all=", str(output_file), "--verbose"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+
+    if remove_originals and input_file.suffix not in (".mp4", ".avif"):
+        input_file.unlink()
+
+
 def convert_asset(
     input_file: Path,
     remove_originals: bool = False,
@@ -120,54 +271,76 @@ def convert_asset(
         - NotADirectoryError: If the replacement directory does not exist.
         - ValueError: If the input file is not an image or video.
     """
+    convert_asset_batch(
+        [input_file],
+        remove_originals=remove_originals,
+        strip_metadata=strip_metadata,
+        md_references_dir=md_references_dir,
+    )
 
-    if not input_file.is_file():
-        raise FileNotFoundError(f"Error: File '{input_file}' not found.")
+
+def convert_asset_batch(
+    input_files: Sequence[Path],
+    remove_originals: bool = False,
+    strip_metadata: bool = False,
+    md_references_dir: Optional[Path] = Path("content/"),
+    jobs: int = 1,
+) -> None:
+    """
+    Converts each image or video like `convert_asset`, but rewrites the
+    references to all of them in a single pass over the markdown files.
+
+    Up to `jobs` files are converted at once. References are only rewritten,
+    and originals only removed, for files which were converted successfully.
+
+    Errors:
+        - FileNotFoundError: If an input file does not exist.
+        - NotADirectoryError: If the replacement directory does not exist.
+        - ValueError: If an input file is not an image or video.
+        - The first error raised while converting a file, once the
+          successfully converted files have been handled.
+    """
+    for input_file in input_files:
+        if not input_file.is_file():
+            raise FileNotFoundError(f"Error: File '{input_file}' not found.")
 
     if md_references_dir and not md_references_dir.is_dir():
         raise NotADirectoryError(
             f"Error: Directory '{md_references_dir}' not found."
         )
 
-    if input_file.suffix in compress.ALLOWED_IMAGE_EXTENSIONS:
-        # Get patterns first so that we trigger relative path errors if needed
-        original_pattern, replacement_pattern = _image_patterns(input_file)
-        compress.image(input_file)
-        output_file = input_file.with_suffix(".avif")
-
-    elif input_file.suffix in compress.ALLOWED_VIDEO_EXTENSIONS:
-        original_pattern, replacement_pattern = _video_patterns(input_file)
-        compress.to_hevc_video(input_file)
-        output_file = input_file.with_suffix(".mp4")
-
-    else:
-        raise ValueError(f"Error: Unsupported file type '{input_file.suffix}'.")
-
-    for md_file in script_utils.get_files(
-        dir_to_search=md_references_dir, filetypes_to_match=(".md",)
+    # Get patterns first so that we trigger relative path errors if needed
+    replacements = [
+        _reference_replacement(input_file) for input_file in input_files
+    ]
+    threads = threads_per_job(jobs)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = [
+            executor.submit(_convert_file, input_file, threads)
+            for input_file in input_files
+        ]
+
+    converted: List[Tuple[Path, ReferenceReplacement, Path]] = []
+    errors: List[BaseException] = []
+    for input_file, replacement, future in zip(
+        input_files, replacements, futures
     ):
-        with open(md_file, "r", encoding="utf-8") as file:
-            content = file.read()
-        content = re.sub(original_pattern, replacement_pattern, content)
-
-        # Add a second pass to handle the </video><br/>Figure: pattern
-        content = re.sub(
-            r"</video>\s*(<br/?>)?\s*Figure:", "</video>\n\nFigure:", content
-        )
-
-        with open(md_file, "w", encoding="utf-8") as file:
-            file.write(content)
-
-    if strip_metadata:
-        subprocess.run(
-            ["exiftool", "-all=", str(output_file), "--verbose"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=False,
+        if (error := future.exception()) is not None:
+            print(f"Failed to convert {input_file}: {error}", file=sys.stderr)
+            errors.append(error)
+        else:
+            converted.append((input_file, replacement, future.result()))
+
+    replace_references(
+        [replacement for _, replacement, _ in converted], md_references_dir
+    )
+    for input_file, _, output_file in converted:
+        _finish_conversion(
+            input_file, output_file, remove_originals, strip_metadata
         )
 
-    if remove_originals and input_file.suffix not in (".mp4", ".avif"):
-        input_file.unlink()
+    if errors:
+        raise errors[0]
 
 
 def main():
@@ -194,6 +367,13 @@ def main():
         "--asset-directory",
         help="Directory containing assets to convert",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of files to convert at once (0 uses all CPUs)",
+    )
     parser.add_argument(
         "--ignore-files",
         nargs="+",
@@ -210,16 +390,20 @@ def main():
         use_git_ignore=False,  # Git ignores eg favicons but we don't
     )
 
+    assets_to_convert: List[Path] = []
     for asset in assets:
         if args.ignore_files and asset.name in args.ignore_files:
             print(f"Ignoring file: {asset}")
             continue
-        convert_asset(
-            asset,
-            remove_originals=args.remove_originals,
-            strip_metadata=args.strip_metadata,
-            md_references_dir=Path("content/"),
-        )
+        assets_to_convert.append(asset)
+
+    convert_asset_batch(
+        assets_to_convert,
+        remove_originals=args.remove_originals,
+        strip_metadata=args.strip_metadata,
+        md_references_dir=Path("content/"),
+        jobs=args.jobs or os.cpu_count() or 1,
+    )
 
 
 if __name__ == "__main__":
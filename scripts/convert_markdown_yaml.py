@@ -13,8 +13,11 @@ import os
 import re
 import shutil
 import subprocess
+import sys
 import tempfile
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import Any, Callable, Sequence
 from urllib import parse
 
 import requests
@@ -138,28 +141,47 @@ def _get_r2_image_url(local_png_path: Path) -> str:
     return f"{r2_base_url}/{r2_key}"
 
 
-def _process_image(card_image_url: str, temp_dir: Path) -> tuple[Path, str]:
+def _download_card_image(card_image_url: str, temp_dir: Path) -> Path:
     """
-    Download and convert image to PNG.
+    Download a card image into `temp_dir`, keeping its filename.
 
     Returns:
-        Tuple of (converted PNG path, PNG filename)
+        Path to the downloaded image
     """
     parsed_url = parse.urlparse(card_image_url)
     card_image_filename = os.path.basename(parsed_url.path)
     downloaded_path = temp_dir / card_image_filename
-    png_filename = downloaded_path.with_suffix(".png").name
-    png_path = downloaded_path.with_suffix(".png")
-
     _download_image(card_image_url, downloaded_path)
+    return downloaded_path
+
+
+def _convert_card_image(downloaded_path: Path) -> Path:
+    """
+    Convert a downloaded card image to a PNG beside it.
+
+    Returns:
+        Path to the converted PNG
+    """
+    png_path = downloaded_path.with_suffix(".png")
     _convert_to_png(downloaded_path, png_path)
+    return png_path
 
-    return png_path, png_filename
 
+def _process_image(card_image_url: str, temp_dir: Path) -> tuple[Path, str]:
+    """
+    Download and convert image to PNG.
 
-def _setup_and_store_image(png_path: Path, png_filename: str) -> Path:
+    Returns:
+        Tuple of (converted PNG path, PNG filename)
     """
-    Move PNG to static directory and upload to R2.
+    downloaded_path = _download_card_image(card_image_url, temp_dir)
+    png_path = _convert_card_image(downloaded_path)
+    return png_path, png_path.name
+
+
+def _move_to_static_dir(png_path: Path, png_filename: str) -> Path:
+    """
+    Move PNG to the static card images directory.
 
     Returns:
         Path to the local PNG file
@@ -170,9 +192,18 @@ def _setup_and_store_image(png_path: Path, png_filename: str) -> Path:
     )
     static_images_dir.mkdir(parents=True, exist_ok=True)
     local_png_path = static_images_dir / png_filename
-
-    # Move and upload
     shutil.move(str(png_path), str(local_png_path))
+    return local_png_path
+
+
+def _setup_and_store_image(png_path: Path, png_filename: str) -> Path:
+    """
+    Move PNG to static directory and upload to R2.
+
+    Returns:
+        Path to the local PNG file
+    """
+    local_png_path = _move_to_static_dir(png_path, png_filename)
     r2_upload.upload_and_move(
         local_png_path,
         verbose=True,
@@ -183,21 +214,19 @@ def _setup_and_store_image(png_path: Path, png_filename: str) -> Path:
     return local_png_path
 
 
-def process_card_image_in_markdown(md_file: Path) -> None:
+def _card_image_to_convert(md_file: Path) -> str | None:
     """
-    Process the 'card_image' in the YAML frontmatter of the given md file.
+    Get the URL of the 'card_image' in the YAML frontmatter of the given md
+    file, if it should be converted to PNG and uploaded.
     """
-    # Read and parse the markdown file
     with open(md_file, "r", encoding="utf-8") as file:
         content = file.read()
 
     parsed = _parse_markdown_frontmatter(content)
     if not parsed:
-        return
-
-    data, md_body = parsed
+        return None
 
-    # Check if we need to process this file
+    data, _ = parsed
     card_image_url = data.get("card_image")
     if (
         not card_image_url
@@ -206,6 +235,24 @@ def process_card_image_in_markdown(md_file: Path) -> None:
         )
         or card_image_url.startswith("https://assets.turntrout.com/")
     ):
+        return None
+    return card_image_url
+
+
+def _write_card_image(md_file: Path, card_image_url: str) -> None:
+    """
+    Set the 'card_image' in the YAML frontmatter of the given md file.
+    """
+    if script_utils.patch_frontmatter(md_file, {"card_image": card_image_url}):
+        print(f"Updated 'card_image' in {md_file}")
+
+
+def process_card_image_in_markdown(md_file: Path) -> None:
+    """
+    Process the 'card_image' in the YAML frontmatter of the given md file.
+    """
+    card_image_url = _card_image_to_convert(md_file)
+    if not card_image_url:
         return
 
     # Process and store the image
@@ -214,19 +261,135 @@ def process_card_image_in_markdown(md_file: Path) -> None:
     )
     local_png_path = _setup_and_store_image(png_path, png_filename)
 
-    # Update the YAML frontmatter
-    data["card_image"] = _get_r2_image_url(local_png_path)
+    _write_card_image(md_file, _get_r2_image_url(local_png_path))
 
-    # Write back to file
-    stream = io.StringIO()
-    yaml_parser.dump(data, stream)
-    updated_yaml = stream.getvalue()
-    updated_content = f"---\n{updated_yaml}---\n{md_body}"
 
-    with open(md_file, "w", encoding="utf-8") as file:
-        file.write(updated_content)
+def _upload_card_image(png_path: Path) -> tuple[Path, str]:
+    """
+    Move PNG to static directory and upload it to R2, without updating
+    references or moving it out of the static directory.
 
-    print(f"Updated 'card_image' in {md_file}")
+    Returns:
+        Tuple of (local PNG path, R2 URL)
+    """
+    local_png_path = _move_to_static_dir(png_path, png_path.name)
+    r2_address = r2_upload.upload_to_r2(local_png_path, verbose=True)
+    return local_png_path, r2_address
+
+
+def _card_image_png_name(card_image_url: str) -> str:
+    """
+    Get the filename the card image at a URL is stored under once converted.
+    """
+    card_image_filename = os.path.basename(parse.urlparse(card_image_url).path)
+    return Path(card_image_filename).with_suffix(".png").name
+
+
+def _report_failure(item: object, error: Exception) -> None:
+    print(f"Failed to process {item}: {error}", file=sys.stderr)
+
+
+_PIPELINE_ERRORS = (
+    OSError,
+    RuntimeError,
+    ValueError,
+    subprocess.CalledProcessError,
+)
+
+
+def process_card_images_pipelined(md_files: Sequence[Path], jobs: int) -> None:
+    """
+    Like `process_card_image_in_markdown` for each file, but the downloads,
+    conversions and uploads run as separate stages at the same time, each with
+    at most `jobs` images in flight. Once every image is through the
+    pipeline, references are updated, the PNGs are moved, and each post's
+    frontmatter is rewritten, one file at a time.
+
+    Posts whose card images would be stored under the same PNG name share one
+    download, conversion and upload, like in the serial path.
+
+    Raises:
+        The first error raised while processing an image or updating a post.
+        Each failure is reported, and the other posts are still updated.
+    """
+    # The posts using each card image, keyed by the PNG name it is stored as
+    posts_by_image: dict[str, list[Path]] = {}
+    image_urls: dict[str, str] = {}
+    for md_file in md_files:
+        if url := _card_image_to_convert(md_file):
+            png_name = _card_image_png_name(url)
+            image_urls.setdefault(png_name, url)
+            posts_by_image.setdefault(png_name, []).append(md_file)
+
+    if image_urls:
+        # List the bucket before the upload workers check for existing files
+        r2_upload.list_bucket_keys(r2_upload.R2_BUCKET_NAME)
+
+    uploaded: dict[str, tuple[Path, str]] = {}
+    errors: list[Exception] = []
+    with (
+        tempfile.TemporaryDirectory() as temp_root,
+        ThreadPoolExecutor(max_workers=jobs) as downloads,
+        ThreadPoolExecutor(
+            max_workers=min(jobs, os.cpu_count() or 1)
+        ) as conversions,
+        ThreadPoolExecutor(max_workers=jobs) as uploads,
+    ):
+        stages: tuple[tuple[ThreadPoolExecutor, Callable[..., Any]], ...] = (
+            (downloads, _download_card_image),
+            (conversions, _convert_card_image),
+            (uploads, _upload_card_image),
+        )
+        # Each future maps to its image and the index of its stage
+        pending: dict[Future, tuple[str, int]] = {}
+        for index, (png_name, url) in enumerate(image_urls.items()):
+            temp_dir = Path(temp_root) / str(index)
+            temp_dir.mkdir()
+            future = downloads.submit(_download_card_image, url, temp_dir)
+            pending[future] = (png_name, 0)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for finished in done:
+                png_name, stage = pending.pop(finished)
+                try:
+                    result = finished.result()
+                except _PIPELINE_ERRORS as e:
+                    _report_failure(image_urls[png_name], e)
+                    errors.append(e)
+                    continue
+
+                if stage + 1 < len(stages):
+                    executor, next_step = stages[stage + 1]
+                    pending[executor.submit(next_step, result)] = (
+                        png_name,
+                        stage + 1,
+                    )
+                else:
+                    uploaded[png_name] = result
+
+    r2_upload.update_all_markdown_references(
+        dict(uploaded.values()), references_dir=None, verbose=True
+    )
+    for png_name, (local_png_path, r2_address) in uploaded.items():
+        try:
+            r2_upload.move_if_requested(
+                local_png_path, r2_upload.R2_MEDIA_DIR, verbose=True
+            )
+        except _PIPELINE_ERRORS as e:
+            # The image is on R2, so its posts can still point to it
+            _report_failure(local_png_path, e)
+            errors.append(e)
+
+        for md_file in posts_by_image[png_name]:
+            try:
+                _write_card_image(md_file, r2_address)
+            except _PIPELINE_ERRORS as e:
+                _report_failure(md_file, e)
+                errors.append(e)
+
+    if errors:
+        raise errors[0]
 
 
 def main() -> None:
@@ -247,6 +410,16 @@ def main() -> None:
         help="Directory containing markdown files to process",
         default=git_root / "content",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help=(
+            "Number of images to download, convert and upload at once, in"
+            " separate pipelined stages (0 uses all CPUs)"
+        ),
+    )
     args = parser.parse_args()
 
     markdown_dir = Path(args.markdown_directory)
@@ -256,6 +429,11 @@ def main() -> None:
         use_git_ignore=True,
     )
 
+    jobs = args.jobs or os.cpu_count() or 1
+    if jobs > 1:
+        process_card_images_pipelined(markdown_files, jobs)
+        return
+
     for md_file in markdown_files:
         process_card_image_in_markdown(md_file)
 
@@ -24,17 +24,17 @@ if [ -n "$(ls -A "$GIT_ROOT"/content/asset_staging)" ]; then
 fi
 
 # Convert images to AVIF format, mp4s to webm, and remove metadata
-python "$GIT_ROOT"/scripts/convert_assets.py --remove-originals --strip-metadata --asset-directory "$STATIC_DIR" --ignore-files "example_com.png"
+python "$GIT_ROOT"/scripts/convert_assets.py --jobs 0 --remove-originals --strip-metadata --asset-directory "$STATIC_DIR" --ignore-files "example_com.png"
 
 # Left over original files
 find "$STATIC_DIR" -name "*.{mp4,avif}_original" -delete
 
 # Convert card images in markdown files
-python "$GIT_ROOT"/scripts/convert_markdown_yaml.py --markdown-directory "$GIT_ROOT"/content
+python "$GIT_ROOT"/scripts/convert_markdown_yaml.py --jobs 8 --markdown-directory "$GIT_ROOT"/content
 
 # Upload assets to R2 bucket
 LOCAL_ASSET_DIR="$GIT_ROOT"/../website-media-r2/static
-python "$GIT_ROOT"/scripts/r2_upload.py --move-to-dir "$LOCAL_ASSET_DIR" --references-dir "$GIT_ROOT"/content --upload-from-directory "$STATIC_DIR"
+python "$GIT_ROOT"/scripts/r2_upload.py --jobs 8 --move-to-dir "$LOCAL_ASSET_DIR" --references-dir "$GIT_ROOT"/content --upload-from-directory "$STATIC_DIR"
 
 # Commit changes to the moved-to local dir
 # (NOTE will also commit current changes)
@@ -3,12 +3,25 @@ Upload files to R2 storage and update references in markdown files.
 """
 
 import argparse
+import contextlib
+import hashlib
 import os
 import re
 import shutil
+import sqlite3
 import subprocess
-from pathlib import Path
-from typing import Optional, Sequence
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import (
+    ContextManager,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 try:
     from . import utils as script_utils
@@ -19,6 +32,11 @@ _home_directory = Path(os.environ.get("HOME", os.path.expanduser("~")))
 R2_BASE_URL: str = "https://assets.turntrout.com"
 R2_BUCKET_NAME: str = "turntrout"
 R2_MEDIA_DIR: Path = _home_directory / "Downloads" / "website-media-r2"
+UPLOAD_MANIFEST_PATH: Path = Path(".cache") / "r2_upload_manifest.sqlite"
+# Number of hex digits of the content hash put in content-hashed keys
+CONTENT_HASH_LENGTH: int = 8
+# Content-hashed keys never change content, so the CDN may cache them forever
+IMMUTABLE_CACHE_CONTROL: str = "public, max-age=31536000, immutable"
 
 
 def get_r2_key(filepath: Path) -> str:
@@ -30,6 +48,36 @@ def get_r2_key(filepath: Path) -> str:
     return re.sub(r"^/", "", key)
 
 
+# The keys of each bucket's files, listed at most once per run
+_bucket_keys: Dict[str, Set[str]] = {}
+
+
+def list_bucket_keys(bucket: str) -> Set[str]:
+    """
+    Get the keys of all files in an R2 bucket. The bucket is listed once, and
+    the keys are reused for the rest of the run.
+
+    Args:
+        bucket (str): The name of the bucket.
+
+    Returns:
+        Set[str]: The exact keys, or an empty set if the bucket could not be
+        listed.
+    """
+    if bucket not in _bucket_keys:
+        result = subprocess.run(
+            ["rclone", "lsf", "--recursive", "--files-only", f"r2:{bucket}"],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if result.returncode != 0:
+            # Don't remember the failure, so that later checks retry
+            return set()
+        _bucket_keys[bucket] = set(result.stdout.splitlines())
+    return _bucket_keys[bucket]
+
+
 def check_exists_on_r2(upload_target: str, verbose: bool = False) -> bool:
     """
     Check if a file exists in R2 storage.
@@ -49,18 +97,11 @@ def check_exists_on_r2(upload_target: str, verbose: bool = False) -> bool:
         _, _, path = upload_target.partition(":")
         bucket, _, key = path.partition("/")
 
-        result = subprocess.run(
-            ["rclone", "ls", f"r2:{bucket}"],
-            capture_output=True,
-            text=True,
-            check=False,
-        )
-        if result.returncode == 0 and key in result.stdout:
+        if key in list_bucket_keys(bucket):
             if verbose:
                 print(f"File found in R2: {upload_target}")
             return True
 
-        # Unsuccessful return code
         if verbose:
             print(f"No existing file found in R2: {upload_target}")
         return False
@@ -70,6 +111,170 @@ def check_exists_on_r2(upload_target: str, verbose: bool = False) -> bool:
         ) from e
 
 
+# The MD5 of each bucket's files, listed at most once per run
+_bucket_hashes: Dict[str, Dict[str, str]] = {}
+
+
+def list_bucket_hashes(bucket: str) -> Dict[str, str]:
+    """
+    Get the MD5 of each file in an R2 bucket, which is the file's ETag for
+    single-part uploads. The bucket is listed once, and the hashes are reused
+    for the rest of the run.
+
+    Args:
+        bucket (str): The name of the bucket.
+
+    Returns:
+        Dict[str, str]: The MD5 of each key. Keys whose hash R2 does not
+        report (e.g. multipart uploads) are left out, and the mapping is empty
+        if the bucket could not be listed.
+    """
+    if bucket not in _bucket_hashes:
+        result = subprocess.run(
+            ["rclone", "md5sum", f"r2:{bucket}"],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if result.returncode != 0:
+            # Don't remember the failure, so that later checks retry
+            return {}
+        hashes: Dict[str, str] = {}
+        for line in result.stdout.splitlines():
+            md5, _, key = line.partition("  ")
+            if md5.strip() and key:
+                hashes[key] = md5
+        _bucket_hashes[bucket] = hashes
+    return _bucket_hashes[bucket]
+
+
+def file_md5(file_path: Path) -> str:
+    """
+    Get the MD5 of a file's contents, in the form R2 reports it.
+    """
+    digest = hashlib.md5(usedforsecurity=False)
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_hashed_key(key: str, file_path: Path) -> str:
+    """
+    Insert a short hash of a file's content before the extension of its R2
+    key, e.g. `static/foo.avif` becomes `static/foo.3f9a1c2b.avif`.
+    """
+    path = PurePosixPath(key)
+    content_hash = file_md5(file_path)[:CONTENT_HASH_LENGTH]
+    return str(path.with_name(f"{path.stem}.{content_hash}{path.suffix}"))
+
+
+def get_upload_key(file_path: Path, hash_keys: bool = False) -> str:
+    """
+    Get the R2 key to upload a file to.
+
+    Args:
+        file_path (Path): The local file.
+        hash_keys (bool): Whether to put a hash of the content in the key.
+    """
+    key = get_r2_key(file_path)
+    return content_hashed_key(key, file_path) if hash_keys else key
+
+
+class UploadManifest:
+    """
+    On-disk SQLite record of the size and MD5 of the file last uploaded to
+    each R2 key. Lets sync runs skip files whose content is already on R2
+    without asking R2 for its hashes.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(db_path)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS uploads (
+                key TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                md5 TEXT NOT NULL
+            )
+            """
+        )
+
+    def __enter__(self) -> "UploadManifest":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Save new entries to disk and close the database.
+        """
+        self._connection.commit()
+        self._connection.close()
+
+    def get(self, key: str) -> Optional[Tuple[int, str]]:
+        """
+        Get the size and MD5 last uploaded to `key`, if any.
+        """
+        row = self._connection.execute(
+            "SELECT size, md5 FROM uploads WHERE key = ?", (key,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def record(self, key: str, size: int, md5: str) -> None:
+        """
+        Remember that a file with this size and MD5 is stored at `key`.
+        """
+        self._connection.execute(
+            "INSERT OR REPLACE INTO uploads VALUES (?, ?, ?)",
+            (key, size, md5),
+        )
+
+
+def is_unchanged_on_r2(
+    file_path: Path,
+    manifest: UploadManifest,
+    verbose: bool = False,
+    hash_keys: bool = False,
+) -> bool:
+    """
+    Check whether R2 already stores the same content as a local file. With
+    `hash_keys`, the key names the content, so it existing is enough.
+    Otherwise the local manifest is consulted first; R2's own hashes are only
+    listed when the manifest has no matching entry. Matches found on R2 are
+    recorded in the manifest.
+
+    Args:
+        file_path (Path): The local file.
+        manifest (UploadManifest): The record of past uploads.
+        verbose (bool): Whether to print verbose output.
+        hash_keys (bool): Whether the file's key contains its content hash.
+
+    Returns:
+        bool: True if the file need not be uploaded again.
+    """
+    if not file_path.is_file():
+        return False
+    key = get_upload_key(file_path, hash_keys)
+    if key not in list_bucket_keys(R2_BUCKET_NAME):
+        return False
+
+    unchanged = hash_keys
+    if not unchanged:
+        size = file_path.stat().st_size
+        md5 = file_md5(file_path)
+        unchanged = manifest.get(key) == (size, md5)
+        if not unchanged and list_bucket_hashes(R2_BUCKET_NAME).get(key) == md5:
+            manifest.record(key, size, md5)
+            unchanged = True
+
+    if unchanged and verbose:
+        print(f"Unchanged on R2, skipping upload: {key}")
+    return unchanged
+
+
 def update_markdown_references(
     file_path: Path,
     r2_address: str,
@@ -85,18 +290,60 @@ def update_markdown_references(
         references_dir: Dir to search for files to update references.
         verbose: Whether to print verbose output.
     """
-    relative_original_path = script_utils.path_relative_to_quartz_parent(
-        file_path
-    )
-    relative_subpath = Path(
-        *relative_original_path.parts[
-            relative_original_path.parts.index("static") :
-        ]
+    update_all_markdown_references(
+        {file_path: r2_address}, references_dir, verbose
     )
 
-    if verbose:
-        print(f'Changing "{relative_subpath}" references to "{r2_address}"')
 
+def update_all_markdown_references(
+    r2_addresses: Dict[Path, str],
+    references_dir: Optional[Path] = None,
+    verbose: bool = False,
+) -> List[Path]:
+    """
+    Update references to each file in markdown files with its R2 URL, in a
+    single pass over each markdown file.
+
+    Args:
+        r2_addresses: The R2 URL to replace references to each file with.
+        references_dir: Dir to search for files to update references.
+        verbose: Whether to print verbose output.
+
+    Returns:
+        The markdown files which were changed.
+    """
+    # Both the path relative to quartz's parent and the path from static/
+    # are replaced
+    addresses_by_path: Dict[str, str] = {}
+    for file_path, r2_address in r2_addresses.items():
+        relative_original_path = script_utils.path_relative_to_quartz_parent(
+            file_path
+        )
+        relative_subpath = Path(
+            *relative_original_path.parts[
+                relative_original_path.parts.index("static") :
+            ]
+        )
+
+        if verbose:
+            print(f'Changing "{relative_subpath}" references to "{r2_address}"')
+        addresses_by_path[str(relative_original_path)] = r2_address
+        addresses_by_path[str(relative_subpath)] = r2_address
+
+    if not addresses_by_path:
+        return []
+
+    # Try longer paths first, so that a path is never replaced by the address
+    # of a file whose path is a prefix of it
+    escaped_paths = (
+        re.escape(path)
+        for path in sorted(addresses_by_path, key=len, reverse=True)
+    )
+    source_regex = re.compile(
+        rf"(?<=[\(\"])(?:\.?/)?(?P<path>{'|'.join(escaped_paths)})"
+    )
+
+    changed_files: List[Path] = []
     # Don't git-ignore so we can update drafts
     for text_file_path in script_utils.get_files(
         references_dir, (".md",), use_git_ignore=False
@@ -104,22 +351,23 @@ def update_markdown_references(
         with open(text_file_path, "r", encoding="utf-8") as f:
             file_content: str = f.read()
 
-        escaped_original_path: str = re.escape(str(relative_original_path))
-        escaped_relative_subpath: str = re.escape(str(relative_subpath))
-        source_regex: str = (
-            rf"(?<=[\(\"])(?:\.?/)?"
-            rf"(?:{escaped_original_path}|{escaped_relative_subpath})"
+        new_content: str = source_regex.sub(
+            lambda match: addresses_by_path[match.group("path")],
+            file_content,
         )
-        new_content: str = re.sub(source_regex, r2_address, file_content)
 
-        with open(text_file_path, "w", encoding="utf-8") as f:
-            f.write(new_content)
+        if new_content != file_content:
+            with open(text_file_path, "w", encoding="utf-8") as f:
+                f.write(new_content)
+            changed_files.append(text_file_path)
+    return changed_files
 
 
 def upload_to_r2(
     file_path: Path,
     verbose: bool = False,
     overwrite_existing: bool = False,
+    hash_keys: bool = False,
 ) -> str:
     """
     Upload a file to R2 storage and update references.
@@ -129,6 +377,8 @@ def upload_to_r2(
         verbose (bool): Whether to print verbose output.
         references_dir (Path): Dir to search for files to update references.
         overwrite_existing (bool): Whether to overwrite existing files in R2.
+        hash_keys (bool): Whether to put a hash of the content in the key and
+            mark the upload as immutable for caches.
 
     Returns:
         str: The R2 URL of the uploaded file.
@@ -148,9 +398,14 @@ def upload_to_r2(
 
     relative_path = script_utils.path_relative_to_quartz_parent(file_path)
     r2_key: str = get_r2_key(relative_path)
+    if hash_keys:
+        r2_key = content_hashed_key(r2_key, file_path)
     upload_target: str = f"r2:{R2_BUCKET_NAME}/{r2_key}"
 
     file_exists = check_exists_on_r2(upload_target, verbose)
+    if file_exists and hash_keys:
+        # The key names the content, so R2 already stores this exact file
+        return f"{R2_BASE_URL}/{r2_key}"
     if file_exists and not overwrite_existing:
         print(
             f"File '{r2_key}' already exists in R2. "
@@ -171,10 +426,17 @@ def upload_to_r2(
         # otherwise CORS will deny the request by the client
         if file_path.suffix.lower() == ".svg":
             rclone_args.extend(["--metadata-set", "content-type=image/svg+xml"])
+        if hash_keys:
+            rclone_args.extend(
+                ["--metadata-set", f"cache-control={IMMUTABLE_CACHE_CONTROL}"]
+            )
         subprocess.run(rclone_args, check=True)
     except subprocess.CalledProcessError as e:
         raise RuntimeError(f"Failed to upload file to R2: {e}") from e
 
+    if R2_BUCKET_NAME in _bucket_keys:
+        _bucket_keys[R2_BUCKET_NAME].add(r2_key)
+
     return f"{R2_BASE_URL}/{r2_key}"  # The r2 address
 
 
@@ -211,6 +473,7 @@ def upload_and_move(
     references_dir: Optional[Path] = None,
     move_to_dir: Optional[Path] = None,
     overwrite_existing: bool = False,
+    hash_keys: bool = False,
 ) -> None:
     """
     Upload a file to R2 storage, update references, and move the original file.
@@ -221,11 +484,13 @@ def upload_and_move(
         references_dir (Path): Dir to search for files to update references.
         move_to_dir (Path): The local dir to move the file to after upload.
         overwrite_existing (bool): Whether to overwrite existing files in R2.
+        hash_keys (bool): Whether to upload to a content-hashed key.
     """
     r2_address: str = upload_to_r2(
         file_path,
         verbose=verbose,
         overwrite_existing=overwrite_existing,
+        hash_keys=hash_keys,
     )
     update_markdown_references(
         file_path,
@@ -233,7 +498,16 @@ def upload_and_move(
         references_dir=references_dir,
         verbose=verbose,
     )
+    move_if_requested(file_path, move_to_dir, verbose)
 
+
+def move_if_requested(
+    file_path: Path, move_to_dir: Optional[Path], verbose: bool
+) -> None:
+    """
+    Move an uploaded file like `move_uploaded_file`, if `move_to_dir` is given
+    and exists.
+    """
     if move_to_dir:
         if not move_to_dir.exists():
             print(f"Warning: Directory does not exist: {move_to_dir}")
@@ -243,6 +517,81 @@ def upload_and_move(
             )
 
 
+def upload_and_move_all(
+    file_paths: Sequence[Path],
+    verbose: bool = False,
+    references_dir: Optional[Path] = None,
+    move_to_dir: Optional[Path] = None,
+    overwrite_existing: bool = False,
+    jobs: int = 1,
+    manifest: Optional[UploadManifest] = None,
+    hash_keys: bool = False,
+) -> None:
+    """
+    Like `upload_and_move` for each file, but with up to `jobs` uploads in
+    flight at once. Once the uploads finish, the references to all uploaded
+    files are updated in a single pass over the markdown files, and then the
+    files are moved.
+
+    If a `manifest` is given, files are synced instead: those whose content is
+    already on R2 are not uploaded again, and new or changed files are
+    uploaded (overwriting the old content) and recorded in the manifest.
+
+    If `hash_keys` is set, each file goes to a key containing its content hash,
+    and references are rewritten to that key's URL.
+
+    Raises:
+        The first error raised while uploading a file. Each failure is
+        reported, and the other files are still uploaded, updated and moved.
+    """
+    # List the bucket before the workers check for existing files
+    list_bucket_keys(R2_BUCKET_NAME)
+
+    r2_addresses: Dict[Path, str] = {}
+    files_to_upload = list(file_paths)
+    if manifest is not None:
+        files_to_upload = []
+        for file_path in file_paths:
+            if is_unchanged_on_r2(file_path, manifest, verbose, hash_keys):
+                r2_key = get_upload_key(file_path, hash_keys)
+                r2_addresses[file_path] = f"{R2_BASE_URL}/{r2_key}"
+            else:
+                files_to_upload.append(file_path)
+
+    errors: list[Exception] = []
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = [
+            executor.submit(
+                upload_to_r2,
+                file_path,
+                verbose=verbose,
+                overwrite_existing=overwrite_existing or manifest is not None,
+                hash_keys=hash_keys,
+            )
+            for file_path in files_to_upload
+        ]
+        for file_path, future in zip(files_to_upload, futures):
+            try:
+                r2_addresses[file_path] = future.result()
+            except (RuntimeError, ValueError, OSError) as e:
+                print(f"Failed to upload {file_path}: {e}", file=sys.stderr)
+                errors.append(e)
+                continue
+            if manifest is not None:
+                manifest.record(
+                    get_upload_key(file_path, hash_keys),
+                    file_path.stat().st_size,
+                    file_md5(file_path),
+                )
+
+    update_all_markdown_references(r2_addresses, references_dir, verbose)
+    for file_path in r2_addresses:
+        move_if_requested(file_path, move_to_dir, verbose)
+
+    if errors:
+        raise errors[0]
+
+
 def main() -> None:
     """
     Upload files to R2 storage and update references in markdown files.
@@ -284,6 +633,29 @@ def main() -> None:
         action="store_true",
         help="Overwrite existing files in R2 if they already exist",
     )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help=(
+            "Only upload new or changed files, overwriting changed ones in R2."
+            " Uploads are recorded in a local manifest"
+        ),
+    )
+    parser.add_argument(
+        "--hash-keys",
+        action="store_true",
+        help=(
+            "Put a short hash of each file's content in its R2 key (e.g."
+            " foo.3f9a1c2b.avif) and mark it immutable for caches"
+        ),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of files to upload at once (0 uses all CPUs)",
+    )
     parser.add_argument("file", type=Path, nargs="?", help="File to upload")
     args = parser.parse_args()
 
@@ -300,13 +672,21 @@ def main() -> None:
             "Either --upload_from_directory or a file must be specified"
         )
 
-    for file_to_upload in files_to_upload:
-        upload_and_move(
-            file_to_upload,
+    manifest_context: ContextManager[Optional[UploadManifest]] = (
+        UploadManifest(Path(script_utils.get_git_root()) / UPLOAD_MANIFEST_PATH)
+        if args.sync
+        else contextlib.nullcontext()
+    )
+    with manifest_context as manifest:
+        upload_and_move_all(
+            files_to_upload,
             verbose=args.verbose,
             references_dir=args.references_dir,
             move_to_dir=args.move_to_dir,
             overwrite_existing=args.overwrite_existing,
+            jobs=args.jobs or os.cpu_count() or 1,
+            manifest=manifest,
+            hash_keys=args.hash_keys,
         )
 
 
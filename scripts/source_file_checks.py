@@ -2,12 +2,26 @@
 Check source files for issues, like invalid links, missing required fields, etc.
 """
 
+import argparse
+import bisect
+import functools
+import os
 import re
 import shutil
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+)
 
 # Add the project root to sys.path
 # pylint: disable=wrong-import-position
@@ -18,14 +32,24 @@ MetadataIssues = Dict[str, List[str]]
 PathMap = Dict[str, Path]  # Maps URLs to their source files
 
 
-def check_required_fields(metadata: dict) -> List[str]:
+def check_required_fields(
+    metadata: dict, has_frontmatter: Optional[bool] = None
+) -> List[str]:
     """
     Check for empty required metadata fields.
+
+    Args:
+        metadata: The file's frontmatter metadata
+        has_frontmatter: Whether the file has frontmatter, for metadata which
+            holds only some of its keys. Defaults to whether `metadata` is
+            non-empty.
     """
     errors = []
     required_fields = ("title", "description", "tags", "permalink")
 
-    if not metadata:
+    if has_frontmatter is None:
+        has_frontmatter = bool(metadata)
+    if not has_frontmatter:
         errors.append("No valid frontmatter found")
         return errors
 
@@ -88,12 +112,124 @@ def get_all_urls(metadata: dict) -> Set[str]:
     return urls
 
 
-def check_invalid_md_links(file_path: Path) -> List[str]:
+class LineIndex:
+    """
+    Offsets of every newline in a text, so that the line number of any
+    character offset is found by binary search instead of by counting the
+    newlines before it.
+    """
+
+    def __init__(self, text: str) -> None:
+        self._newline_offsets = [
+            match.start() for match in re.finditer("\n", text)
+        ]
+
+    def line_number(self, offset: int) -> int:
+        """
+        Get the 1-based line number of the character at `offset`.
+        """
+        return bisect.bisect_left(self._newline_offsets, offset) + 1
+
+
+class SourceFile:
+    """
+    A markdown file as the source checks see it. The file is read once, and
+    its frontmatter and line index are shared by every check.
+
+    Attributes:
+        path: Path to the markdown file
+        text: The raw contents of the file
+    """
+
+    def __init__(
+        self, path: Path, text: str, metadata: Optional[dict] = None
+    ) -> None:
+        self.path = path
+        self.text = text
+        self._metadata = metadata
+
+    @classmethod
+    def read(
+        cls,
+        path: Path,
+        frontmatter_index: Optional[script_utils.FrontmatterIndex] = None,
+    ) -> "SourceFile":
+        """
+        Read a markdown file, taking its frontmatter from `frontmatter_index`
+        if given instead of parsing it. The file is read once, even if the
+        index has to parse it.
+        """
+        raw_content = path.read_bytes()
+        metadata = (
+            frontmatter_index.get(path, raw_content=raw_content)
+            if frontmatter_index
+            else None
+        )
+        # Translate newlines like `Path.read_text`
+        text = raw_content.decode("utf-8").replace("\r\n", "\n")
+        return cls(path, text.replace("\r", "\n"), metadata)
+
+    @property
+    def metadata(self) -> dict:
+        """
+        The parsed frontmatter, or an empty dict if there is none.
+        """
+        if self._metadata is None:
+            self._metadata, _ = script_utils.split_yaml_content(
+                self.text, self.path, mode="read"
+            )
+        return self._metadata
+
+    @property
+    def has_frontmatter(self) -> bool:
+        """
+        Whether the file has non-empty frontmatter, even if none of its keys
+        were indexed.
+        """
+        metadata = self.metadata
+        if isinstance(metadata, script_utils.IndexedFrontmatter):
+            return metadata.has_frontmatter
+        return bool(metadata)
+
+    @functools.cached_property
+    def line_index(self) -> LineIndex:
+        """
+        Line index of `text`.
+        """
+        return LineIndex(self.text)
+
+
+SourceCheck = Callable[[SourceFile], List[str]]
+
+# Per-file checks by the name their issues are reported under, in order
+SOURCE_CHECKS: Dict[str, SourceCheck] = {}
+
+
+def source_check(name: str) -> Callable[[SourceCheck], SourceCheck]:
+    """
+    Register a check to run on every markdown source file. Its errors are
+    reported under `name`.
+    """
+
+    def register(check: SourceCheck) -> SourceCheck:
+        SOURCE_CHECKS[name] = check
+        return check
+
+    return register
+
+
+@source_check("required_fields")
+def _check_source_required_fields(source: SourceFile) -> List[str]:
+    return check_required_fields(source.metadata, source.has_frontmatter)
+
+
+@source_check("invalid_links")
+def check_invalid_md_links(source: SourceFile) -> List[str]:
     """
     Check for invalid markdown links that don't start with '/'.
 
     Args:
-        file_path: Path to the markdown file to check
+        source: The markdown file to check
 
     Returns:
         List of error messages for invalid links found
@@ -101,13 +237,12 @@ def check_invalid_md_links(file_path: Path) -> List[str]:
     invalid_md_link_pattern = r"\]\([-A-Za-z_0-9:]+(\.md)?\)"
     errors = []
 
-    content = file_path.read_text()
-    matches = re.finditer(invalid_md_link_pattern, content)
+    matches = re.finditer(invalid_md_link_pattern, source.text)
 
     for match in matches:
-        if "shard-theory" in match.group() and "design.md" in file_path.name:
+        if "shard-theory" in match.group() and "design.md" in source.path.name:
             continue  # I mention this checker, not a real broken link
-        line_num = content[: match.start()].count("\n") + 1
+        line_num = source.line_index.line_number(match.start())
         errors.append(
             f"Invalid markdown link at line {line_num}: {match.group()}"
         )
@@ -115,53 +250,64 @@ def check_invalid_md_links(file_path: Path) -> List[str]:
     return errors
 
 
-def check_latex_tags(file_path: Path) -> List[str]:
+@source_check("latex_tags")
+def check_latex_tags(source: SourceFile) -> List[str]:
     """
     Check for \\tag{ in markdown files, which should be avoided.
 
     Args:
-        file_path: Path to the markdown file to check
+        source: The markdown file to check
 
     Returns:
         List of error messages for found LaTeX tags
     """
     # There's an innocuous use of LaTeX tags in design.md, so we'll ignore it
-    if "design.md" in file_path.name:
+    if "design.md" in source.path.name:
         return []
 
     tag_pattern = r"(?<!\\)\\tag\{"
     errors = []
 
-    content = file_path.read_text()
-    matches = re.finditer(tag_pattern, content)
+    matches = re.finditer(tag_pattern, source.text)
 
     for match in matches:
-        line_num = content[: match.start()].count("\n") + 1
+        line_num = source.line_index.line_number(match.start())
         errors.append(f"LaTeX \\tag{{}} found at line {line_num}")
 
     return errors
 
 
 def check_file_data(
-    metadata: dict, existing_urls: PathMap, file_path: Path
+    source: SourceFile, existing_urls: PathMap
 ) -> MetadataIssues:
     """
     Check a single file's metadata and content for various issues.
 
     Args:
-        metadata: The file's frontmatter metadata
+        source: The file being checked
         existing_urls: Map of known URLs to their file paths
-        file_path: Path to the file being checked
 
     Returns:
         Dictionary mapping check names to lists of error messages
     """
-    issues: MetadataIssues = {
-        "required_fields": check_required_fields(metadata),
-        "invalid_links": check_invalid_md_links(file_path),
-        "latex_tags": check_latex_tags(file_path),
-    }
+    issues = run_source_checks(source)
+    _add_url_issues(issues, source.metadata, existing_urls, source.path)
+    return issues
+
 
+def run_source_checks(source: SourceFile) -> MetadataIssues:
+    """
+    Run every registered per-file check on a source file.
+    """
+    return {name: check(source) for name, check in SOURCE_CHECKS.items()}
+
+
+def _add_url_issues(
+    issues: MetadataIssues,
+    metadata: dict,
+    existing_urls: PathMap,
+    file_path: Path,
+) -> None:
     if metadata:
         urls = get_all_urls(metadata)
         if urls:
@@ -169,7 +315,75 @@ def check_file_data(
                 urls, existing_urls, file_path
             )
 
-    return issues
+
+def _check_source_file(file_path: Path, metadata: dict) -> MetadataIssues:
+    # Runs in worker processes, which cannot share the frontmatter index
+    return run_source_checks(
+        SourceFile(file_path, file_path.read_text(), metadata)
+    )
+
+
+def check_source_files(
+    metadata_by_file: Mapping[Path, dict], jobs: int = 1
+) -> Iterable[MetadataIssues]:
+    """
+    Run the per-file checks on each file, using up to `jobs` processes.
+
+    Args:
+        metadata_by_file: The frontmatter of each file to check
+        jobs: Number of processes to check files in
+
+    Returns:
+        The issues of each file, in the order of `metadata_by_file`
+    """
+    if jobs <= 1 or len(metadata_by_file) <= 1:
+        return [
+            _check_source_file(file_path, metadata)
+            for file_path, metadata in metadata_by_file.items()
+        ]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(
+            executor.map(
+                _check_source_file,
+                metadata_by_file.keys(),
+                metadata_by_file.values(),
+                chunksize=max(1, len(metadata_by_file) // (jobs * 4)),
+            )
+        )
+
+
+# Changes under these dirs can affect the font checks
+_FONT_DIRS = (Path("quartz") / "styles", Path("quartz") / "static" / "styles")
+
+
+def get_changed_files(git_root: Path, base_ref: str = "HEAD") -> Set[Path]:
+    """
+    Get the files which are staged or changed relative to `base_ref`,
+    including new files which are staged.
+
+    Args:
+        git_root: Root of the git repository
+        base_ref: The ref to compare against
+
+    Returns:
+        Resolved paths of the changed files, except deleted ones
+
+    Raises:
+        subprocess.CalledProcessError: If git fails, e.g. on an unknown ref
+    """
+    result = subprocess.run(
+        ["git", "diff", "--name-only", "--diff-filter=d", base_ref, "--"],
+        cwd=git_root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        (git_root / line).resolve()
+        for line in result.stdout.splitlines()
+        if line.strip()
+    }
 
 
 def print_issues(file_path: Path, issues: MetadataIssues) -> None:
@@ -339,6 +553,32 @@ def main() -> None:
     """
     Check source files for issues.
     """
+    parser = argparse.ArgumentParser(
+        description="Check source files for issues."
+    )
+    parser.add_argument(
+        "--changed-only",
+        action="store_true",
+        help=(
+            "Only check markdown files which are staged or changed relative"
+            " to --base-ref. Their URLs are still checked for uniqueness"
+            " against every other file, using the frontmatter index"
+        ),
+    )
+    parser.add_argument(
+        "--base-ref",
+        default="HEAD",
+        help="Git ref that --changed-only compares against",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes for the per-file checks (0 uses all CPUs)",
+    )
+    args = parser.parse_args()
+
     git_root = script_utils.get_git_root()
     content_dir = git_root / "content"
     existing_urls: PathMap = {}
@@ -351,23 +591,54 @@ def main() -> None:
         use_git_ignore=True,
         ignore_dirs=["templates", "drafts"],
     )
-
-    for file_path in markdown_files:
-        rel_path = file_path.relative_to(git_root)
-        metadata, _ = script_utils.split_yaml(file_path)
-        issues = check_file_data(metadata, existing_urls, file_path)
-
+    files_to_check: Sequence[Path] = markdown_files
+    changed_files: Set[Path] = set()
+    if args.changed_only:
+        changed_files = get_changed_files(git_root, args.base_ref)
+        files_to_check = [
+            file_path
+            for file_path in markdown_files
+            if file_path.resolve() in changed_files
+        ]
+
+    with script_utils.FrontmatterIndex(
+        git_root / script_utils.FRONTMATTER_INDEX_PATH
+    ) as frontmatter_index:
+        metadata_by_file = {
+            file_path: frontmatter_index.get(file_path)
+            for file_path in files_to_check
+        }
+        # Unchecked files' URLs come from the index, without reading them
+        for file_path in markdown_files:
+            if file_path not in metadata_by_file:
+                metadata = frontmatter_index.get(file_path)
+                for url in get_all_urls(metadata):
+                    existing_urls.setdefault(url, file_path)
+
+    all_issues = check_source_files(
+        metadata_by_file, jobs=args.jobs or os.cpu_count() or 1
+    )
+    for (file_path, metadata), issues in zip(
+        metadata_by_file.items(), all_issues
+    ):
+        _add_url_issues(issues, metadata, existing_urls, file_path)
         if any(lst for lst in issues.values()):
             has_errors = True
-            print_issues(rel_path, issues)
+            print_issues(file_path.relative_to(git_root), issues)
 
     # Check font files
+    fonts_changed = any(
+        (git_root / font_dir).resolve() in changed_file.parents
+        for changed_file in changed_files
+        for font_dir in _FONT_DIRS
+    )
     fonts_scss_path = git_root / "quartz" / "styles" / "fonts.scss"
-    if missing_fonts := check_scss_font_files(fonts_scss_path, git_root):
-        has_errors = True
-        print("\nMissing font files:")
-        for font in missing_fonts:
-            print(f"  - {font}")
+    if not args.changed_only or fonts_changed:
+        if missing_fonts := check_scss_font_files(fonts_scss_path, git_root):
+            has_errors = True
+            print("\nMissing font files:")
+            for font in missing_fonts:
+                print(f"  - {font}")
 
     if has_errors:
         sys.exit(1)
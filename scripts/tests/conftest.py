@@ -11,3 +11,16 @@ def temp_dir():
     """
     with tempfile.TemporaryDirectory() as dir_path:
         yield Path(dir_path)
+
+
+@pytest.fixture(autouse=True)
+def transcode_cache_dir(tmp_path_factory, monkeypatch):
+    """
+    Keeps each test's conversions out of the user's transcode cache.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .. import compress
+
+    cache_dir = tmp_path_factory.mktemp("transcodes")
+    monkeypatch.setattr(compress, "TRANSCODE_CACHE_DIR", cache_dir)
+    return cache_dir
@@ -1,9 +1,11 @@
 import subprocess
 import sys
 from pathlib import Path
+from typing import List
+from unittest import mock
 
 import pytest
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, NavigableString, Tag
 
 from ..utils import get_git_root
 
@@ -17,6 +19,17 @@ else:
     from built_site_checks import *
 
 
+@pytest.fixture(autouse=True, params=script_utils.HTML_PARSERS)
+def html_parser(request, monkeypatch):
+    """
+    Run every test in this module under each installed HTML parser backend.
+    """
+    if not script_utils.html_parser_available(request.param):
+        pytest.skip(f"{request.param} is not installed")
+    monkeypatch.setattr(script_utils, "DEFAULT_HTML_PARSER", request.param)
+    return request.param
+
+
 @pytest.fixture
 def sample_html():
     return """
@@ -55,7 +68,7 @@ def sample_html_with_katex_errors():
 
 @pytest.fixture
 def sample_soup(sample_html):
-    return BeautifulSoup(sample_html, "html.parser")
+    return script_utils.parse_html(sample_html)
 
 
 @pytest.fixture
@@ -81,7 +94,7 @@ def sample_html_with_assets():
 
 @pytest.fixture
 def sample_soup_with_assets(sample_html_with_assets):
-    return BeautifulSoup(sample_html_with_assets, "html.parser")
+    return script_utils.parse_html(sample_html_with_assets)
 
 
 def test_check_localhost_links(sample_soup):
@@ -119,7 +132,7 @@ def test_check_problematic_paragraphs_with_direct_text():
     </body>
     </html>
     """
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_problematic_paragraphs(soup)
     assert "Problematic paragraph: Figure: Text" in result
     assert "Problematic paragraph: Figure: Blockquote" in result
@@ -127,7 +140,7 @@ def test_check_problematic_paragraphs_with_direct_text():
 
 
 def test_check_katex_elements_for_errors(sample_html_with_katex_errors):
-    html = BeautifulSoup(sample_html_with_katex_errors, "html.parser")
+    html = script_utils.parse_html(sample_html_with_katex_errors)
     result = check_katex_elements_for_errors(html)
     assert result == ["KaTeX error: \\rewavcxx"]
 
@@ -188,7 +201,7 @@ def test_check_local_media_files_parametrized(
     for file in existing_files:
         (temp_site_root / file).touch()
 
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_local_media_files(soup, temp_site_root)
 
     # Format the expected paths with the actual resolved paths
@@ -279,7 +292,7 @@ def test_check_file_for_issues_with_redirect(tmp_path):
     ],
 )
 def test_check_favicons_missing(html, expected):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_favicons_missing(soup)
     assert result == expected
 
@@ -295,7 +308,7 @@ def test_check_unrendered_subtitles():
     </body>
     </html>
     """
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_unrendered_subtitles(soup)
     assert result == [
         "Unrendered subtitle: Subtitle: This should be a subtitle",
@@ -376,7 +389,7 @@ def test_check_unrendered_footnotes():
     </body>
     </html>
     """
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_unrendered_footnotes(soup)
     assert result == ["[^1]", "[^note]"]
 
@@ -392,7 +405,7 @@ def test_check_unrendered_footnotes():
     ],
 )
 def test_check_unrendered_footnotes_parametrized(html, expected):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_unrendered_footnotes(soup)
     assert result == expected
 
@@ -460,7 +473,7 @@ def test_check_unrendered_footnotes_parametrized(html, expected):
     ],
 )
 def test_check_duplicate_ids(html, expected):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_duplicate_ids(soup)
     assert sorted(result) == sorted(expected)
 
@@ -500,7 +513,7 @@ def test_check_duplicate_ids(html, expected):
     ],
 )
 def test_check_duplicate_ids_with_footnotes(html, expected):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_duplicate_ids(soup)
     assert sorted(result) == sorted(expected)
 
@@ -549,7 +562,7 @@ def test_check_duplicate_ids_with_footnotes(html, expected):
 )
 def test_check_problematic_paragraphs_with_dt(html, expected):
     """Check that unrendered description list entries are flagged."""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_problematic_paragraphs(soup)
     assert sorted(result) == sorted(expected)
 
@@ -569,7 +582,7 @@ def test_check_unrendered_spoilers():
     </body>
     </html>
     """
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_unrendered_spoilers(soup)
     assert result == ["Unrendered spoiler: ! This is an unrendered spoiler."]
 
@@ -628,7 +641,7 @@ def test_check_unrendered_spoilers():
     ],
 )
 def test_check_unrendered_spoilers_parametrized(html, expected):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_unrendered_spoilers(soup)
     assert result == expected
 
@@ -672,7 +685,7 @@ def test_check_unrendered_spoilers_parametrized(html, expected):
 )
 def test_check_problematic_paragraphs_with_headings(html, expected):
     """Check that unrendered headings (paragraphs starting with #) are flagged."""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_problematic_paragraphs(soup)
     assert sorted(result) == sorted(expected)
 
@@ -789,7 +802,7 @@ def test_check_problematic_paragraphs_with_headings(html, expected):
 )
 def test_check_problematic_paragraphs_comprehensive(html, expected):
     """Comprehensive test suite for check_problematic_paragraphs function."""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_problematic_paragraphs(soup)
     assert sorted(result) == sorted(expected)
 
@@ -869,7 +882,7 @@ def test_check_problematic_paragraphs_comprehensive(html, expected):
     ],
 )
 def test_check_unrendered_emphasis(html, expected):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_unrendered_emphasis(soup)
     assert sorted(result) == sorted(expected)
 
@@ -906,7 +919,7 @@ def test_check_unrendered_emphasis(html, expected):
     ],
 )
 def test_katex_element_surrounded_by_blockquote(html, expected):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = katex_element_surrounded_by_blockquote(soup)
     assert result == expected
 
@@ -948,7 +961,7 @@ def test_katex_element_surrounded_by_blockquote(html, expected):
     ],
 )
 def test_check_unprocessed_quotes(html, expected):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_unprocessed_quotes(soup)
     assert sorted(result) == sorted(expected)
 
@@ -997,7 +1010,7 @@ def test_check_unprocessed_quotes(html, expected):
     ],
 )
 def test_check_unprocessed_dashes(html, expected):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_unprocessed_dashes(soup)
     assert sorted(result) == sorted(expected)
 
@@ -1065,7 +1078,7 @@ def test_check_unprocessed_dashes(html, expected):
     ],
 )
 def test_check_unrendered_html(html, expected):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_unrendered_html(soup)
     assert sorted(result) == sorted(expected)
 
@@ -1172,7 +1185,7 @@ def test_check_markdown_assets_in_html(
     monkeypatch.setattr("scripts.utils.get_git_root", lambda: tmp_path)
 
     # Run test
-    soup = BeautifulSoup(html_content, "html.parser")
+    soup = script_utils.parse_html(html_content)
     result = check_markdown_assets_in_html(soup, md_path)
     assert sorted(result) == sorted(expected)
 
@@ -1241,7 +1254,7 @@ def test_check_markdown_assets_in_html(
     ],
 )
 def test_check_emphasis_spacing(html, expected):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_emphasis_spacing(soup)
     assert sorted(result) == sorted(expected)
 
@@ -1311,7 +1324,7 @@ def test_check_emphasis_spacing(html, expected):
 )
 def test_check_description_length(html: str, expected: list[str]) -> None:
     """Test the check_description_length function."""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_description_length(soup)
     assert result == expected
 
@@ -1409,6 +1422,379 @@ def test_check_css_issues_missing_file(tmp_path: Path):
     ],
 )
 def test_check_critical_css(html, expected):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = script_utils.parse_html(html)
     result = check_critical_css(soup)
     assert result == expected
+
+
+def test_check_pages_parallel_matches_serial(tmp_path: Path):
+    """
+    Test that checking pages in worker processes gives the same results, in
+    the same order, as checking them serially.
+    """
+    pages = []
+    for i in range(5):
+        file_path = tmp_path / f"page{i}.html"
+        file_path.write_text(
+            f"""
+        <html>
+        <body>
+            <a href="#missing-{i}">Invalid Anchor</a>
+            <p>Table: Table {i}</p>
+            <p>Some "quotes" -- and dashes</p>
+        </body>
+        </html>
+        """
+        )
+        pages.append((file_path, None))
+
+    serial_results = list(check_pages(pages, tmp_path, jobs=1))
+    parallel_results = list(check_pages(pages, tmp_path, jobs=2))
+
+    assert parallel_results == serial_results
+    assert [file_path for file_path, _ in serial_results] == [
+        file_path for file_path, _ in pages
+    ]
+    assert serial_results[3][1]["invalid_anchors"] == ["#missing-3"]
+
+
+def test_check_pages_parses_pages_without_md_once(tmp_path: Path):
+    """
+    Test that whether a root page should have a markdown file is decided from
+    the same parse as its checks.
+    """
+    public_dir = tmp_path / "public"
+    public_dir.mkdir()
+    (public_dir / "redirect.html").write_text(
+        '<html><head><meta http-equiv="refresh" content="0; url=/a">'
+        "</head><body></body></html>"
+    )
+    (public_dir / "orphan.html").write_text(
+        "<html><body><p>No markdown</p></body></html>"
+    )
+
+    with mock.patch.object(
+        script_utils,
+        "parse_html_file",
+        side_effect=script_utils.parse_html_file,
+    ) as mock_parse:
+        pages, pages_without_md = pages_to_check(public_dir, {}, set())
+        assert mock_parse.call_count == 0
+        assert pages_without_md == {
+            public_dir / "orphan.html",
+            public_dir / "redirect.html",
+        }
+
+        redirect_page = [(public_dir / "redirect.html", None)]
+        assert list(
+            check_pages(
+                redirect_page, public_dir, pages_without_md=pages_without_md
+            )
+        ) == [(public_dir / "redirect.html", {})]
+        assert mock_parse.call_count == 1
+
+        with pytest.raises(ValueError, match="Markdown file for orphan"):
+            list(
+                check_pages(
+                    pages, public_dir, pages_without_md=pages_without_md
+                )
+            )
+
+
+def _checked_pages(
+    pages, base_dir: Path, manifest: CheckManifest, full: bool = False
+) -> List[str]:
+    """
+    Run check_pages with a manifest, returning the names of the pages which
+    were actually checked rather than replayed.
+    """
+    with mock.patch(
+        f"{check_pages.__module__}.check_file_with_dependencies",
+        side_effect=check_file_with_dependencies,
+    ) as mock_check:
+        list(check_pages(pages, base_dir, manifest=manifest, full=full))
+    return [call.args[0].name for call in mock_check.call_args_list]
+
+
+def test_check_pages_with_manifest_rechecks_changed_pages(tmp_path: Path):
+    """
+    Test that only changed pages, and pages whose anchors link to changed
+    pages, are re-checked when using a manifest.
+    """
+    (tmp_path / "linking.html").write_text(
+        '<html><body><a href="/target#heading">Link</a></body></html>'
+    )
+    (tmp_path / "target.html").write_text(
+        '<html><body><h2 id="heading">Heading</h2></body></html>'
+    )
+    (tmp_path / "other.html").write_text("<html><body><p>Hi</p></body></html>")
+    pages = [
+        (tmp_path / name, None)
+        for name in ("linking.html", "target.html", "other.html")
+    ]
+
+    db_path = tmp_path / "manifest.sqlite"
+    with CheckManifest(db_path, "v1") as manifest:
+        assert _checked_pages(pages, tmp_path, manifest) == [
+            "linking.html",
+            "target.html",
+            "other.html",
+        ]
+    with CheckManifest(db_path, "v1") as manifest:
+        assert _checked_pages(pages, tmp_path, manifest) == []
+
+    (tmp_path / "target.html").write_text(
+        '<html><body><h2 id="renamed">Heading</h2></body></html>'
+    )
+    with CheckManifest(db_path, "v1") as manifest:
+        assert _checked_pages(pages, tmp_path, manifest) == [
+            "linking.html",
+            "target.html",
+        ]
+    with CheckManifest(db_path, "v1") as manifest:
+        assert len(_checked_pages(pages, tmp_path, manifest, full=True)) == 3
+    # A new checker version discards the recorded results
+    with CheckManifest(db_path, "v2") as manifest:
+        assert len(_checked_pages(pages, tmp_path, manifest)) == 3
+
+
+def test_check_pages_with_manifest_replays_issues(tmp_path: Path):
+    """
+    Test that fresh pages replay their recorded issues, and that a page is
+    re-checked once a missing asset it references is added.
+    """
+    file_path = tmp_path / "page.html"
+    file_path.write_text(
+        '<html><body><img src="/image.png"><p>Table: x</p></body></html>'
+    )
+    pages = [(file_path, None)]
+    db_path = tmp_path / "manifest.sqlite"
+
+    with CheckManifest(db_path, "v1") as manifest:
+        [(_, first_issues)] = check_pages(pages, tmp_path, manifest=manifest)
+    with CheckManifest(db_path, "v1") as manifest:
+        assert _checked_pages(pages, tmp_path, manifest) == []
+        [(_, replayed_issues)] = check_pages(pages, tmp_path, manifest=manifest)
+    assert replayed_issues == first_issues
+    missing_media_files = replayed_issues["missing_media_files"]
+    assert isinstance(missing_media_files, list)
+    assert len(missing_media_files) == 1
+
+    (tmp_path / "image.png").write_bytes(b"")
+    with CheckManifest(db_path, "v1") as manifest:
+        [(_, issues)] = check_pages(pages, tmp_path, manifest=manifest)
+    assert issues["missing_media_files"] == []
+    assert (
+        issues["problematic_paragraphs"]
+        == first_issues["problematic_paragraphs"]
+    )
+
+
+def test_checker_version_tracks_dependencies(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """
+    Test that the fingerprint changes with the parser library, bs4 and the
+    media extensions from compress.py.
+    """
+    module = sys.modules[checker_version.__module__]
+    versions = {checker_version("lxml")}
+
+    monkeypatch.setattr(module, "_html_parser_version", lambda parser: "0.0")
+    versions.add(checker_version("lxml"))
+
+    monkeypatch.setattr(module.bs4, "__version__", "0.0")
+    versions.add(checker_version("lxml"))
+
+    fake_compress = tmp_path / "compress.py"
+    fake_compress.write_text("ALLOWED_EXTENSIONS = ()")
+    monkeypatch.setattr(module.compress, "__file__", str(fake_compress))
+    versions.add(checker_version("lxml"))
+
+    assert len(versions) == 4
+
+
+def test_check_invalid_anchors_parses_each_target_once(tmp_path: Path):
+    """
+    Test that cross-page anchors are checked against an index, so the target
+    page is parsed only once no matter how often it is linked.
+    """
+    (tmp_path / "target.html").write_text(
+        '<html><body><h2 id="exists">Heading</h2></body></html>'
+    )
+    html = """
+    <html><body>
+        <a href="/target#exists">Valid</a>
+        <a href="/target#exists">Valid again</a>
+        <a href="./target.html#missing">Invalid</a>
+        <a href="/no-such-page#exists">Missing page</a>
+    </body></html>
+    """
+    soup = script_utils.parse_html(html)
+
+    with mock.patch.object(
+        script_utils,
+        "parse_html_file",
+        side_effect=script_utils.parse_html_file,
+    ) as mock_parse:
+        result = check_invalid_anchors(soup, tmp_path)
+        assert check_invalid_anchors(soup, tmp_path) == result
+
+    assert result == ["./target.html#missing", "/no-such-page#exists"]
+    assert mock_parse.call_count == 1
+
+
+class _RecordingCheck(PageCheck[List[str]]):
+    tags = frozenset({"p"})
+    classes = frozenset({"first", "second"})
+    visits_text = True
+
+    def __init__(self) -> None:
+        self.visited: List[str] = []
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        self.visited.append(f"<{tag.name}>")
+
+    def visit_text(self, text: NavigableString, context: WalkContext) -> None:
+        self.visited.append(text.strip())
+
+    def result(self) -> List[str]:
+        return self.visited
+
+
+def test_run_page_checks_dispatch():
+    """
+    Test that checks see the tags, classes and unskipped text nodes they
+    registered for, in document order.
+    """
+    html = """
+    <p>one</p>
+    <span class="first second">two</span>
+    <div class="no-formatting"><p>skipped <b>text</b></p></div>
+    <pre><span>also skipped</span></pre>
+    <div class="elvish-not">three</div>
+    """
+    soup = script_utils.parse_html(html)
+    check = _RecordingCheck()
+    results = run_page_checks(soup, {"recording": check})
+    assert results == {
+        "recording": ["<p>", "one", "<span>", "two", "<p>", "three"]
+    }
+
+
+class _ContextCheck(PageCheck[List[str]]):
+    tags = frozenset({"span"})
+    visits_text = True
+    visits_skipped_text = True
+
+    def __init__(self) -> None:
+        self.visited: List[str] = []
+
+    def visit_tag(self, tag: Tag, context: WalkContext) -> None:
+        self.visited.append(f"<{tag.name}> {_context_flags(context)}")
+
+    def visit_text(self, text: NavigableString, context: WalkContext) -> None:
+        self.visited.append(f"{text.strip()} {_context_flags(context)}")
+
+    def result(self) -> List[str]:
+        return self.visited
+
+
+def _context_flags(context: WalkContext) -> str:
+    return ",".join(flag for flag, value in context._asdict().items() if value)
+
+
+def test_run_page_checks_context():
+    """
+    Test that each node is visited with what is known about its ancestors,
+    not counting the node itself.
+    """
+    html = """
+    <div class="flowchart"><span>a</span></div>
+    <p><code><span>b</span></code></p>
+    """
+    soup = script_utils.parse_html(html)
+    results = run_page_checks(soup, {"context": _ContextCheck()})
+    assert results == {
+        "context": [
+            "<span> in_flowchart",
+            "a in_flowchart",
+            "<span> skipped,in_code,in_paragraph",
+            "b skipped,in_code,in_paragraph",
+        ]
+    }
+
+
+def test_page_check_requires_result():
+    """
+    Test that a check without a result cannot be created.
+    """
+
+    class NoResultCheck(PageCheck[List[str]]):
+        tags = frozenset({"p"})
+
+    with pytest.raises(TypeError):
+        NoResultCheck()  # type: ignore[abstract]
+
+
+def test_check_file_for_issues_matches_individual_checks(tmp_path: Path):
+    """
+    Test that running every check in one walk gives the same results as
+    running each check on its own.
+    """
+    file_path = tmp_path / "test.html"
+    file_path.write_text(
+        """
+    <html>
+    <head><meta name="description" content="Short"></head>
+    <body>
+        <a href="http://localhost:8000">Localhost</a>
+        <a href="#missing">Invalid Anchor</a>
+        <p id="dup">Table: **Bold** "quoted" -- text [^1]</p>
+        <p id="dup">Subtitle: unrendered</p>
+        <blockquote><p>! spoiler ></p></blockquote>
+        <p>word<em>emphasis</em>word</p>
+        <code>"quoted" -- <div></code>
+        <span class="katex-error">\\bad</span>
+    </body>
+    </html>
+    """
+    )
+    soup = script_utils.parse_html(file_path.read_text())
+    issues = check_file_for_issues(file_path, tmp_path, None)
+
+    assert issues["localhost_links"] == check_localhost_links(soup)
+    assert issues["invalid_anchors"] == check_invalid_anchors(soup, tmp_path)
+    assert issues["problematic_paragraphs"] == check_problematic_paragraphs(
+        soup
+    )
+    assert issues["trailing_blockquotes"] == check_blockquote_elements(soup)
+    assert issues["problematic_katex"] == check_katex_elements_for_errors(soup)
+    assert issues["unrendered_subtitles"] == check_unrendered_subtitles(soup)
+    assert issues["unrendered_footnotes"] == check_unrendered_footnotes(soup)
+    assert issues["missing_critical_css"] == (not check_critical_css(soup))
+    assert issues["duplicate_ids"] == check_duplicate_ids(soup)
+    assert issues["unrendered_spoilers"] == check_unrendered_spoilers(soup)
+    assert issues["unprocessed_quotes"] == check_unprocessed_quotes(soup)
+    assert issues["unprocessed_dashes"] == check_unprocessed_dashes(soup)
+    assert issues["unrendered_html"] == check_unrendered_html(soup)
+    assert issues["emphasis_spacing"] == check_emphasis_spacing(soup)
+    assert issues["long_description"] == check_description_length(soup)
+    assert all(
+        issues[name]
+        for name in (
+            "localhost_links",
+            "invalid_anchors",
+            "problematic_paragraphs",
+            "trailing_blockquotes",
+            "problematic_katex",
+            "unrendered_subtitles",
+            "unrendered_footnotes",
+            "duplicate_ids",
+            "unrendered_spoilers",
+            "unprocessed_quotes",
+            "unprocessed_dashes",
+            "emphasis_spacing",
+            "long_description",
+        )
+    )
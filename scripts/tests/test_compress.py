@@ -3,6 +3,7 @@ import subprocess
 import sys
 from io import StringIO
 from pathlib import Path
+from unittest import mock
 
 import pytest
 
@@ -235,3 +236,115 @@ def test_compress_gif_preserves_frame_rate(temp_dir: Path) -> None:
     assert (
         relative_error < 0.05
     ), f"Output frame rate ({output_fps}) differs significantly from input frame rate ({input_fps}). Relative error: {relative_error:.2%}"
+
+
+def test_compress_gif_uses_single_ffmpeg_pass(temp_dir: Path) -> None:
+    """
+    Test that GIF frames are piped straight to the encoder in one ffmpeg
+    process, at the detected frame rate.
+    """
+    input_file = temp_dir / "test.gif"
+    input_file.touch()
+    probe_output = json.dumps(
+        {"streams": [{"codec_type": "video", "avg_frame_rate": "15/1"}]}
+    )
+
+    with (
+        mock.patch.object(
+            compress.subprocess, "check_output", return_value=probe_output
+        ),
+        mock.patch.object(compress.subprocess, "run") as mock_run,
+    ):
+        compress._compress_gif(input_file)
+
+    assert mock_run.call_count == 1
+    command = mock_run.call_args.args[0]
+    assert command[:3] == ["ffmpeg", "-i", str(input_file)]
+    assert command[command.index("-vf") + 1] == (
+        "setpts=N/(15*TB),scale=trunc(iw/2)*2:trunc(ih/2)*2"
+    )
+    assert command[command.index("-r") + 1] == "15"
+    assert command[-1] == str(input_file.with_suffix(".mp4"))
+    assert list(temp_dir.iterdir()) == [input_file]
+
+
+def test_image_limits_threads(temp_dir: Path) -> None:
+    input_file: Path = temp_dir / "test.png"
+    input_file.touch()
+
+    with mock.patch.object(
+        compress.subprocess,
+        "run",
+        side_effect=lambda command, check: command[-1].touch(),
+    ) as mock_run:
+        compress.image(input_file, threads=2)
+
+    command = mock_run.call_args.args[0]
+    assert command[1:4] == ["-limit", "thread", "2"]
+
+
+@pytest.mark.parametrize(
+    "threads, expected",
+    [
+        (None, []),
+        (3, ["-threads", "3", "-x265-params", "pools=3"]),
+    ],
+)
+def test_x265_thread_args(threads, expected) -> None:
+    assert compress._x265_thread_args(threads) == expected
+
+
+def _fake_magick(command, check) -> None:
+    command[-1].write_bytes(b"avif of " + command[-4].read_bytes())
+
+
+def test_image_reuses_cached_conversion(temp_dir: Path) -> None:
+    first: Path = temp_dir / "first" / "test.png"
+    second: Path = temp_dir / "second" / "test.png"
+    for input_file in (first, second):
+        input_file.parent.mkdir()
+        input_file.write_bytes(b"same content")
+
+    with mock.patch.object(
+        compress.subprocess, "run", side_effect=_fake_magick
+    ) as mock_run:
+        compress.image(first)
+        compress.image(second)
+        assert mock_run.call_count == 1
+
+        # Different settings or content are converted again
+        second.with_suffix(".avif").unlink()
+        compress.image(second, quality=compress.IMAGE_QUALITY + 1)
+        assert mock_run.call_count == 2
+        second.with_suffix(".avif").unlink()
+        second.write_bytes(b"new content")
+        compress.image(second)
+        assert mock_run.call_count == 3
+
+    assert second.with_suffix(".avif").read_bytes() == b"avif of new content"
+    assert first.with_suffix(".avif").read_bytes() == b"avif of same content"
+
+
+def test_video_reuses_cached_conversion(temp_dir: Path) -> None:
+    video: Path = temp_dir / "test.mov"
+    video.write_bytes(b"video")
+
+    def fake_ffmpeg(command, check) -> None:
+        Path(command[-1]).write_bytes(b"hevc")
+
+    with (
+        mock.patch.object(
+            compress.subprocess, "check_output", return_value="h264\n"
+        ) as mock_probe,
+        mock.patch.object(
+            compress.subprocess, "run", side_effect=fake_ffmpeg
+        ) as mock_run,
+    ):
+        compress.to_hevc_video(video)
+        video.with_suffix(".mp4").unlink()
+        compress.to_hevc_video(video)
+
+    # The second conversion neither probes nor encodes
+    assert mock_probe.call_count == 1
+    assert mock_run.call_count == 1
+    assert video.with_suffix(".mp4").read_bytes() == b"hevc"
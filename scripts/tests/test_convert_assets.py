@@ -15,6 +15,7 @@ except ImportError:
 
 import re
 import subprocess
+import threading
 
 mock_r2_upload = mock.MagicMock()
 mock.patch.dict("sys.modules", {"r2_upload": mock_r2_upload}).start()
@@ -367,3 +368,166 @@ def test_path_pattern_variations(
         file_content = f.read()
 
     assert file_content.strip() == expected_content
+
+
+def _replace_sequentially(content: str, assets) -> str:
+    """
+    Apply each asset's replacement in turn, as converting them one at a time
+    would.
+    """
+    for asset in assets:
+        if asset.suffix in compress.ALLOWED_IMAGE_EXTENSIONS:
+            pattern, replacement = convert_assets._image_patterns(asset)
+        else:
+            pattern, replacement = convert_assets._video_patterns(asset)
+        content = re.sub(pattern, replacement, content)
+        content = re.sub(
+            r"</video>\s*(<br/?>)?\s*Figure:", "</video>\n\nFigure:", content
+        )
+    return content
+
+
+def test_replace_references_chained(tmp_path: Path) -> None:
+    """
+    Test that a reference created by one replacement is rewritten by a later
+    one, like when the replacements are applied one after another.
+    """
+    replacements = [
+        convert_assets.ReferenceReplacement(r"old\.gif", "new.mp4", "old.gif"),
+        convert_assets.ReferenceReplacement(
+            r"new\.mp4", "final.mp4", "new.mp4"
+        ),
+    ]
+    content_dir = tmp_path / "content"
+    content_dir.mkdir()
+    md_file = content_dir / "post.md"
+    md_file.write_text("![](old.gif)\n")
+
+    assert convert_assets.replace_references(replacements, content_dir) == [
+        md_file
+    ]
+    assert md_file.read_text() == "![](final.mp4)\n"
+
+
+def test_replace_references_single_pass(tmp_path: Path) -> None:
+    static_dir = tmp_path / "quartz" / "static"
+    assets = [
+        static_dir / "image.png",
+        static_dir / "a.mov",
+        static_dir / "data.mov",  # Also matched by a.mov's pattern
+        static_dir / "animation.gif",
+    ]
+    replacements = [
+        convert_assets._reference_replacement(asset) for asset in assets
+    ]
+
+    content_dir = tmp_path / "content"
+    content_dir.mkdir()
+    contents = {
+        "image.md": "![](./static/image.png)\n[[static/image.png]]\n",
+        "videos.md": (
+            '<video src="static/data.mov"/><br/>Figure: Data\n'
+            "![](static/a.mov)\n"
+            '<img src="static/animation.gif" alt="spin"/>\n'
+        ),
+        "untouched.md": "No assets here, just static/image.jpg\n",
+    }
+    for name, content in contents.items():
+        (content_dir / name).write_text(content)
+
+    with mock.patch("builtins.open", wraps=open) as mock_open:
+        changed_files = convert_assets.replace_references(
+            replacements, content_dir
+        )
+
+    assert sorted(path.name for path in changed_files) == [
+        "image.md",
+        "videos.md",
+    ]
+    opened = [
+        (Path(call.args[0]).name, call.args[1])
+        for call in mock_open.call_args_list
+    ]
+    assert sorted(opened) == [
+        ("image.md", "r"),
+        ("image.md", "w"),
+        ("untouched.md", "r"),
+        ("videos.md", "r"),
+        ("videos.md", "w"),
+    ]
+    for name, content in contents.items():
+        assert (content_dir / name).read_text() == _replace_sequentially(
+            content, assets
+        )
+
+
+def _fake_image_conversion(barrier=None):
+    def convert(image_path: Path, threads=None) -> None:
+        if barrier is not None:
+            barrier.wait(timeout=5)  # Fails unless conversions overlap
+        if image_path.stem == "broken":
+            raise RuntimeError("Error during conversion")
+        image_path.with_suffix(".avif").touch()
+
+    return convert
+
+
+def test_convert_asset_batch_converts_concurrently(tmp_path: Path) -> None:
+    static_dir = tmp_path / "quartz" / "static"
+    static_dir.mkdir(parents=True)
+    assets = [static_dir / "first.png", static_dir / "second.png"]
+    for asset in assets:
+        asset.touch()
+    content_dir = tmp_path / "content"
+    content_dir.mkdir()
+
+    barrier = threading.Barrier(len(assets))
+    with mock.patch.object(
+        compress, "image", side_effect=_fake_image_conversion(barrier)
+    ) as mock_image:
+        convert_assets.convert_asset_batch(
+            assets, md_references_dir=content_dir, jobs=2
+        )
+
+    assert all(asset.with_suffix(".avif").exists() for asset in assets)
+    for call in mock_image.call_args_list:
+        assert call.kwargs["threads"] == convert_assets.threads_per_job(2)
+
+
+def test_convert_asset_batch_skips_references_of_failed_conversions(
+    tmp_path: Path,
+) -> None:
+    static_dir = tmp_path / "quartz" / "static"
+    static_dir.mkdir(parents=True)
+    assets = [static_dir / "broken.png", static_dir / "fine.png"]
+    for asset in assets:
+        asset.touch()
+    content_dir = tmp_path / "content"
+    content_dir.mkdir()
+    md_file = content_dir / "post.md"
+    md_file.write_text("![](static/broken.png)\n![](static/fine.png)\n")
+
+    with mock.patch.object(
+        compress, "image", side_effect=_fake_image_conversion()
+    ):
+        with pytest.raises(RuntimeError, match="Error during conversion"):
+            convert_assets.convert_asset_batch(
+                assets,
+                remove_originals=True,
+                md_references_dir=content_dir,
+                jobs=2,
+            )
+
+    assert md_file.read_text() == (
+        "![](static/broken.png)\n![](static/fine.avif)\n"
+    )
+    assert (static_dir / "broken.png").exists()
+    assert not (static_dir / "fine.png").exists()
+
+
+@pytest.mark.parametrize(
+    "jobs, cpus, expected", [(1, 8, None), (2, 8, 4), (3, 8, 2), (16, 8, 1)]
+)
+def test_threads_per_job(jobs: int, cpus: int, expected) -> None:
+    with mock.patch.object(convert_assets.os, "cpu_count", return_value=cpus):
+        assert convert_assets.threads_per_job(jobs) == expected
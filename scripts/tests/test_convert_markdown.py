@@ -1,5 +1,6 @@
 import io
 import tempfile
+import threading
 import unittest.mock as mock
 from pathlib import Path
 
@@ -356,3 +357,268 @@ Content with AVIF card_image.
             convert_markdown_yaml.main()
 
     mock_process.assert_called_once_with(md_file)
+
+
+def _write_post(md_file: Path, card_image: str) -> None:
+    md_file.parent.mkdir(parents=True, exist_ok=True)
+    md_file.write_text(
+        f'---\ntitle: "Test Post"\ncard_image: {card_image}\n---\nContent\n'
+    )
+
+
+def _fake_download(url: str, output_path: Path) -> None:
+    if "broken" in url:
+        raise ValueError(f"Failed to download image: {url}")
+    output_path.write_bytes(b"image")
+
+
+def _fake_convert(input_path: Path, output_path: Path) -> None:
+    output_path.write_bytes(input_path.read_bytes())
+
+
+def _fake_upload(local_png_path: Path, verbose: bool = False) -> str:
+    return f"https://assets.turntrout.com/{local_png_path.name}"
+
+
+@pytest.fixture
+def mock_list_bucket_keys():
+    with mock.patch.object(
+        convert_markdown_yaml.r2_upload,
+        "list_bucket_keys",
+        return_value=set(),
+    ) as mocked:
+        yield mocked
+
+
+def test_process_card_images_pipelined(mock_git_root, mock_list_bucket_keys):
+    posts = {
+        mock_git_root / "content" / f"{name}.md": name
+        for name in ("first", "second")
+    }
+    for md_file, name in posts.items():
+        _write_post(md_file, f"http://example.com/{name}.avif")
+
+    with (
+        mock.patch.object(
+            convert_markdown_yaml, "_download_image", _fake_download
+        ),
+        mock.patch.object(
+            convert_markdown_yaml, "_convert_to_png", _fake_convert
+        ),
+        mock.patch.object(
+            convert_markdown_yaml.r2_upload, "upload_to_r2", _fake_upload
+        ),
+        mock.patch.object(
+            convert_markdown_yaml.r2_upload, "update_all_markdown_references"
+        ) as mock_update_references,
+        mock.patch.object(
+            convert_markdown_yaml.r2_upload, "move_if_requested"
+        ) as mock_move,
+    ):
+        convert_markdown_yaml.process_card_images_pipelined(list(posts), jobs=2)
+
+    card_images_dir = mock_git_root / "quartz" / "static" / "images"
+    card_images_dir /= "card_images"
+    expected_addresses = {
+        card_images_dir
+        / f"{name}.png": (f"https://assets.turntrout.com/{name}.png")
+        for name in posts.values()
+    }
+    mock_update_references.assert_called_once_with(
+        expected_addresses, references_dir=None, verbose=True
+    )
+    assert mock_move.call_count == 2
+    mock_list_bucket_keys.assert_called_once_with(
+        convert_markdown_yaml.r2_upload.R2_BUCKET_NAME
+    )
+    for md_file, name in posts.items():
+        assert (
+            f"card_image: https://assets.turntrout.com/{name}.png"
+            in md_file.read_text()
+        )
+
+
+def test_process_card_images_pipelined_overlaps_stages(
+    mock_git_root, mock_list_bucket_keys
+):
+    first, second = (
+        mock_git_root / "content" / f"{name}.md" for name in ("a", "b")
+    )
+    _write_post(first, "http://example.com/a.avif")
+    _write_post(second, "http://example.com/b.avif")
+    conversion_started = threading.Event()
+    overlapped: list[bool] = []
+
+    def download(url: str, output_path: Path) -> None:
+        if url.endswith("b.avif"):
+            # Only finishes promptly if "a" is converted meanwhile
+            overlapped.append(conversion_started.wait(timeout=5))
+        _fake_download(url, output_path)
+
+    def convert(input_path: Path, output_path: Path) -> None:
+        conversion_started.set()
+        _fake_convert(input_path, output_path)
+
+    with (
+        mock.patch.object(convert_markdown_yaml, "_download_image", download),
+        mock.patch.object(convert_markdown_yaml, "_convert_to_png", convert),
+        mock.patch.object(
+            convert_markdown_yaml.r2_upload, "upload_to_r2", _fake_upload
+        ),
+        mock.patch.object(
+            convert_markdown_yaml.r2_upload, "update_all_markdown_references"
+        ),
+        mock.patch.object(convert_markdown_yaml.r2_upload, "move_if_requested"),
+    ):
+        convert_markdown_yaml.process_card_images_pipelined(
+            [first, second], jobs=2
+        )
+
+    assert overlapped == [True]
+
+
+def test_process_card_images_pipelined_failure(
+    mock_git_root, mock_list_bucket_keys, capsys
+):
+    working = mock_git_root / "content" / "working.md"
+    broken = mock_git_root / "content" / "broken.md"
+    _write_post(working, "http://example.com/working.avif")
+    _write_post(broken, "http://example.com/broken.avif")
+    broken_content = broken.read_text()
+
+    with (
+        mock.patch.object(
+            convert_markdown_yaml, "_download_image", _fake_download
+        ),
+        mock.patch.object(
+            convert_markdown_yaml, "_convert_to_png", _fake_convert
+        ),
+        mock.patch.object(
+            convert_markdown_yaml.r2_upload, "upload_to_r2", _fake_upload
+        ),
+        mock.patch.object(
+            convert_markdown_yaml.r2_upload, "update_all_markdown_references"
+        ),
+        mock.patch.object(convert_markdown_yaml.r2_upload, "move_if_requested"),
+        pytest.raises(ValueError, match="broken.avif"),
+    ):
+        convert_markdown_yaml.process_card_images_pipelined(
+            [working, broken], jobs=2
+        )
+
+    assert "assets.turntrout.com/working.png" in working.read_text()
+    assert broken.read_text() == broken_content
+    assert (
+        "Failed to process http://example.com/broken.avif"
+        in capsys.readouterr().err
+    )
+
+
+def test_process_card_images_pipelined_shared_image(
+    mock_git_root, mock_list_bucket_keys
+):
+    """
+    Test that posts sharing a card image process it once and all get its URL.
+    """
+    posts = [mock_git_root / "content" / f"{name}.md" for name in "abc"]
+    for md_file in posts:
+        _write_post(md_file, "http://example.com/shared.avif")
+    downloads: list[str] = []
+
+    def download(url: str, output_path: Path) -> None:
+        downloads.append(url)
+        _fake_download(url, output_path)
+
+    def move(local_png_path: Path, move_to_dir, verbose=False) -> None:
+        local_png_path.unlink()  # Fails if the PNG is moved twice
+
+    with (
+        mock.patch.object(convert_markdown_yaml, "_download_image", download),
+        mock.patch.object(
+            convert_markdown_yaml, "_convert_to_png", _fake_convert
+        ),
+        mock.patch.object(
+            convert_markdown_yaml.r2_upload, "upload_to_r2", _fake_upload
+        ),
+        mock.patch.object(
+            convert_markdown_yaml.r2_upload, "update_all_markdown_references"
+        ),
+        mock.patch.object(
+            convert_markdown_yaml.r2_upload, "move_if_requested", move
+        ),
+    ):
+        convert_markdown_yaml.process_card_images_pipelined(posts, jobs=2)
+
+    assert downloads == ["http://example.com/shared.avif"]
+    for md_file in posts:
+        assert (
+            "card_image: https://assets.turntrout.com/shared.png"
+            in md_file.read_text()
+        )
+
+
+def test_process_card_images_pipelined_write_failure(
+    mock_git_root, mock_list_bucket_keys, capsys
+):
+    """
+    Test that a post which cannot be updated doesn't stop the others.
+    """
+    posts = [mock_git_root / "content" / f"{name}.md" for name in "ab"]
+    for md_file in posts:
+        _write_post(md_file, "http://example.com/shared.avif")
+    original_write = convert_markdown_yaml._write_card_image
+
+    def write(md_file: Path, card_image_url: str) -> None:
+        if md_file.name == "a.md":
+            raise OSError("Read-only file")
+        original_write(md_file, card_image_url)
+
+    with (
+        mock.patch.object(
+            convert_markdown_yaml, "_download_image", _fake_download
+        ),
+        mock.patch.object(
+            convert_markdown_yaml, "_convert_to_png", _fake_convert
+        ),
+        mock.patch.object(convert_markdown_yaml, "_write_card_image", write),
+        mock.patch.object(
+            convert_markdown_yaml.r2_upload, "upload_to_r2", _fake_upload
+        ),
+        mock.patch.object(
+            convert_markdown_yaml.r2_upload, "update_all_markdown_references"
+        ),
+        mock.patch.object(convert_markdown_yaml.r2_upload, "move_if_requested"),
+        pytest.raises(OSError, match="Read-only file"),
+    ):
+        convert_markdown_yaml.process_card_images_pipelined(posts, jobs=2)
+
+    assert "assets.turntrout.com/shared.png" in posts[1].read_text()
+    assert f"Failed to process {posts[0]}" in capsys.readouterr().err
+
+
+def test_main_pipelines_with_jobs(mock_git_root):
+    md_file = mock_git_root / "content" / "test.md"
+    _write_post(md_file, "http://example.com/static/image.avif")
+
+    with (
+        mock.patch(
+            "scripts.convert_markdown_yaml.process_card_images_pipelined"
+        ) as mock_pipelined,
+        mock.patch(
+            "scripts.convert_markdown_yaml.script_utils.get_files",
+            return_value=(md_file,),
+        ),
+        mock.patch(
+            "sys.argv",
+            [
+                "convert_markdown_yaml.py",
+                "-d",
+                str(mock_git_root / "content"),
+                "--jobs",
+                "4",
+            ],
+        ),
+    ):
+        convert_markdown_yaml.main()
+
+    mock_pipelined.assert_called_once_with((md_file,), 4)
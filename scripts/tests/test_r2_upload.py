@@ -1,6 +1,8 @@
+import hashlib
 import shutil
 import subprocess
 import tempfile
+import threading
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -113,6 +115,15 @@ def mock_rclone():
         yield mock_run
 
 
+@pytest.fixture(autouse=True)
+def clear_bucket_keys():
+    r2_upload._bucket_keys.clear()
+    r2_upload._bucket_hashes.clear()
+    yield
+    r2_upload._bucket_keys.clear()
+    r2_upload._bucket_hashes.clear()
+
+
 @pytest.fixture(autouse=True)
 def mock_home_directory(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
     r2_upload._home_directory = tmp_path
@@ -144,7 +155,7 @@ def test_upload_to_r2_success(mock_git_root: Path, r2_cleanup: list[str]):
     # Check that subprocess.run was called twice
     assert mock_run.call_count == 2
     # Check the first call (check_exists_on_r2)
-    assert mock_run.call_args_list[0][0][0][:2] == ["rclone", "ls"]
+    assert mock_run.call_args_list[0][0][0][:2] == ["rclone", "lsf"]
     # Check the second call (upload)
     assert mock_run.call_args_list[1][0][0][:2] == ["rclone", "copyto"]
     assert mock_run.call_args_list[1][0][0][2] == str(test_file)
@@ -454,7 +465,7 @@ def test_check_exists_on_r2_file_exists():
         result = r2_upload.check_exists_on_r2("r2:bucket/file.txt")
         assert result is True
         mock_run.assert_called_once_with(
-            ["rclone", "ls", "r2:bucket"],
+            ["rclone", "lsf", "--recursive", "--files-only", "r2:bucket"],
             capture_output=True,
             text=True,
             check=False,
@@ -467,7 +478,7 @@ def test_check_exists_on_r2_file_not_exists():
         result = r2_upload.check_exists_on_r2("r2:bucket/nonexistent.txt")
         assert result is False
         mock_run.assert_called_once_with(
-            ["rclone", "ls", "r2:bucket"],
+            ["rclone", "lsf", "--recursive", "--files-only", "r2:bucket"],
             capture_output=True,
             text=True,
             check=False,
@@ -697,3 +708,363 @@ def test_update_markdown_references_verbose_output(
     captured = capsys.readouterr()
     assert 'Changing "static/test.jpg" references to' in captured.out
     assert r2_address in captured.out
+
+
+def test_update_all_markdown_references_single_pass(
+    tmp_path: Path, mock_git_root: Path
+):
+    content_dir = tmp_path / "content"
+    content_dir.mkdir()
+    static_dir = mock_git_root / "quartz" / "static"
+    files = [
+        static_dir / "a.avif",
+        static_dir / "a.avif.mp4",
+        static_dir / "b.svg",
+    ]
+    r2_addresses = {
+        file: f"{r2_upload.R2_BASE_URL}/static/{file.name}" for file in files
+    }
+    contents = {
+        "both.md": '![](./static/a.avif)\n<video src="quartz/static/a.avif.mp4">',
+        "one.md": "![](/static/b.svg)",
+        "none.md": "![](static/c.avif)",
+    }
+    for name, content in contents.items():
+        (content_dir / name).write_text(content)
+
+    with patch("builtins.open", wraps=open) as mock_open:
+        changed_files = r2_upload.update_all_markdown_references(
+            r2_addresses, references_dir=content_dir
+        )
+
+    assert sorted(path.name for path in changed_files) == ["both.md", "one.md"]
+    written = [
+        Path(call.args[0]).name
+        for call in mock_open.call_args_list
+        if call.args[1] == "w"
+    ]
+    assert sorted(written) == ["both.md", "one.md"]
+    assert (content_dir / "both.md").read_text() == (
+        f"![]({r2_addresses[files[0]]})\n"
+        f'<video src="{r2_addresses[files[1]]}">'
+    )
+    assert (content_dir / "one.md").read_text() == (
+        f"![]({r2_addresses[files[2]]})"
+    )
+    assert (content_dir / "none.md").read_text() == contents["none.md"]
+
+
+def test_check_exists_on_r2_lists_bucket_once():
+    with patch("subprocess.run") as mock_run:
+        mock_run.return_value = MagicMock(
+            returncode=0, stdout="static/file.txt\nstatic/other.txt\n"
+        )
+        assert r2_upload.check_exists_on_r2("r2:bucket/static/file.txt")
+        assert r2_upload.check_exists_on_r2("r2:bucket/static/other.txt")
+        assert not r2_upload.check_exists_on_r2("r2:bucket/static/new.txt")
+        mock_run.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "key", ["file.txt", "static/file", "ile.txt", "static/file.txt.bak"]
+)
+def test_check_exists_on_r2_matches_exact_keys(key: str):
+    with patch("subprocess.run") as mock_run:
+        mock_run.return_value = MagicMock(
+            returncode=0, stdout="static/file.txt\n"
+        )
+        assert not r2_upload.check_exists_on_r2(f"r2:bucket/{key}")
+
+
+def test_check_exists_on_r2_retries_failed_listing():
+    with patch("subprocess.run") as mock_run:
+        mock_run.return_value = MagicMock(returncode=1, stdout="")
+        assert not r2_upload.check_exists_on_r2("r2:bucket/file.txt")
+        mock_run.return_value = MagicMock(returncode=0, stdout="file.txt\n")
+        assert r2_upload.check_exists_on_r2("r2:bucket/file.txt")
+        assert mock_run.call_count == 2
+
+
+def test_upload_to_r2_adds_key_to_listing(mock_git_root: Path):
+    test_file = mock_git_root / "quartz" / "static" / "new.jpg"
+    test_file.parent.mkdir(parents=True, exist_ok=True)
+    test_file.touch()
+
+    with patch("subprocess.run") as mock_run:
+        mock_run.return_value = MagicMock(returncode=0, stdout="")
+        r2_upload.upload_to_r2(test_file)
+        r2_upload.upload_to_r2(test_file)
+
+    # Listed once, uploaded once; the second upload finds the first
+    commands = [call.args[0][:2] for call in mock_run.call_args_list]
+    assert commands == [["rclone", "lsf"], ["rclone", "copyto"]]
+
+
+def _stub_rclone(command, **kwargs):
+    """
+    A stand-in for rclone which lists an empty bucket and fails to upload
+    files named "broken".
+    """
+    if command[1] == "copyto" and Path(command[2]).stem == "broken":
+        raise subprocess.CalledProcessError(1, command)
+    return MagicMock(returncode=0, stdout="")
+
+
+def test_upload_and_move_all_uploads_concurrently(mock_git_root: Path):
+    static_dir = mock_git_root / "quartz" / "static"
+    static_dir.mkdir(parents=True, exist_ok=True)
+    files = [static_dir / "first.avif", static_dir / "icon.svg"]
+    for file in files:
+        file.touch()
+
+    barrier = threading.Barrier(len(files))
+
+    def run(command, **kwargs):
+        if command[1] == "copyto":
+            barrier.wait(timeout=5)  # Fails unless uploads overlap
+        return _stub_rclone(command, **kwargs)
+
+    with patch("subprocess.run", side_effect=run) as mock_run:
+        r2_upload.upload_and_move_all(
+            files, references_dir=mock_git_root / "content", jobs=2
+        )
+
+    copy_commands = [
+        call.args[0]
+        for call in mock_run.call_args_list
+        if call.args[0][1] == "copyto"
+    ]
+    assert sorted(command[2] for command in copy_commands) == sorted(
+        str(file) for file in files
+    )
+    # The SVG keeps its content type
+    [svg_command] = [c for c in copy_commands if c[2].endswith(".svg")]
+    assert svg_command[-2:] == ["--metadata-set", "content-type=image/svg+xml"]
+    # The bucket is listed once for all the files
+    assert (
+        sum(call.args[0][1] == "lsf" for call in mock_run.call_args_list) == 1
+    )
+
+
+def test_upload_and_move_all_reports_each_failure(
+    mock_git_root: Path, capsys: pytest.CaptureFixture[str]
+):
+    static_dir = mock_git_root / "quartz" / "static"
+    static_dir.mkdir(parents=True, exist_ok=True)
+    files = [static_dir / "broken.avif", static_dir / "fine.avif"]
+    for file in files:
+        file.touch()
+    md_file = mock_git_root / "content" / "post.md"
+    md_file.parent.mkdir(parents=True, exist_ok=True)
+    md_file.write_text("![](static/broken.avif)\n![](static/fine.avif)\n")
+
+    with patch("subprocess.run", side_effect=_stub_rclone):
+        with pytest.raises(RuntimeError, match="Failed to upload file to R2"):
+            r2_upload.upload_and_move_all(
+                files, references_dir=md_file.parent, jobs=2
+            )
+
+    assert f"Failed to upload {files[0]}" in capsys.readouterr().err
+    assert md_file.read_text() == (
+        "![](static/broken.avif)\n"
+        f"![]({r2_upload.R2_BASE_URL}/static/fine.avif)\n"
+    )
+
+
+def _stub_bucket(files: dict[str, str]):
+    """
+    A stand-in for rclone whose bucket holds `files`, a mapping from each key
+    to its MD5 (empty if R2 does not report it).
+    """
+
+    def run(command, **kwargs):
+        if command[1] == "lsf":
+            return MagicMock(returncode=0, stdout="\n".join(files))
+        if command[1] == "md5sum":
+            lines = [f"{md5:32}  {key}" for key, md5 in files.items()]
+            return MagicMock(returncode=0, stdout="\n".join(lines))
+        return MagicMock(returncode=0, stdout="")
+
+    return run
+
+
+def _copied_files(mock_run: MagicMock) -> list[str]:
+    return [
+        Path(call.args[0][2]).name
+        for call in mock_run.call_args_list
+        if call.args[0][1] == "copyto"
+    ]
+
+
+def test_list_bucket_hashes_skips_missing_hashes():
+    bucket = {"static/a.avif": "0" * 32, "static/big.mp4": ""}
+    with patch("subprocess.run", side_effect=_stub_bucket(bucket)):
+        assert r2_upload.list_bucket_hashes("turntrout") == {
+            "static/a.avif": "0" * 32
+        }
+
+
+def test_upload_manifest_persists(tmp_path: Path):
+    db_path = tmp_path / ".cache" / "manifest.sqlite"
+    with r2_upload.UploadManifest(db_path) as manifest:
+        assert manifest.get("static/a.avif") is None
+        manifest.record("static/a.avif", 3, "abc")
+
+    with r2_upload.UploadManifest(db_path) as manifest:
+        assert manifest.get("static/a.avif") == (3, "abc")
+
+
+def test_upload_and_move_all_syncs_changed_files(
+    mock_git_root: Path, tmp_path: Path
+):
+    static_dir = mock_git_root / "quartz" / "static"
+    static_dir.mkdir(parents=True, exist_ok=True)
+    contents = {
+        "same.avif": b"same",
+        "changed.avif": b"new content",
+        "new.avif": b"new",
+        "in_manifest.avif": b"recorded",
+    }
+    for name, content in contents.items():
+        (static_dir / name).write_bytes(content)
+    files = [static_dir / name for name in contents]
+
+    bucket = {
+        "static/same.avif": hashlib.md5(b"same").hexdigest(),
+        "static/changed.avif": hashlib.md5(b"old content").hexdigest(),
+        # Multipart uploads have no MD5 on R2
+        "static/in_manifest.avif": "",
+    }
+    db_path = tmp_path / "manifest.sqlite"
+    with r2_upload.UploadManifest(db_path) as manifest:
+        manifest.record(
+            "static/in_manifest.avif", 8, hashlib.md5(b"recorded").hexdigest()
+        )
+        with patch(
+            "subprocess.run", side_effect=_stub_bucket(bucket)
+        ) as mock_run:
+            r2_upload.upload_and_move_all(
+                files,
+                references_dir=mock_git_root / "content",
+                manifest=manifest,
+            )
+
+        assert sorted(_copied_files(mock_run)) == ["changed.avif", "new.avif"]
+        for name, content in contents.items():
+            assert manifest.get(f"static/{name}") == (
+                len(content),
+                hashlib.md5(content).hexdigest(),
+            )
+
+
+def test_upload_and_move_all_sync_uses_manifest_before_r2_hashes(
+    mock_git_root: Path, tmp_path: Path
+):
+    file = mock_git_root / "quartz" / "static" / "a.avif"
+    file.parent.mkdir(parents=True, exist_ok=True)
+    file.write_bytes(b"content")
+
+    with r2_upload.UploadManifest(tmp_path / "manifest.sqlite") as manifest:
+        manifest.record("static/a.avif", 7, hashlib.md5(b"content").hexdigest())
+        with patch(
+            "subprocess.run",
+            side_effect=_stub_bucket({"static/a.avif": ""}),
+        ) as mock_run:
+            r2_upload.upload_and_move_all(
+                [file],
+                references_dir=mock_git_root / "content",
+                manifest=manifest,
+            )
+
+    commands = [call.args[0][1] for call in mock_run.call_args_list]
+    assert commands == ["lsf"]
+
+
+def test_upload_and_move_all_sync_hash_keys_skips_r2_hashes(
+    mock_git_root: Path, tmp_path: Path
+):
+    file = mock_git_root / "quartz" / "static" / "a.avif"
+    file.parent.mkdir(parents=True, exist_ok=True)
+    file.write_bytes(b"content")
+    hashed_key = r2_upload.get_upload_key(file, hash_keys=True)
+
+    with r2_upload.UploadManifest(tmp_path / "manifest.sqlite") as manifest:
+        with patch(
+            "subprocess.run", side_effect=_stub_bucket({hashed_key: ""})
+        ) as mock_run:
+            r2_upload.upload_and_move_all(
+                [file],
+                references_dir=mock_git_root / "content",
+                manifest=manifest,
+                hash_keys=True,
+            )
+
+    commands = [call.args[0][1] for call in mock_run.call_args_list]
+    assert commands == ["lsf"]
+
+
+def test_content_hashed_key(tmp_path: Path):
+    file = tmp_path / "foo.avif"
+    file.write_bytes(b"content")
+    content_hash = hashlib.md5(b"content").hexdigest()[:8]
+
+    assert (
+        r2_upload.content_hashed_key("static/images/foo.avif", file)
+        == f"static/images/foo.{content_hash}.avif"
+    )
+
+
+def test_upload_to_r2_hash_keys(mock_git_root: Path):
+    file = mock_git_root / "quartz" / "static" / "foo.avif"
+    file.parent.mkdir(parents=True, exist_ok=True)
+    file.write_bytes(b"content")
+    hashed_key = f"static/foo.{hashlib.md5(b'content').hexdigest()[:8]}.avif"
+
+    with patch("subprocess.run", side_effect=_stub_bucket({})) as mock_run:
+        url = r2_upload.upload_to_r2(file, hash_keys=True)
+
+    assert url == f"{r2_upload.R2_BASE_URL}/{hashed_key}"
+    [copy_command] = [
+        call.args[0]
+        for call in mock_run.call_args_list
+        if call.args[0][1] == "copyto"
+    ]
+    assert copy_command[3] == f"r2:{r2_upload.R2_BUCKET_NAME}/{hashed_key}"
+    assert copy_command[4:] == [
+        "--metadata-set",
+        f"cache-control={r2_upload.IMMUTABLE_CACHE_CONTROL}",
+    ]
+
+
+def test_upload_to_r2_hash_keys_skips_existing_content(mock_git_root: Path):
+    file = mock_git_root / "quartz" / "static" / "foo.avif"
+    file.parent.mkdir(parents=True, exist_ok=True)
+    file.write_bytes(b"content")
+    hashed_key = r2_upload.get_upload_key(file, hash_keys=True)
+
+    with patch(
+        "subprocess.run", side_effect=_stub_bucket({hashed_key: ""})
+    ) as mock_run:
+        url = r2_upload.upload_to_r2(file, hash_keys=True)
+
+    assert url == f"{r2_upload.R2_BASE_URL}/{hashed_key}"
+    assert _copied_files(mock_run) == []
+
+
+def test_upload_and_move_all_hash_keys_updates_references(
+    mock_git_root: Path,
+):
+    file = mock_git_root / "quartz" / "static" / "foo.avif"
+    file.parent.mkdir(parents=True, exist_ok=True)
+    file.write_bytes(b"content")
+    markdown = mock_git_root / "content" / "post.md"
+    markdown.parent.mkdir(parents=True, exist_ok=True)
+    markdown.write_text("![](static/foo.avif)")
+
+    with patch("subprocess.run", side_effect=_stub_bucket({})):
+        r2_upload.upload_and_move_all(
+            [file], references_dir=markdown.parent, hash_keys=True
+        )
+
+    hashed_key = r2_upload.get_upload_key(file, hash_keys=True)
+    assert markdown.read_text() == f"![]({r2_upload.R2_BASE_URL}/{hashed_key})"
@@ -2,6 +2,7 @@
 Test the utilities used for running the tests :)
 """
 
+import sqlite3
 import subprocess
 from pathlib import Path
 from typing import Optional
@@ -9,7 +10,7 @@ from unittest import mock
 
 import git
 import pytest
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 
 from .. import utils as script_utils
 
@@ -200,6 +201,41 @@ def test_get_files_gitignore(tmp_path):
         pytest.skip("Git not installed or not in PATH")
 
 
+def test_get_files_gitignore_single_subprocess(tmp_path):
+    """
+    Test that ignore checks for many files are batched into one git call.
+    """
+    try:
+        git.Repo.init(tmp_path)
+    except git.GitCommandError:
+        pytest.skip("Git not installed or not in PATH")
+
+    (tmp_path / ".gitignore").write_text("ignored/\n*.log.md\n")
+    expected_files = set()
+    for i in range(20):
+        kept = tmp_path / "kept" / f"file {i}.md"
+        kept.parent.mkdir(exist_ok=True)
+        kept.write_text("kept")
+        expected_files.add(kept)
+
+        ignored = tmp_path / "ignored" / f"file{i}.md"
+        ignored.parent.mkdir(exist_ok=True)
+        ignored.write_text("ignored")
+        (tmp_path / f"file{i}.log.md").write_text("ignored")
+
+    real_run = subprocess.run
+    with mock.patch.object(
+        script_utils.subprocess, "run", side_effect=real_run
+    ) as mock_run:
+        result = script_utils.get_files(dir_to_search=tmp_path)
+
+    assert set(result) == expected_files
+    check_ignore_calls = [
+        call for call in mock_run.call_args_list if "check-ignore" in call[0][0]
+    ]
+    assert len(check_ignore_calls) == 1
+
+
 def test_get_files_ignore_dirs(tmp_path):
     """
     Test that specified directories are ignored.
@@ -241,6 +277,60 @@ def test_get_files_ignore_dirs(tmp_path):
     assert result_paths == expected_paths
 
 
+def test_get_files_multiple_extensions_single_walk(tmp_path):
+    """
+    Test that every extension is matched in one walk, without descending into
+    ignored directories.
+    """
+    for rel_path in (
+        "a.png",
+        "b.jpg",
+        "nested/c.gif",
+        "nested/d.txt",
+        "skip/e.png",
+        "nested/skip/f.jpg",
+    ):
+        (tmp_path / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel_path).touch()
+
+    real_scandir = script_utils.os.scandir
+    with mock.patch.object(
+        script_utils.os, "scandir", side_effect=real_scandir
+    ) as mock_scandir:
+        result = script_utils.get_files(
+            dir_to_search=tmp_path,
+            filetypes_to_match=(".png", ".jpg", ".gif"),
+            use_git_ignore=False,
+            ignore_dirs=["skip"],
+        )
+
+    result_paths = {str(p.relative_to(tmp_path)) for p in result}
+    assert result_paths == {"a.png", "b.jpg", "nested/c.gif"}
+
+    scanned_dirs = {Path(call[0][0]) for call in mock_scandir.call_args_list}
+    assert scanned_dirs == {tmp_path, tmp_path / "nested"}
+
+
+def test_iter_files_is_lazy(tmp_path):
+    """
+    Test that iter_files yields files before the walk finishes.
+    """
+    for i in range(3):
+        (tmp_path / f"dir{i}").mkdir()
+        (tmp_path / f"dir{i}" / "file.md").touch()
+
+    real_scandir = script_utils.os.scandir
+    with mock.patch.object(
+        script_utils.os, "scandir", side_effect=real_scandir
+    ) as mock_scandir:
+        files = script_utils.iter_files(tmp_path, use_git_ignore=False)
+        first_file = next(files)
+        assert first_file.name == "file.md"
+        # Only the root and the first subdirectory have been scanned
+        assert mock_scandir.call_count == 2
+        assert len(list(files)) == 2
+
+
 @pytest.mark.parametrize(
     "md_contents,expected_map",
     [
@@ -482,6 +572,239 @@ title: "Extra Delimiter"
     assert result == expected_result
 
 
+def test_split_yaml_read_mode(tmp_path: Path) -> None:
+    """
+    Test that read mode parses the same values as round-trip mode, but into
+    plain Python objects.
+    """
+    md_file = tmp_path / "post.md"
+    md_file.write_text(
+        """---
+title: "Quoted Title"
+aliases: [first, second]
+permalink: /post
+---
+# Content"""
+    )
+
+    rt_metadata, rt_content = script_utils.split_yaml(md_file)
+    read_metadata, read_content = script_utils.split_yaml(md_file, mode="read")
+
+    assert read_metadata == rt_metadata
+    assert read_content == rt_content
+    assert type(read_metadata) is dict
+    assert type(read_metadata["title"]) is str
+    assert type(read_metadata["aliases"]) is list
+
+
+_INDEXED_POST = """---
+title: "Indexed Post"
+permalink: /indexed
+aliases: [old-indexed, other-indexed]
+tags: [test]
+date_published: 2024-01-02 03:04:05
+unindexed_key: ignored
+---
+# Content"""
+
+
+def test_frontmatter_index_returns_indexed_keys(tmp_path: Path) -> None:
+    """
+    Test that the index stores the indexed keys, with dates as strings.
+    """
+    md_file = tmp_path / "post.md"
+    md_file.write_text(_INDEXED_POST)
+
+    with script_utils.FrontmatterIndex(tmp_path / "index.sqlite") as index:
+        metadata = index.get(md_file)
+
+    assert metadata == {
+        "title": "Indexed Post",
+        "permalink": "/indexed",
+        "aliases": ["old-indexed", "other-indexed"],
+        "tags": ["test"],
+        "date_published": "2024-01-02T03:04:05",
+    }
+
+
+def test_frontmatter_index_skips_parsing_unchanged_files(
+    tmp_path: Path,
+) -> None:
+    """
+    Test that unchanged files are served from the index across runs, even if
+    only their mtime changed.
+    """
+    md_file = tmp_path / "post.md"
+    md_file.write_text(_INDEXED_POST)
+    db_path = tmp_path / ".cache" / "index.sqlite"
+
+    with script_utils.FrontmatterIndex(db_path) as index:
+        expected = index.get(md_file)
+
+    # Same content, new mtime
+    md_file.touch()
+    with (
+        mock.patch.object(script_utils, "split_yaml_content") as mock_split,
+        script_utils.FrontmatterIndex(db_path) as index,
+    ):
+        assert index.get(md_file) == expected
+        assert index.get(md_file) == expected
+        mock_split.assert_not_called()
+
+
+def test_frontmatter_index_reparses_changed_files(tmp_path: Path) -> None:
+    """
+    Test that modified files are re-parsed.
+    """
+    md_file = tmp_path / "post.md"
+    md_file.write_text(_INDEXED_POST)
+    db_path = tmp_path / "index.sqlite"
+
+    with script_utils.FrontmatterIndex(db_path) as index:
+        index.get(md_file)
+
+    md_file.write_text(_INDEXED_POST.replace("/indexed", "/changed"))
+    with script_utils.FrontmatterIndex(db_path) as index:
+        assert index.get(md_file)["permalink"] == "/changed"
+
+
+_PATCHABLE_POST = """---
+title: "Post: one"
+# Kept as is
+tags:
+- first
+- second
+description: >
+  Folded
+
+  description
+date_published: 01/02/2024
+---
+Body  with  odd   spacing ---
+  and --- markers
+"""
+
+
+def test_patch_frontmatter_rewrites_only_changed_keys(tmp_path: Path) -> None:
+    """
+    Test that only the patched entries change, and new keys are appended.
+    """
+    md_file = tmp_path / "post.md"
+    md_file.write_text(_PATCHABLE_POST)
+
+    assert script_utils.patch_frontmatter(
+        md_file,
+        {
+            "tags": ["only"],
+            "date_published": "2024-01-02",
+            "card_image": "https://assets.turntrout.com/card.png",
+        },
+    )
+
+    assert md_file.read_text() == _PATCHABLE_POST.replace(
+        "tags:\n- first\n- second\n", "tags:\n  - only\n"
+    ).replace(
+        "date_published: 01/02/2024\n",
+        "date_published: '2024-01-02'\n"
+        "card_image: https://assets.turntrout.com/card.png\n",
+    )
+
+
+def test_patch_frontmatter_replaces_multiline_value(tmp_path: Path) -> None:
+    md_file = tmp_path / "post.md"
+    md_file.write_text(_PATCHABLE_POST)
+
+    script_utils.patch_frontmatter(md_file, {"description": "Short"})
+
+    assert md_file.read_text() == _PATCHABLE_POST.replace(
+        "description: >\n  Folded\n\n  description\n", "description: Short\n"
+    )
+
+
+def test_patch_frontmatter_skips_unchanged_files(tmp_path: Path) -> None:
+    """
+    Test that the file is not rewritten when the patch changes nothing.
+    """
+    md_file = tmp_path / "post.md"
+    md_file.write_text(_PATCHABLE_POST)
+    mtime_ns = md_file.stat().st_mtime_ns
+
+    with mock.patch("os.replace") as mock_replace:
+        assert not script_utils.patch_frontmatter(
+            md_file, {"date_published": "01/02/2024"}
+        )
+    mock_replace.assert_not_called()
+    assert md_file.stat().st_mtime_ns == mtime_ns
+    assert md_file.read_text() == _PATCHABLE_POST
+
+
+def test_patch_frontmatter_empty_block(tmp_path: Path) -> None:
+    md_file = tmp_path / "post.md"
+    md_file.write_text("---\n---\nBody\n")
+
+    assert script_utils.patch_frontmatter(md_file, {"title": "New"})
+    assert md_file.read_text() == "---\ntitle: New\n---\nBody\n"
+    assert list(tmp_path.iterdir()) == [md_file]
+
+
+def test_patch_frontmatter_requires_frontmatter(tmp_path: Path) -> None:
+    md_file = tmp_path / "post.md"
+    md_file.write_text("No frontmatter\n---\n")
+
+    with pytest.raises(ValueError, match="No frontmatter"):
+        script_utils.patch_frontmatter(md_file, {"title": "New"})
+
+
+def test_frontmatter_index_has_frontmatter(tmp_path: Path) -> None:
+    """
+    Test that frontmatter without indexed keys is told apart from none.
+    """
+    unindexed = tmp_path / "unindexed.md"
+    unindexed.write_text("---\nfoo: bar\n---\nText\n")
+    missing = tmp_path / "missing.md"
+    missing.write_text("Text\n")
+    db_path = tmp_path / "index.sqlite"
+
+    for _ in range(2):  # Parsed, then from the index
+        with script_utils.FrontmatterIndex(db_path) as index:
+            assert index.get(unindexed) == {}
+            assert index.get(unindexed).has_frontmatter
+            assert not index.get(missing).has_frontmatter
+
+
+def test_frontmatter_index_prunes_missing_files(tmp_path: Path) -> None:
+    md_file = tmp_path / "post.md"
+    md_file.write_text(_INDEXED_POST)
+    db_path = tmp_path / "index.sqlite"
+    with script_utils.FrontmatterIndex(db_path) as index:
+        index.get(md_file)
+
+    md_file.unlink()
+    script_utils.FrontmatterIndex(db_path).close()
+
+    with sqlite3.connect(db_path) as connection:
+        assert connection.execute(
+            "SELECT COUNT(*) FROM frontmatter"
+        ).fetchone() == (0,)
+
+
+def test_build_permalink_map_and_aliases_with_index(tmp_path: Path) -> None:
+    """
+    Test that using an index gives the same results as parsing directly.
+    """
+    (tmp_path / "post.md").write_text(_INDEXED_POST)
+    (tmp_path / "no_front_matter.md").write_text("# No front matter")
+
+    with script_utils.FrontmatterIndex(tmp_path / "index.sqlite") as index:
+        for _ in range(2):
+            assert script_utils.build_html_to_md_map(
+                tmp_path, index
+            ) == script_utils.build_html_to_md_map(tmp_path)
+            assert script_utils.collect_aliases(
+                tmp_path, index
+            ) == script_utils.collect_aliases(tmp_path)
+
+
 def test_parse_html_file(tmp_path: Path) -> None:
     """
     Test parsing an HTML file into a BeautifulSoup object.
@@ -498,6 +821,42 @@ def test_parse_html_file(tmp_path: Path) -> None:
     assert soup.find("h1") is not None
 
 
+@pytest.mark.parametrize("parser", script_utils.HTML_PARSERS)
+def test_parse_html_file_with_parser(tmp_path: Path, parser) -> None:
+    """
+    Test that each installed parser backend builds an equivalent tree.
+    """
+    if not script_utils.html_parser_available(parser):
+        pytest.skip(f"{parser} is not installed")
+    test_file = tmp_path / "test.html"
+    test_file.write_text(
+        '<html><body><h1 id="title">Test</h1><p class="a b">Text</p>'
+        "</body></html>"
+    )
+
+    soup = script_utils.parse_html_file(test_file, parser)
+
+    heading = soup.find("h1", id="title")
+    assert isinstance(heading, Tag)
+    assert heading.get_text() == "Test"
+    paragraph = soup.find("p")
+    assert isinstance(paragraph, Tag)
+    assert paragraph["class"] == ["a", "b"]
+
+
+def test_resolve_html_parser_falls_back(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    """
+    Test that a missing parser backend falls back to html.parser.
+    """
+    monkeypatch.setattr(
+        script_utils, "html_parser_available", lambda parser: False
+    )
+    assert script_utils.resolve_html_parser("lxml") == "html.parser"
+    assert "lxml is not installed" in capsys.readouterr().err
+
+
 def test_is_redirect() -> None:
     """
     Test detection of redirect pages.
@@ -674,3 +1033,63 @@ def test_body_is_empty(html, expected):
     soup = BeautifulSoup(html, "html.parser")
     result = script_utils.body_is_empty(soup)
     assert result == expected
+
+
+def test_patch_frontmatter_crlf(tmp_path: Path) -> None:
+    """
+    Test that CRLF files are patched with CRLF line endings.
+    """
+    md_file = tmp_path / "post.md"
+    md_file.write_bytes(b"---\r\ntitle: x\r\ntags:\r\n- a\r\n---\r\nBody\r\n")
+
+    assert script_utils.patch_frontmatter(
+        md_file, {"tags": ["b"], "permalink": "/x"}
+    )
+    assert md_file.read_bytes() == (
+        b"---\r\ntitle: x\r\ntags:\r\n  - b\r\npermalink: /x\r\n---\r\nBody\r\n"
+    )
+
+
+def test_patch_frontmatter_leading_whitespace(tmp_path: Path) -> None:
+    md_file = tmp_path / "post.md"
+    md_file.write_text("\n---\ntitle: x\n---\nBody\n")
+
+    assert script_utils.patch_frontmatter(md_file, {"title": "y"})
+    assert md_file.read_text() == "\n---\ntitle: y\n---\nBody\n"
+
+
+@pytest.mark.parametrize(
+    "frontmatter",
+    ['"card_image": old\n', "title: [unclosed\n", "- a list\n"],
+)
+def test_patch_frontmatter_rejects_unlocatable_keys(
+    tmp_path: Path, frontmatter: str
+) -> None:
+    """
+    Test that frontmatter which can't be patched line by line is left alone,
+    instead of gaining a duplicate key.
+    """
+    md_file = tmp_path / "post.md"
+    content = f"---\n{frontmatter}---\nBody\n"
+    md_file.write_text(content)
+
+    with pytest.raises(ValueError):
+        script_utils.patch_frontmatter(md_file, {"card_image": "new"})
+    assert md_file.read_text() == content
+
+
+def test_patch_frontmatter_removes_temp_file_on_failure(
+    tmp_path: Path,
+) -> None:
+    md_file = tmp_path / "post.md"
+    md_file.write_text("---\ntitle: x\n---\nBody\n")
+
+    with (
+        mock.patch.object(
+            script_utils.os, "replace", side_effect=OSError("disk full")
+        ),
+        pytest.raises(OSError, match="disk full"),
+    ):
+        script_utils.patch_frontmatter(md_file, {"title": "y"})
+    assert list(tmp_path.iterdir()) == [md_file]
+    assert md_file.read_text() == "---\ntitle: x\n---\nBody\n"
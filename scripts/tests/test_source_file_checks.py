@@ -1,3 +1,4 @@
+import re
 import sys
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Tuple
@@ -15,6 +16,14 @@ else:
     from source_file_checks import *
 
 
+@pytest.fixture(autouse=True)
+def default_argv(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Run main() without the arguments given to pytest.
+    """
+    monkeypatch.setattr(sys, "argv", ["source_file_checks.py"])
+
+
 @pytest.fixture
 def valid_metadata() -> Dict[str, str | List[str]]:
     """
@@ -514,7 +523,7 @@ Another invalid: $\\tag{eq:test}$
     test_file.write_text(content)
 
     # Test direct function
-    errors = check_latex_tags(test_file)
+    errors = check_latex_tags(SourceFile.read(test_file))
     assert len(errors) == 2
     assert all("LaTeX \\tag{} found at line" in error for error in errors)
 
@@ -543,5 +552,218 @@ def test_latex_tags_variations(
     test_file = tmp_path / "test.md"
     test_file.write_text(content)
 
-    errors = check_latex_tags(test_file)
+    errors = check_latex_tags(SourceFile.read(test_file))
     assert len(errors) == expected_count
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["", "no newlines", "a\nb\n\nc", "\n\nstarts with newlines\n", "x\n" * 50],
+)
+def test_line_index_matches_counting(text: str) -> None:
+    line_index = LineIndex(text)
+    for offset in range(len(text) + 1):
+        assert line_index.line_number(offset) == text[:offset].count("\n") + 1
+
+
+def test_check_latex_tags_line_numbers(tmp_path: Path) -> None:
+    test_file = tmp_path / "test.md"
+    test_file.write_text("First\n\\tag{1}\n\nFourth \\tag{2}\n")
+
+    assert check_latex_tags(SourceFile.read(test_file)) == [
+        "LaTeX \\tag{} found at line 2",
+        "LaTeX \\tag{} found at line 4",
+    ]
+
+
+@pytest.mark.parametrize("use_index", [False, True])
+def test_source_file_reads_once(
+    tmp_path: Path, monkeypatch, use_index: bool
+) -> None:
+    """
+    Test that every check shares one read of the file, including the
+    frontmatter index parsing it on a miss.
+    """
+    test_file = tmp_path / "test.md"
+    test_file.write_text(
+        "---\r\ntitle: Test\r\n---\r\n[Link](page.md) and \\tag{1}\r\n"
+    )
+    reads: List[Path] = []
+    for method in ("read_text", "read_bytes"):
+        original = getattr(Path, method)
+
+        def read(path: Path, *args, original=original, **kwargs):
+            reads.append(path)
+            return original(path, *args, **kwargs)
+
+        monkeypatch.setattr(Path, method, read)
+
+    with script_utils.FrontmatterIndex(tmp_path / "index.sqlite") as index:
+        source = SourceFile.read(test_file, index if use_index else None)
+        issues = check_file_data(source, {})
+
+    assert reads == [test_file]
+    assert source.metadata == {"title": "Test"}
+    assert source.text == (
+        "---\ntitle: Test\n---\n[Link](page.md) and \\tag{1}\n"
+    )
+    assert issues["invalid_links"] == [
+        "Invalid markdown link at line 4: ](page.md)"
+    ]
+    assert issues["latex_tags"] == ["LaTeX \\tag{} found at line 4"]
+
+
+def test_source_check_registry(tmp_path: Path, monkeypatch) -> None:
+    """
+    Test that registered checks run on each source file.
+    """
+    monkeypatch.setattr(
+        sys.modules[check_file_data.__module__],
+        "SOURCE_CHECKS",
+        dict(SOURCE_CHECKS),
+    )
+
+    @source_check("todo")
+    def check_todo(source: SourceFile) -> List[str]:
+        return [
+            f"TODO at line {source.line_index.line_number(match.start())}"
+            for match in re.finditer("TODO", source.text)
+        ]
+
+    source = SourceFile(tmp_path / "test.md", "---\n---\nText\nTODO\n")
+    issues = check_file_data(source, {})
+
+    assert list(issues) == [
+        "required_fields",
+        "invalid_links",
+        "latex_tags",
+        "todo",
+    ]
+    assert issues["todo"] == ["TODO at line 4"]
+
+
+def _commit_posts(repo_dir: Path, posts: Dict[str, str]) -> git.Repo:
+    repo = git.Repo.init(repo_dir)
+    content_dir = repo_dir / "content"
+    content_dir.mkdir(exist_ok=True)
+    for name, permalink in posts.items():
+        (content_dir / name).write_text(
+            f"---\ntitle: {name}\ndescription: Test\ntags: [test]\n"
+            f"permalink: {permalink}\n---\nText\n"
+        )
+    repo.index.add([f"content/{name}" for name in posts])
+    repo.index.commit("Add posts")
+    return repo
+
+
+def test_get_changed_files(tmp_path: Path) -> None:
+    repo = _commit_posts(tmp_path, {"a.md": "/a", "b.md": "/b"})
+    content_dir = tmp_path / "content"
+    (content_dir / "a.md").write_text("changed")
+    (content_dir / "new.md").write_text("new")
+    repo.index.add(["content/new.md"])
+    (content_dir / "b.md").unlink()
+
+    assert get_changed_files(tmp_path) == {
+        (content_dir / "a.md").resolve(),
+        (content_dir / "new.md").resolve(),
+    }
+
+
+def test_main_changed_only(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys
+) -> None:
+    """
+    Test that only changed files are checked, but their URLs are still
+    compared with every other file's.
+    """
+    _commit_posts(
+        tmp_path,
+        {"a.md": "/a", "b.md": "/b", "unchanged.md": "/b"},
+    )
+    content_dir = tmp_path / "content"
+    (content_dir / "a.md").write_text(
+        (content_dir / "a.md").read_text().replace("/a", "/b") + "[bad](link)\n"
+    )
+    monkeypatch.setattr(
+        script_utils, "get_git_root", lambda *args, **kwargs: tmp_path
+    )
+    monkeypatch.setattr(
+        sys, "argv", ["source_file_checks.py", "--changed-only"]
+    )
+    checked: List[Path] = []
+    original_read = Path.read_text
+
+    def read_text(path: Path, *args, **kwargs) -> str:
+        checked.append(path)
+        return original_read(path, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", read_text)
+
+    with pytest.raises(SystemExit, match="1"):
+        main()
+
+    output = capsys.readouterr().out
+    assert "Issues found in content/a.md" in output
+    assert "URL '/b' already used in:" in output
+    assert "Invalid markdown link at line 8" in output
+    # The unchanged duplicate was not reported, and only a.md was read
+    assert "Issues found in content/b.md" not in output
+    assert "Issues found in content/unchanged.md" not in output
+    assert checked == [content_dir / "a.md"]
+
+
+def test_main_changed_only_no_changes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    _commit_posts(tmp_path, {"a.md": "/a"})
+    monkeypatch.setattr(
+        script_utils, "get_git_root", lambda *args, **kwargs: tmp_path
+    )
+    monkeypatch.setattr(
+        sys, "argv", ["source_file_checks.py", "--changed-only"]
+    )
+
+    main()  # Neither the posts nor the fonts are checked
+
+
+def test_check_source_files_in_processes(tmp_path: Path) -> None:
+    metadata_by_file = {}
+    for index in range(4):
+        file_path = tmp_path / f"post{index}.md"
+        file_path.write_text(f"---\ntitle: Post\n---\n" + "\\tag{1}\n" * index)
+        metadata_by_file[file_path] = {"title": "Post"}
+
+    serial = list(check_source_files(metadata_by_file, jobs=1))
+    parallel = list(check_source_files(metadata_by_file, jobs=2))
+
+    assert parallel == serial
+    assert [len(issues["latex_tags"]) for issues in parallel] == [0, 1, 2, 3]
+
+
+def test_main_frontmatter_without_indexed_keys(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys
+) -> None:
+    """
+    Test that frontmatter with only unindexed keys reports missing fields.
+    """
+    content_dir = tmp_path / "content"
+    content_dir.mkdir()
+    git.Repo.init(tmp_path)
+    (content_dir / "post.md").write_text("---\nfoo: bar\n---\nText\n")
+    monkeypatch.setattr(
+        script_utils, "get_git_root", lambda *args, **kwargs: tmp_path
+    )
+    monkeypatch.setattr(
+        sys.modules[main.__module__],
+        "check_scss_font_files",
+        lambda *args: [],
+    )
+
+    for _ in range(2):  # Parsed, then from the frontmatter index
+        with pytest.raises(SystemExit):
+            main()
+        output = capsys.readouterr().out
+        assert "No valid frontmatter found" not in output
+        for field in ("title", "description", "tags", "permalink"):
+            assert f"Missing {field} field" in output
@@ -609,3 +609,88 @@ def test_git_modified_date_update(temp_content_dir, mock_git):
         metadata = yaml.safe_load(f.read().split("---")[1])
     assert metadata["date_published"] == "01/01/2023"
     assert metadata["date_updated"] == "02/01/2024"
+
+
+def test_get_modified_files(mock_git_commands, mock_git_root):
+    with patch(
+        "subprocess.check_output",
+        side_effect=mock_git_commands(has_changes=True),
+    ) as mock_check_output:
+        modified = update_lib.get_modified_files(
+            Path(mock_git_root) / "content"
+        )
+
+    assert modified == {Path(mock_git_root) / "content" / "test.md"}
+    mock_check_output.assert_called_with(
+        ["git", "diff", "--name-only", "origin/main..HEAD", "--", "content"],
+        text=True,
+    )
+
+
+def test_main_queries_git_once(temp_content_dir, mock_datetime, mock_git):
+    for index in range(5):
+        create_md_file(
+            temp_content_dir,
+            f"post{index}.md",
+            {"title": f"Post {index}", "date_published": "01/01/2024"},
+        )
+
+    with patch(
+        "subprocess.check_output", side_effect=mock_git(["post3.md"])
+    ) as mock_check_output:
+        update_lib.main(temp_content_dir)
+
+    assert mock_check_output.call_count == 2  # rev-parse and diff
+    for index in range(5):
+        text = (temp_content_dir / f"post{index}.md").read_text()
+        metadata = yaml.safe_load(text.split("---")[1])
+        expected = datetime(2024, 2, 1) if index == 3 else datetime(2024, 1, 1)
+        assert metadata["date_updated"] == expected
+
+
+def test_main_patches_only_date_lines(
+    temp_content_dir, mock_datetime, mock_git
+):
+    post = temp_content_dir / "post.md"
+    post.write_text(
+        '---\ntitle:   "Spaced"\ndate_published: 01/01/2024\n---\n'
+        "Body  kept\n\n---\n"
+    )
+    current = temp_content_dir / "current.md"
+    current.write_text(
+        "---\ndate_published: 2024-01-01 00:00:00\n"
+        "date_updated: 2024-01-01 00:00:00\n---\nBody\n"
+    )
+    current_mtime_ns = current.stat().st_mtime_ns
+
+    with patch("subprocess.check_output", side_effect=mock_git()):
+        update_lib.main(temp_content_dir)
+
+    assert post.read_text() == (
+        '---\ntitle:   "Spaced"\ndate_published: 2024-01-01 00:00:00\n'
+        "date_updated: 2024-01-01 00:00:00\n---\nBody  kept\n\n---\n"
+    )
+    assert current.stat().st_mtime_ns == current_mtime_ns
+
+
+def test_main_crlf_and_fallback(temp_content_dir, mock_datetime, mock_git):
+    """
+    Test that CRLF posts are patched, and that posts the patcher can't edit
+    are rewritten in full instead of stopping the run.
+    """
+    crlf_post = temp_content_dir / "crlf.md"
+    crlf_post.write_bytes(b"---\r\ntitle: CRLF\r\n---\r\nBody\r\n")
+    odd_post = temp_content_dir / "odd.md"
+    odd_post.write_text("Preamble ---\ntitle: Odd\n---\nBody\n")
+
+    with patch("subprocess.check_output", side_effect=mock_git()):
+        update_lib.main(temp_content_dir)
+
+    assert crlf_post.read_bytes() == (
+        b"---\r\ntitle: CRLF\r\ndate_published: 2024-02-01 00:00:00\r\n"
+        b"date_updated: 2024-02-01 00:00:00\r\n---\r\nBody\r\n"
+    )
+    metadata, body = script_utils.split_yaml(odd_post)
+    assert metadata["title"] == "Odd"
+    assert metadata["date_published"] == datetime(2024, 2, 1)
+    assert body.strip() == "Body"
@@ -32,33 +32,62 @@ current_date = TimeStamp(
 )
 
 
-def is_file_modified(file_path: Path) -> bool:
+def get_modified_files(path: Path) -> set[Path]:
     """
-    Check if file has unpushed changes in git.
+    Get the files under a path which have unpushed changes in git, using a
+    single `git diff` for the whole path.
 
     Args:
-        file_path (Path): Path to the file to check
+        path (Path): File or directory to check
 
     Returns:
-        bool: True if file has unpushed changes, False otherwise
+        set[Path]: Resolved paths of the files with unpushed changes, or an
+        empty set if git could not be queried
+
+    Raises:
+        ValueError: If the path is outside the git repository
     """
     try:
         # Get the relative path from git root
         git_root = subprocess.check_output(
             ["git", "rev-parse", "--show-toplevel"], text=True
         ).strip()
-        rel_path = file_path.resolve().relative_to(Path(git_root))
+        rel_path = path.resolve().relative_to(Path(git_root))
 
         # Check for unpushed changes
         result = subprocess.check_output(
-            ["git", "diff", "--name-only", "origin/main..HEAD", str(rel_path)],
+            [
+                "git",
+                "diff",
+                "--name-only",
+                "origin/main..HEAD",
+                "--",
+                str(rel_path),
+            ],
             text=True,
-        ).strip()
-
-        return bool(result)
+        )
     except subprocess.CalledProcessError:
-        print(f"Warning: Could not check git status for {file_path}")
-        return False
+        print(f"Warning: Could not check git status for {path}")
+        return set()
+
+    return {
+        (Path(git_root) / line).resolve()
+        for line in result.splitlines()
+        if line.strip()
+    }
+
+
+def is_file_modified(file_path: Path) -> bool:
+    """
+    Check if file has unpushed changes in git.
+
+    Args:
+        file_path (Path): Path to the file to check
+
+    Returns:
+        bool: True if file has unpushed changes, False otherwise
+    """
+    return file_path.resolve() in get_modified_files(file_path)
 
 
 def maybe_convert_to_timestamp(value: str | datetime | TimeStamp) -> TimeStamp:
@@ -109,7 +138,8 @@ def update_publish_date(yaml_metadata: dict) -> None:
 
 def write_to_yaml(file_path: Path, metadata: dict, content: str) -> None:
     """
-    Write updated metadata to a markdown file.
+    Write updated metadata to a markdown file, re-dumping all of it. Used as
+    the fallback for files whose frontmatter `patch_frontmatter` can't edit.
     """
     # Use StringIO to capture the YAML dump with preserved formatting
     stream = io.StringIO()
@@ -135,6 +165,7 @@ def main(content_dir: Path | None = None) -> None:
     if content_dir is None:
         content_dir = Path("content")
 
+    modified_files = get_modified_files(content_dir)
     for md_file_path in content_dir.glob("*.md"):
         metadata, content = script_utils.split_yaml(md_file_path)
         if not metadata and not content:
@@ -145,16 +176,31 @@ def main(content_dir: Path | None = None) -> None:
         update_publish_date(metadata)
 
         # # Check for unpushed changes and update date_updated if needed
-        if is_file_modified(md_file_path):
+        if md_file_path.resolve() in modified_files:
             metadata["date_updated"] = current_date
 
         # Ensure that date fields are timestamps
-        for key in ("date_published", "date_updated"):
+        date_keys = ("date_published", "date_updated")
+        for key in date_keys:
             metadata[key] = maybe_convert_to_timestamp(metadata[key])
 
-        if metadata != original_metadata:
-            print(f"Updated date information on {md_file_path}")
+        # Only rewrite the changed date lines, leaving the rest of the file
+        updates = {
+            key: metadata[key]
+            for key in date_keys
+            if key not in original_metadata
+            or original_metadata[key] != metadata[key]
+        }
+        if not updates:
+            continue
+        try:
+            changed = script_utils.patch_frontmatter(md_file_path, updates)
+        except ValueError:
+            # Frontmatter the patcher can't locate is rewritten in full
             write_to_yaml(md_file_path, metadata, content)
+            changed = True
+        if changed:
+            print(f"Updated date information on {md_file_path}")
 
 
 if __name__ == "__main__":
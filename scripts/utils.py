@@ -2,11 +2,30 @@
 Utility functions for scripts/ directory.
 """
 
+import datetime
+import functools
+import hashlib
+import importlib
+import io
+import json
+import os
+import re
+import sqlite3
 import subprocess
+import sys
+import tempfile
 from pathlib import Path
-from typing import Collection, Dict, Optional, Set
+from typing import (
+    Collection,
+    Dict,
+    Iterator,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    get_args,
+)
 
-import git
 from bs4 import BeautifulSoup, Tag
 from ruamel.yaml import YAML, YAMLError
 
@@ -36,6 +55,135 @@ def get_git_root(starting_dir: Optional[Path] = None) -> Path:
     raise RuntimeError("Failed to get Git root")
 
 
+def _git_ignored_files(root: Path, files: Collection[Path]) -> Set[Path]:
+    """
+    Return the subset of files which Git ignores, using a single batched
+    `git check-ignore --stdin` call instead of one subprocess per file.
+
+    Raises:
+        ValueError: If a file is not within the Git root.
+        RuntimeError: If `git check-ignore` fails.
+    """
+    if not files:
+        return set()
+
+    relative_to_file = {
+        file.relative_to(root).as_posix(): file for file in files
+    }
+    completed_process = subprocess.run(
+        ["git", "check-ignore", "--stdin", "-z"],
+        input="\0".join(relative_to_file) + "\0",
+        capture_output=True,
+        text=True,
+        check=False,
+        cwd=root,
+    )
+    # Exit code 1 means that none of the files are ignored
+    if completed_process.returncode not in (0, 1):
+        raise RuntimeError(
+            f"git check-ignore failed: {completed_process.stderr.strip()}"
+        )
+
+    return {
+        relative_to_file[rel_file]
+        for rel_file in completed_process.stdout.split("\0")
+        if rel_file in relative_to_file
+    }
+
+
+def _walk_matching_files(
+    dir_to_search: Path,
+    suffixes: tuple[str, ...],
+    ignore_dirs: Collection[str],
+) -> Iterator[Path]:
+    """
+    Walk `dir_to_search` once with `os.scandir`, yielding every entry whose
+    name ends with one of `suffixes`. Directories named in `ignore_dirs` are
+    pruned before being descended into. Like `Path.rglob`, symlinked
+    directories are not followed.
+    """
+    if not suffixes or not dir_to_search.is_dir():
+        return
+
+    dirs_to_visit = [str(dir_to_search)]
+    while dirs_to_visit:
+        try:
+            with os.scandir(dirs_to_visit.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if not entry.is_symlink() and (
+                            entry.name not in ignore_dirs
+                        ):
+                            dirs_to_visit.append(entry.path)
+                    elif entry.name.endswith(suffixes):
+                        yield Path(entry.path)
+        except PermissionError:
+            continue
+
+
+# Number of walked files to check against .gitignore per `git check-ignore`
+_GIT_IGNORE_BATCH_SIZE = 512
+
+
+def iter_files(
+    dir_to_search: Optional[Path] = None,
+    filetypes_to_match: Collection[str] = (".md",),
+    use_git_ignore: bool = True,
+    ignore_dirs: Optional[Collection[str]] = None,
+) -> Iterator[Path]:
+    """
+    Lazily yields all files in the specified directory of the Git repository,
+    so that callers can start working before the walk finishes.
+
+    The directory is walked once regardless of how many file types are
+    requested. When filtering with .gitignore, files are checked in batches.
+
+    Args:
+        dir_to_search: A directory to search for files.
+        filetypes_to_match: A collection of file types to search for.
+        use_git_ignore: Whether to exclude files based on .gitignore.
+        ignore_dirs: Directory names to ignore.
+
+    Yields:
+        Path: Each matching file.
+    """
+    if dir_to_search is None:
+        return
+
+    files = _walk_matching_files(
+        dir_to_search,
+        tuple(filetypes_to_match),
+        frozenset(ignore_dirs or ()),
+    )
+    if not use_git_ignore:
+        yield from files
+        return
+
+    try:
+        root = get_git_root(starting_dir=dir_to_search)
+    except (RuntimeError, subprocess.CalledProcessError):
+        # If Git operations fail, continue without Git filtering
+        yield from files
+        return
+
+    batch: list[Path] = []
+    for file in files:
+        batch.append(file)
+        if len(batch) >= _GIT_IGNORE_BATCH_SIZE:
+            yield from _filter_git_ignored(root, batch)
+            batch = []
+    yield from _filter_git_ignored(root, batch)
+
+
+def _filter_git_ignored(root: Path, files: list[Path]) -> list[Path]:
+    try:
+        ignored = _git_ignored_files(root, files)
+    except (ValueError, RuntimeError):
+        # If Git operations fail, continue without Git filtering
+        return files
+    return [file for file in files if file not in ignored]
+
+
 def get_files(
     dir_to_search: Optional[Path] = None,
     filetypes_to_match: Collection[str] = (".md",),
@@ -55,40 +203,14 @@ def get_files(
     Returns:
         tuple[Path, ...]: A tuple of all matching files.
     """
-    files: list[Path] = []
-    if dir_to_search is not None:
-        for filetype in filetypes_to_match:
-            files.extend(dir_to_search.rglob(f"*{filetype}"))
-
-        # Filter out ignored directories
-        if ignore_dirs:
-            files = [
-                f
-                for f in files
-                if not any(ignore_dir in f.parts for ignore_dir in ignore_dirs)
-            ]
-
-        if use_git_ignore:
-            try:
-                root = get_git_root(starting_dir=dir_to_search)
-                repo = git.Repo(root)
-                # Convert file paths to paths relative to the git root
-                relative_files = [file.relative_to(root) for file in files]
-                # Filter out ignored files
-                files = [
-                    file
-                    for file, rel_file in zip(files, relative_files)
-                    if not repo.ignored(rel_file)
-                ]
-            except (
-                git.GitCommandError,
-                ValueError,
-                RuntimeError,
-                subprocess.CalledProcessError,
-            ):
-                # If Git operations fail, continue without Git filtering
-                pass
-    return tuple(files)
+    return tuple(
+        iter_files(
+            dir_to_search,
+            filetypes_to_match=filetypes_to_match,
+            use_git_ignore=use_git_ignore,
+            ignore_dirs=ignore_dirs,
+        )
+    )
 
 
 def path_relative_to_quartz_parent(input_file: Path) -> Path:
@@ -115,25 +237,49 @@ def path_relative_to_quartz_parent(input_file: Path) -> Path:
         raise ValueError("The path must be within a 'quartz' directory.") from e
 
 
-def split_yaml(file_path: Path, verbose: bool = False) -> tuple[dict, str]:
+# 'rt' means round-trip, preserving comments and formatting
+_round_trip_yaml = YAML(typ="rt")
+_round_trip_yaml.preserve_quotes = True  # Preserve quote style
+
+# 'safe' uses the C-accelerated loader when ruamel.yaml.clib is installed
+_read_only_yaml = YAML(typ="safe")
+
+YamlMode = Literal["rt", "read"]
+
+
+def split_yaml(
+    file_path: Path, verbose: bool = False, mode: YamlMode = "rt"
+) -> tuple[dict, str]:
     """
     Split a markdown file into its YAML frontmatter and content.
 
     Args:
         file_path: Path to the markdown file
         verbose: Whether to print error messages
+        mode: "rt" to parse round-trip, preserving formatting so the metadata
+            can be written back. "read" for much faster parsing into plain
+            Python objects, for callers that only read the metadata.
 
     Returns:
         Tuple of (metadata dict, content string)
     """
-    yaml = YAML(
-        typ="rt"
-    )  # 'rt' means round-trip, preserving comments and formatting
-    yaml.preserve_quotes = True  # Preserve quote style
-
     with file_path.open("r", encoding="utf-8") as f:
         content = f.read()
 
+    return split_yaml_content(content, file_path, verbose, mode)
+
+
+def split_yaml_content(
+    content: str,
+    file_path: Path,
+    verbose: bool = False,
+    mode: YamlMode = "rt",
+) -> tuple[dict, str]:
+    """
+    Like `split_yaml`, but for markdown content which was already read.
+    """
+    yaml = _read_only_yaml if mode == "read" else _round_trip_yaml
+
     # Split frontmatter and content
     parts = content.split("---", 2)
     if len(parts) < 3:
@@ -153,13 +299,317 @@ def split_yaml(file_path: Path, verbose: bool = False) -> tuple[dict, str]:
     return metadata, parts[2]
 
 
-def build_html_to_md_map(md_dir: Path) -> Dict[str, Path]:
+# Renders patched frontmatter entries in the style of the markdown files
+_frontmatter_writer = YAML(typ="rt")
+_frontmatter_writer.preserve_quotes = True
+_frontmatter_writer.indent(mapping=2, sequence=2, offset=2)
+
+# Like `split_yaml`, allows whitespace before the block and CRLF line endings
+_FRONTMATTER_BLOCK = re.compile(
+    r"\s*---(?P<newline>\r?\n)(?P<yaml>(?:.*\n)*?)---(?:\r?\n|$)"
+)
+_TOP_LEVEL_KEY = re.compile(r"(?P<key>[^\s#'\"-][^:]*?)\s*:(?:\s|$)")
+
+
+def _frontmatter_key_spans(
+    yaml_lines: list[str],
+) -> Dict[str, Tuple[int, int]]:
+    """
+    Map each top-level key of a frontmatter block to the range of lines its
+    entry occupies: the key's line plus any indented or sequence lines which
+    continue it.
+    """
+    spans: Dict[str, Tuple[int, int]] = {}
+    key: Optional[str] = None
+    start = end = 0
+    for line_number, line in enumerate(yaml_lines):
+        # Sequences may be written without indentation
+        if key is not None and line[:1] in (" ", "\t", "-"):
+            end = line_number + 1
+            continue
+        if not line.strip():
+            # Blank lines only belong to an entry if it continues after them
+            continue
+        if key is not None:
+            spans[key] = (start, end)
+            key = None
+        if match := _TOP_LEVEL_KEY.match(line):
+            key = match.group("key")
+            start, end = line_number, line_number + 1
+    if key is not None:
+        spans[key] = (start, end)
+    return spans
+
+
+def _render_frontmatter_entry(key: str, value: object, newline: str) -> str:
+    stream = io.StringIO()
+    _frontmatter_writer.dump({key: value}, stream)
+    return stream.getvalue().replace("\n", newline)
+
+
+def patch_frontmatter(file_path: Path, updates: Dict[str, object]) -> bool:
+    """
+    Set keys in a markdown file's YAML frontmatter, rewriting only the lines
+    of those keys. Other frontmatter lines and the markdown body are kept
+    byte-for-byte, and keys which are not yet present are appended to the
+    frontmatter. Patched lines use the file's line endings.
+
+    The file is replaced atomically, and is not written at all if its bytes
+    would not change, so that its mtime is preserved.
+
+    Args:
+        file_path: Path to the markdown file
+        updates: The new value of each key
+
+    Returns:
+        Whether the file was changed.
+
+    Raises:
+        ValueError: If the file has no frontmatter, or if its frontmatter is
+            not a mapping whose top-level keys can all be located, e.g.
+            because a key is quoted. The file is then left unchanged.
+    """
+    original = file_path.read_bytes()
+    content = original.decode("utf-8")
+    block = _FRONTMATTER_BLOCK.match(content)
+    if not block:
+        raise ValueError(f"No frontmatter found in {file_path}")
+
+    # Unlike splitlines(), only splits at newlines, as YAML does
+    yaml_lines = re.findall(r".*\n", block.group("yaml"))
+    spans = _frontmatter_key_spans(yaml_lines)
+    try:
+        parsed = _read_only_yaml.load(block.group("yaml"))
+    except YAMLError as e:
+        raise ValueError(f"Invalid frontmatter in {file_path}: {e}") from e
+    if parsed is not None and not isinstance(parsed, dict):
+        raise ValueError(f"Frontmatter in {file_path} is not a mapping")
+    # Patching around an unlocated key could duplicate it
+    unlocated = [key for key in parsed or {} if str(key) not in spans]
+    if unlocated:
+        raise ValueError(
+            f"Cannot locate frontmatter keys {unlocated} in {file_path}"
+        )
+    appended: list[str] = []
+    # Replace later spans first, so earlier line numbers stay valid
+    for key, value in sorted(
+        updates.items(),
+        key=lambda item: spans.get(item[0], (-1, -1)),
+        reverse=True,
+    ):
+        entry = _render_frontmatter_entry(key, value, block.group("newline"))
+        if key in spans:
+            start, end = spans[key]
+            yaml_lines[start:end] = [entry]
+        else:
+            appended.append(entry)
+
+    patched = (
+        content[: block.start("yaml")]
+        + "".join(yaml_lines + appended)
+        + content[block.end("yaml") :]
+    ).encode("utf-8")
+    if patched == original:
+        return False
+
+    # Write beside the file, so the rename cannot cross filesystems
+    with tempfile.NamedTemporaryFile(
+        dir=file_path.parent, prefix=f".{file_path.name}.", delete=False
+    ) as temp_file:
+        try:
+            temp_file.write(patched)
+            temp_file.close()
+            os.chmod(temp_file.name, file_path.stat().st_mode)
+            os.replace(temp_file.name, file_path)
+        except BaseException:
+            os.unlink(temp_file.name)
+            raise
+    return True
+
+
+# Relative to the Git root
+FRONTMATTER_INDEX_PATH = Path(".cache") / "frontmatter_index.sqlite"
+
+# Only these frontmatter keys are stored in the index
+INDEXED_FRONTMATTER_KEYS = (
+    "title",
+    "description",
+    "permalink",
+    "aliases",
+    "tags",
+    "date_published",
+    "date_updated",
+    "card_image",
+)
+
+
+def _json_default(value: object) -> str:
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"Cannot index value of type {type(value)}")
+
+
+class IndexedFrontmatter(dict):
+    """
+    The indexed keys of a file's frontmatter. `has_frontmatter` tells apart a
+    file without (non-empty) frontmatter from one whose frontmatter has no
+    indexed keys.
+    """
+
+    def __init__(self, metadata: dict, has_frontmatter: bool) -> None:
+        super().__init__(metadata)
+        self.has_frontmatter = has_frontmatter
+
+
+# Bump when the index's table changes, to rebuild existing indexes
+_FRONTMATTER_INDEX_SCHEMA = 2
+
+
+class FrontmatterIndex:
+    """
+    On-disk SQLite cache of parsed frontmatter, so that unchanged markdown
+    files are not re-parsed on every run.
+
+    Entries are keyed by path and validated against the file's mtime and
+    size. When those differ, the content hash is compared before re-parsing,
+    so that e.g. a fresh checkout of unchanged files still hits the cache.
+
+    Only INDEXED_FRONTMATTER_KEYS are stored. Dates are returned as ISO 8601
+    strings. Entries of files which no longer exist are removed on opening.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(db_path)
+        (schema,) = self._connection.execute("PRAGMA user_version").fetchone()
+        if schema != _FRONTMATTER_INDEX_SCHEMA:
+            self._connection.execute("DROP TABLE IF EXISTS frontmatter")
+            self._connection.execute(
+                f"PRAGMA user_version = {_FRONTMATTER_INDEX_SCHEMA}"
+            )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS frontmatter (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                has_frontmatter INTEGER NOT NULL
+            )
+            """
+        )
+        missing_paths = [
+            (path,)
+            for (path,) in self._connection.execute(
+                "SELECT path FROM frontmatter"
+            ).fetchall()
+            if not Path(path).exists()
+        ]
+        self._connection.executemany(
+            "DELETE FROM frontmatter WHERE path = ?", missing_paths
+        )
+
+    def __enter__(self) -> "FrontmatterIndex":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Save new entries to disk and close the database.
+        """
+        self._connection.commit()
+        self._connection.close()
+
+    def get(
+        self,
+        md_file: Path,
+        verbose: bool = False,
+        raw_content: Optional[bytes] = None,
+    ) -> IndexedFrontmatter:
+        """
+        Get the indexed frontmatter of a markdown file, parsing the file only
+        if it changed since it was last indexed.
+
+        Args:
+            md_file: Path to the markdown file
+            verbose: Whether to print error messages when parsing
+            raw_content: The file's bytes, if the caller already read them
+
+        Returns:
+            The indexed frontmatter keys, which are empty if there is no
+            frontmatter or none of its keys are indexed.
+
+        Raises:
+            YAMLError: If the frontmatter cannot be parsed.
+        """
+        key = str(md_file.resolve())
+        stat = md_file.stat()
+        row = self._connection.execute(
+            "SELECT mtime_ns, size, sha256, metadata, has_frontmatter"
+            " FROM frontmatter WHERE path = ?",
+            (key,),
+        ).fetchone()
+        if row and (row[0], row[1]) == (stat.st_mtime_ns, stat.st_size):
+            return IndexedFrontmatter(json.loads(row[3]), bool(row[4]))
+
+        if raw_content is None:
+            raw_content = md_file.read_bytes()
+        sha256 = hashlib.sha256(raw_content).hexdigest()
+        if row and row[2] == sha256:
+            metadata_json, has_frontmatter = row[3], bool(row[4])
+        else:
+            metadata, _ = split_yaml_content(
+                raw_content.decode("utf-8"),
+                md_file,
+                verbose=verbose,
+                mode="read",
+            )
+            metadata_json = json.dumps(
+                {
+                    field: metadata[field]
+                    for field in INDEXED_FRONTMATTER_KEYS
+                    if field in metadata
+                },
+                default=_json_default,
+            )
+            has_frontmatter = bool(metadata)
+
+        self._connection.execute(
+            "INSERT OR REPLACE INTO frontmatter VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                stat.st_mtime_ns,
+                stat.st_size,
+                sha256,
+                metadata_json,
+                has_frontmatter,
+            ),
+        )
+        return IndexedFrontmatter(json.loads(metadata_json), has_frontmatter)
+
+
+def _read_frontmatter(
+    md_file: Path, index: Optional[FrontmatterIndex], verbose: bool
+) -> dict:
+    if index is not None:
+        return index.get(md_file, verbose=verbose)
+    front_matter, _ = split_yaml(md_file, verbose=verbose, mode="read")
+    return front_matter
+
+
+def build_html_to_md_map(
+    md_dir: Path, index: Optional[FrontmatterIndex] = None
+) -> Dict[str, Path]:
     """
     Build a mapping of permalinks to markdown file paths by extracting and
     parsing the YAML front matter of each markdown file.
 
     Args:
         md_dir: Path to the directory containing markdown files
+        index: Optional frontmatter index to avoid re-parsing unchanged files
 
     Returns:
         Dictionary mapping permalinks to their corresponding markdown file paths
@@ -170,7 +620,7 @@ def build_html_to_md_map(md_dir: Path) -> Dict[str, Path]:
 
     for md_file in md_files:
         try:
-            front_matter, _ = split_yaml(md_file, verbose=False)
+            front_matter = _read_frontmatter(md_file, index, verbose=False)
 
             if front_matter:
                 permalink = front_matter.get("permalink")
@@ -184,7 +634,9 @@ def build_html_to_md_map(md_dir: Path) -> Dict[str, Path]:
     return html_to_md_path
 
 
-def collect_aliases(md_dir: Path) -> Set[str]:
+def collect_aliases(
+    md_dir: Path, index: Optional[FrontmatterIndex] = None
+) -> Set[str]:
     """
     Collect all aliases from the markdown files.
     """
@@ -192,7 +644,7 @@ def collect_aliases(md_dir: Path) -> Set[str]:
     for md_file in get_files(
         md_dir, filetypes_to_match=(".md",), use_git_ignore=True
     ):
-        front_matter, _ = split_yaml(md_file, verbose=True)
+        front_matter = _read_frontmatter(md_file, index, verbose=True)
         if front_matter:
             aliases_list = front_matter.get("aliases", [])
             if isinstance(aliases_list, list):
@@ -228,23 +680,90 @@ def body_is_empty(soup: BeautifulSoup) -> bool:
     )
 
 
-def parse_html_file(file_path: Path) -> BeautifulSoup:
+# Backends which can build a BeautifulSoup tree. "html.parser" is pure Python
+# and always available; "lxml" is C-backed and much faster.
+HtmlParser = Literal["html.parser", "lxml"]
+HTML_PARSERS: Tuple[HtmlParser, ...] = get_args(HtmlParser)
+DEFAULT_HTML_PARSER: HtmlParser = "html.parser"
+
+_PARSER_MODULES: Dict[HtmlParser, str] = {
+    "lxml": "lxml",
+}
+
+
+@functools.cache
+def html_parser_available(parser: HtmlParser) -> bool:
+    """
+    Whether the given parser backend is installed and importable.
+    """
+    if parser not in _PARSER_MODULES:
+        return parser in HTML_PARSERS
+    try:
+        importlib.import_module(_PARSER_MODULES[parser])
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_html_parser(parser: HtmlParser) -> HtmlParser:
+    """
+    Return `parser` if it is installed, falling back to "html.parser".
+    """
+    if html_parser_available(parser):
+        return parser
+    print(
+        f"Warning: HTML parser {parser} is not installed; using html.parser",
+        file=sys.stderr,
+    )
+    return "html.parser"
+
+
+def parse_html(
+    markup: str, parser: Optional[HtmlParser] = None
+) -> BeautifulSoup:
+    """
+    Parse HTML markup into a BeautifulSoup object.
+
+    Args:
+        markup: The HTML to parse.
+        parser: Backend to parse with. Defaults to DEFAULT_HTML_PARSER.
+
+    Returns:
+        BeautifulSoup: The parsed document.
+    """
+    return BeautifulSoup(markup, parser or DEFAULT_HTML_PARSER)
+
+
+def parse_html_file(
+    file_path: Path, parser: Optional[HtmlParser] = None
+) -> BeautifulSoup:
     """
     Parse an HTML file and return a BeautifulSoup object.
     """
     with open(file_path, "r", encoding="utf-8") as file:
-        return BeautifulSoup(file.read(), "html.parser")
+        return parse_html(file.read(), parser)
 
 
 files_without_md_path = ("404", "all-tags", "recent")
 
 
-def should_have_md(file_path: Path) -> bool:
+def should_have_md(
+    file_path: Path,
+    parser: Optional[HtmlParser] = None,
+    soup: Optional[BeautifulSoup] = None,
+) -> bool:
     """
     Whether there should be a markdown file for this html file.
+
+    Args:
+        file_path: Path to the HTML file
+        parser: HTML parser backend to use, if the file must be parsed
+        soup: The already-parsed file, so that it is not parsed again
     """
     return (
         "tags" not in file_path.parts
         and file_path.stem not in files_without_md_path
-        and not is_redirect(parse_html_file(file_path))
+        and not is_redirect(
+            soup if soup is not None else parse_html_file(file_path, parser)
+        )
     )